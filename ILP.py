@@ -1,7 +1,11 @@
-from typing import Optional, Set, Tuple, Dict
-from pulp import LpMaximize, LpProblem, LpVariable, lpSum, LpBinary, PULP_CBC_CMD, LpMinimize, LpStatus, HiGHS_CMD
+import highspy
+import numpy as np
+from typing import Optional, Set, Tuple, Dict, Iterable, List, FrozenSet
+from pulp import LpMaximize, LpProblem, LpVariable, lpSum, LpBinary, PULP_CBC_CMD, LpMinimize, LpStatus, HiGHS_CMD, value
+from pulp import LpSolutionOptimal
 from collections import defaultdict
 from data_processor import DataProcessor
+from coverage import CoverageState
 from pulp import HiGHS
 
 class ILPSoftwareSelector:
@@ -10,8 +14,46 @@ class ILPSoftwareSelector:
     Гарантирует математически оптимальное решение задачи максимального покрытия.
     """
 
-    def __init__(self, processor: DataProcessor):
+    # Способы построения и решения модели: через объекты PuLP (решатель HiGHS или CBC)
+    # или матрицей напрямую в highspy
+    BACKENDS = ('pulp', 'highspy', 'cbc')
+    # Формулировки модели максимального покрытия (см. _lean_rows)
+    FORMULATIONS = ('standard', 'lean')
+    # Предел P * P * ПО для поиска вложенных наборов (умножение матриц)
+    MAX_NESTING_WORK = 5 * 10 ** 10
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        merge_equivalent: bool = True,
+        backend: str = 'pulp',
+        formulation: str = 'standard',
+        solver_options: Optional[Dict[str, object]] = None
+    ):
+        """
+        Args:
+            processor: DataProcessor с загруженными данными
+            merge_equivalent: Решать задачу над супер-элементами - классами ПО
+                              с одинаковым набором АРМ (см. merge_equivalent_software)
+            backend: 'pulp', 'highspy' или 'cbc' (модель PuLP, решатель CBC)
+            formulation: 'standard' или 'lean' (компактная модель максимального покрытия)
+            solver_options: Параметры решателя (для HiGHS - имена опций HiGHS,
+                            например {'random_seed': 7, 'presolve': 'off'})
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown ILP backend: {backend}")
+        if formulation not in self.FORMULATIONS:
+            raise ValueError(f"Unknown ILP formulation: {formulation}")
         self.processor = processor
+        self.merge_equivalent = merge_equivalent
+        self.backend = backend
+        self.formulation = formulation
+        self.solver_options = dict(solver_options or {})
+        # Размеры последней построенной модели (переменные, ограничения, наборы)
+        self.last_model_stats: Dict[str, int] = {}
+        # Отчёт о сокращении последней задачи перед решением; 'padded_software' -
+        # ПО, добавленное добивкой до лимита, а не выбранное решателем
+        self.last_kernel_report: Dict = {}
 
     def find_best_software_set_ilp(
         self,
@@ -20,7 +62,8 @@ class ILPSoftwareSelector:
         remaining_arms: Set[str],
         selection_bonus: float = 0.001,
         time_limit: Optional[int] = None,
-        warm_start_solution: Optional[Set[str]] = None
+        warm_start_solution: Optional[Set[str]] = None,
+        mip_gap: Optional[float] = None
     ) -> Tuple[Set[str], Set[str]]:
         """
         Находит оптимальный набор ПО, максимизируя количество ПОЛНОСТЬЮ покрытых АРМов.
@@ -29,127 +72,925 @@ class ILPSoftwareSelector:
             time_limit: Максимальное время работы решателя в секундах (None = без ограничения).
                        При ограничении времени решатель может вернуть неоптимальное, но допустимое решение.
             warm_start_solution: Опциональное стартовое решение (набор ПО) для ускорения ILP.
+            mip_gap: Остановить решатель, когда относительный разрыв до верхней оценки
+                     не больше mip_gap (None = значение HiGHS по умолчанию)
         """
-        available_software = list(
-            set(self.processor.software_to_arms.keys()) - already_tested
-        )
-        
-        if not available_software or not remaining_arms:
+        if self.merge_equivalent:
+            merged, inner = self._merged_selector(already_tested)
+            selected_software, migrating_arms = inner.find_best_software_set_ilp(
+                limit=limit,
+                already_tested=set(),
+                remaining_arms=remaining_arms,
+                selection_bonus=selection_bonus,
+                time_limit=time_limit,
+                warm_start_solution=merged.compress_software(warm_start_solution) if warm_start_solution else None,
+                mip_gap=mip_gap
+            )
+            self._adopt_reports(inner)
+            if 'padded_software' in inner.last_kernel_report:
+                self.last_kernel_report = dict(inner.last_kernel_report)
+                self.last_kernel_report['padded_software'] = sorted(
+                    merged.expand_software(set(inner.last_kernel_report['padded_software']))
+                )
+            return merged.expand_software(selected_software), migrating_arms
+
+        model_inputs = self._max_coverage_inputs(limit, already_tested, remaining_arms)
+        if model_inputs is None:
             return set(), set()
+        profiles, available_software, all_available_software = model_inputs
         
-        # Создаем задачу максимизации
-        problem = LpProblem("Maximize_Migrating_ARMs", LpMaximize)
+        if not profiles:
+            # Ни один АРМ не может быть покрыт - добираем лимит популярным ПО
+            padded_software = self._pad_selection(set(), limit, all_available_software)
+            self.last_kernel_report['padded_software'] = sorted(padded_software)
+            return padded_software, set()
         
-        # ПЕРЕМЕННЫЕ РЕШЕНИЯ
-        # x[sw] = 1 если ПО `sw` выбрано, 0 иначе
-        x = {
-            sw: LpVariable(f"sw_{i}", cat=LpBinary)
-            for i, sw in enumerate(available_software)
-        }
+        # Стоимость ПО в единицах исходного ПО (для супер-элементов - размер класса)
+        cost = self._software_costs(available_software)
+        cost_row = np.array([cost[sw] for sw in available_software], dtype=float)
         
-        # Задаем начальные значения из warm start (если есть)
-        if warm_start_solution:
-            for sw in available_software:
-                x[sw].setInitialValue(1 if sw in warm_start_solution else 0)
+        if self.backend == 'highspy':
+            # Та же модель, собранная матрицей NumPy и переданная в HiGHS одним вызовом
+            x_values, z_values, status = self._solve_highspy(
+                profiles,
+                available_software,
+                x_objective=selection_bonus * cost_row,
+                z_objective=np.array([len(arms) for _, arms in profiles], dtype=float),
+                maximize=True,
+                rows=[(cost_row, None, -highspy.kHighsInf, limit)],
+                arms=remaining_arms,
+                lean=self.formulation == 'lean',
+                time_limit=time_limit,
+                warm_start_solution=warm_start_solution,
+                mip_gap=mip_gap
+            )
+        else:
+            # Создаем задачу максимизации
+            problem = LpProblem("Maximize_Migrating_ARMs", LpMaximize)
         
-        # z[arm] = 1 если АРМ `arm` полностью покрыт, 0 иначе
-        z = {
-            arm: LpVariable(f"arm_{j}", cat=LpBinary)
-            for j, arm in enumerate(remaining_arms)
-        }
+            # ПЕРЕМЕННЫЕ РЕШЕНИЯ
+            # x[sw] = 1 если ПО `sw` выбрано, 0 иначе
+            x = {
+                sw: LpVariable(f"sw_{i}", cat=LpBinary)
+                for i, sw in enumerate(available_software)
+            }
         
-        # Задаем начальные значения для z[arm] на основе warm_start
-        if warm_start_solution:
-            for arm in remaining_arms:
-                untested_sw_for_arm = self.processor.arm_software_map.get(arm, set()) - already_tested
-                # АРМ покрыт, если все его непротестированное ПО есть в warm_start
-                is_covered = untested_sw_for_arm and untested_sw_for_arm.issubset(warm_start_solution)
-                z[arm].setInitialValue(1 if is_covered else 0)
+            # Задаем начальные значения из warm start (если есть)
+            if warm_start_solution:
+                for sw in available_software:
+                    x[sw].setInitialValue(1 if sw in warm_start_solution else 0)
         
-        # Создаем индексы для уникальных имён ограничений
-        arm_index = {arm: j for j, arm in enumerate(remaining_arms)}
-        sw_index = {sw: i for i, sw in enumerate(available_software)}
+            # z[p] = 1 если все АРМы с остаточным набором `p` полностью покрыты, 0 иначе
+            z = [LpVariable(f"prof_{j}", cat=LpBinary) for j in range(len(profiles))]
         
-        # ЦЕЛЕВАЯ ФУНКЦИЯ
-        # Максимизируем количество полностью покрытых АРМов.
-        # Добавляем маленький бонус за каждое выбранное ПО, чтобы решатель
-        # стремился выбрать ПО до лимита, если это не ухудшает основной показатель.
-        problem += lpSum(z.values()) + selection_bonus * lpSum(x.values()), "Objective"
+            # Задаем начальные значения для z[p] на основе warm_start
+            if warm_start_solution:
+                for j, (profile_software, _) in enumerate(profiles):
+                    # Набор покрыт, если все его непротестированное ПО есть в warm_start
+                    z[j].setInitialValue(1 if profile_software.issubset(warm_start_solution) else 0)
         
-        # ОГРАНИЧЕНИЯ
+            # Создаем индексы для уникальных имён ограничений
+            sw_index = {sw: i for i, sw in enumerate(available_software)}
         
-        # 1. Ограничение на количество выбранного ПО
-        problem += lpSum(x.values()) <= limit, "Software_Limit"
+            # ЦЕЛЕВАЯ ФУНКЦИЯ
+            # Максимизируем количество полностью покрытых АРМов (вес набора = число его АРМ).
+            # Добавляем маленький бонус за каждое выбранное ПО, чтобы решатель
+            # стремился выбрать ПО до лимита, если это не ухудшает основной показатель.
+            problem += (
+                lpSum(len(arms) * z[j] for j, (_, arms) in enumerate(profiles))
+                + selection_bonus * lpSum(cost[sw] * x[sw] for sw in available_software)
+            ), "Objective"
         
-        # 2. Связь между полным покрытием АРМа (z) и выбором ПО (x)
-        for arm in remaining_arms:
-            # Находим все ПО для этого АРМа, которое еще не протестировано
-            untested_sw_for_arm = [
-                sw for sw in (self.processor.arm_software_map.get(arm, set()) - already_tested)
-                if sw in available_software
-            ]
-            
-            # Если для АРМа нет необходимого ПО в доступном списке, он не может быть покрыт
-            if not untested_sw_for_arm:
-                problem += z[arm] == 0, f"ARM_uncoverable_a{arm_index[arm]}"
-                continue
-
-            # Чтобы АРМ был покрыт (z[arm] = 1), КАЖДОЕ из его непротестированных ПО должно быть выбрано.
-            # Это логическое "И", которое в ILP моделируется так:
-            # Ограничение "вниз": z[arm] должно быть <= x[sw] для каждого нужного ПО
-            for sw in untested_sw_for_arm:
-                problem += z[arm] <= x[sw], f"ARM_comp_a{arm_index[arm]}_s{sw_index[sw]}"
+            # ОГРАНИЧЕНИЯ
+        
+            # 1. Ограничение на количество выбранного ПО
+            problem += lpSum(cost[sw] * x[sw] for sw in available_software) <= limit, "Software_Limit"
+        
+            # 2. Связь между полным покрытием набора (z) и выбором ПО (x)
+            # АРМы без непротестированного ПО в модель не входят (как и раньше, они не считаются мигрирующими)
+            variables = [x[sw] for sw in available_software] + z
+            for r, (columns, coefficients) in enumerate(
+                self._lean_rows(profiles, available_software) if self.formulation == 'lean' else []
+            ):
+                problem += (
+                    lpSum(c * variables[col] for col, c in zip(columns, coefficients)) <= 0,
+                    f"ARM_lean_{r}"
+                )
+            for j, (profile_software, _) in enumerate(profiles if self.formulation == 'standard' else []):
+                # Чтобы набор был покрыт (z[p] = 1), КАЖДОЕ из его непротестированных ПО должно быть выбрано.
+                # Это логическое "И", которое в ILP моделируется так:
+                # Ограничение "вниз": z[p] должно быть <= x[sw] для каждого нужного ПО
+                for sw in profile_software:
+                    problem += z[j] <= x[sw], f"ARM_comp_p{j}_s{sw_index[sw]}"
             
-            # Ограничение "вверх": z[arm] должно стать 1, если все x[sw] равны 1
-            # z[arm] >= sum(x[sw]) - (N-1), где N - количество нужного ПО
-            problem += (
-                z[arm] >= lpSum(x[sw] for sw in untested_sw_for_arm) - (len(untested_sw_for_arm) - 1),
-                f"ARM_force_a{arm_index[arm]}"
-            )
+                # Ограничение "вверх": z[p] должно стать 1, если все x[sw] равны 1
+                # z[p] >= sum(x[sw]) - (N-1), где N - количество нужного ПО
+                problem += (
+                    z[j] >= lpSum(x[sw] for sw in profile_software) - (len(profile_software) - 1),
+                    f"ARM_force_p{j}"
+                )
 
-        # РЕШЕНИЕ ЗАДАЧИ
-        # Используем HiGHS решатель с поддержкой warm start
-        solver = HiGHS(
-            msg=0,
-            timeLimit=time_limit,
-            warmStart=True  # Включаем использование начальных значений переменных
-        )
+            self._record_model_stats(
+                len(problem.variables()),
+                len(problem.constraints),
+                sum(len(constraint) for constraint in problem.constraints.values()),
+                remaining_arms,
+                profiles
+            )
 
-        problem.solve(solver)
+            # РЕШЕНИЕ ЗАДАЧИ
+            # Используем решатель с поддержкой warm start
+            problem.solve(self._pulp_solver(time_limit, mip_gap))
+            self._record_pulp_result(problem)
         
-        # ПРОВЕРКА СТАТУСА И ИЗВЛЕЧЕНИЕ РЕЗУЛЬТАТА
-        status = LpStatus[problem.status]
+            # ПРОВЕРКА СТАТУСА И ИЗВЛЕЧЕНИЕ РЕЗУЛЬТАТА
+            status = self._pulp_status(problem)
+            x_values = [x[sw].varValue for sw in available_software]
         
+        self.last_model_stats['status'] = status
+
         # Извлекаем решение из переменных (если есть)
         selected_software = {
-            sw for sw in available_software
-            if x[sw].varValue is not None and x[sw].varValue > 0.5
+            sw for sw, value in zip(available_software, x_values)
+            if value is not None and value > 0.5
         }
         
+        # ПО, исключённое при сокращении задачи, участвует только в добивке до лимита.
+        # Добивка может завершить наборы (решение не оптимально или остановлено по mip_gap),
+        # поэтому мигрирующие АРМ считаются уже по дополненному выбору. Наборы, удалённые
+        # при сокращении, стоят больше лимита и дополненным выбором покрыты быть не могут
+        padded_software = self._pad_selection(selected_software, limit, all_available_software)
+        self.last_kernel_report['padded_software'] = sorted(padded_software - selected_software)
+
+        # Разворачиваем покрытые наборы обратно в АРМы. Покрытие определяется по x:
+        # в компактной модели нет строк, поднимающих z до 1
         migrating_arms = {
-            arm for arm in remaining_arms
-            if z[arm].varValue is not None and z[arm].varValue > 0.5
+            arm
+            for profile_software, arms in profiles
+            if profile_software <= padded_software
+            for arm in arms
         }
         
         # Если решение оптимальное или найдено непустое feasible решение - возвращаем его
         if status == 'Optimal' or (selected_software and migrating_arms):
-            return selected_software, migrating_arms
+            return padded_software, migrating_arms
         
         # Если solver не вернул решение (timeout без feasible), используем warm_start как fallback
         # Это происходит когда: status = 'Not Solved' или 'Infeasible' или другой неуспешный статус
+        self.last_kernel_report['padded_software'] = []
         if warm_start_solution:
             # Вычисляем покрытые АРМы для warm_start решения
-            covered_arms = set()
-            for arm in remaining_arms:
-                untested_sw_for_arm = self.processor.arm_software_map.get(arm, set()) - already_tested
-                # АРМ покрыт, если все его непротестированное ПО есть в warm_start
-                if untested_sw_for_arm and untested_sw_for_arm.issubset(warm_start_solution):
-                    covered_arms.add(arm)
+            covered_arms = {
+                arm
+                for profile_software, arms in profiles
+                if profile_software.issubset(warm_start_solution)
+                for arm in arms
+            }
             
             return warm_start_solution, covered_arms
         
         # Нет ни решения от solver'а, ни warm_start - возвращаем пустое решение
         return set(), set()
+
+    def _max_coverage_inputs(
+        self,
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Set[str]
+    ) -> Optional[Tuple[List[Tuple[FrozenSet[str], List[str]]], List[str], List[str]]]:
+        """
+        Подготовить данные модели максимального покрытия
+
+        Returns:
+            Сокращённые наборы, ПО модели и всё доступное ПО
+            или None, если выбирать не из чего
+        """
+        available_software = list(
+            set(self.processor.software_to_arms.keys()) - already_tested
+        )
+        
+        if not available_software or not remaining_arms:
+            return None
+        
+        # Группируем АРМ по остаточным наборам ПО (без уже протестированного):
+        # АРМ с одинаковым набором покрываются одновременно, поэтому одна
+        # переменная z на набор с весом "количество АРМ" эквивалентна z на каждый АРМ
+        profiles = self._residual_profiles(already_tested, remaining_arms)
+        
+        # Сокращаем задачу: АРМ, которым нужно больше `limit` ПО, не могут быть
+        # покрыты в этой волне, а ПО, которое есть только на таких АРМ, бесполезно
+        profiles, model_software = self._kernelize(profiles, available_software, limit)
+        return profiles, model_software, available_software
+
+    def lp_relaxation_bound(
+        self,
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Set[str]
+    ) -> float:
+        """
+        Верхняя оценка числа мигрирующих АРМ по LP-релаксации модели
+        максимального покрытия (в текущей формулировке, решается через highspy)
+
+        Args:
+            limit: Лимит ПО в волне
+            already_tested: Уже протестированное ПО
+            remaining_arms: Учитываемые АРМ
+
+        Returns:
+            Значение LP-релаксации (не меньше оптимального числа мигрирующих АРМ)
+        """
+        if self.merge_equivalent:
+            _, inner = self._merged_selector(already_tested)
+            bound = inner.lp_relaxation_bound(limit, set(), remaining_arms)
+            self._adopt_reports(inner)
+            return bound
+
+        model_inputs = self._max_coverage_inputs(limit, already_tested, remaining_arms)
+        if model_inputs is None or not model_inputs[0]:
+            return 0.0
+        profiles, available_software, _ = model_inputs
+        cost = self._software_costs(available_software)
+        cost_row = np.array([cost[sw] for sw in available_software], dtype=float)
+        self._solve_highspy(
+            profiles,
+            available_software,
+            x_objective=np.zeros(len(available_software)),
+            z_objective=np.array([len(arms) for _, arms in profiles], dtype=float),
+            maximize=True,
+            rows=[(cost_row, None, -highspy.kHighsInf, limit)],
+            arms=remaining_arms,
+            lean=self.formulation == 'lean',
+            time_limit=None,
+            warm_start_solution=None,
+            relax=True
+        )
+        return self.last_model_stats['objective']
+
+    def plan_waves_ilp(
+        self,
+        wave_limits: List[int],
+        already_tested: Optional[Set[str]] = None,
+        remaining_arms: Optional[Set[str]] = None,
+        selection_bonus: float = 0.001,
+        time_limit: Optional[float] = None,
+        warm_start_plan: Optional[List[Set[str]]] = None,
+        mip_gap: Optional[float] = None
+    ) -> List[Set[str]]:
+        """
+        Совместное планирование нескольких волн одной моделью с индексом волны.
+
+        x[sw, w] = 1, если ПО протестировано к концу волны w, z[p, w] = 1, если
+        набор p мигрировал к концу волны w. Ограничения: x[sw, w-1] <= x[sw, w],
+        лимит каждой волны на прирост выбранного ПО и связь z с x (как в
+        find_best_software_set_ilp для каждой волны). Целевая функция - сумма
+        мигрировавших АРМ по всем волнам (АРМ-волны): АРМ, мигрировавший раньше,
+        учитывается в каждой следующей волне. Модель всегда решается через highspy.
+
+        Args:
+            wave_limits: Лимиты ПО для каждой волны
+            already_tested: Уже протестированное ПО
+            remaining_arms: Учитываемые АРМ (None = все АРМ)
+            selection_bonus: Бонус за выбранное ПО (добор до лимитов)
+            time_limit: Лимит времени на всю модель в секундах (None = без ограничения)
+            warm_start_plan: Стартовый план - ПО каждой волны (например, жадный)
+            mip_gap: Допустимый относительный разрыв до верхней оценки (None = по умолчанию)
+
+        Returns:
+            ПО, добавляемое в каждой волне (добранное до лимита волны популярным ПО)
+        """
+        already_tested = set(already_tested or ())
+        if remaining_arms is None:
+            remaining_arms = set(self.processor.arm_software_map.keys())
+
+        if self.merge_equivalent:
+            merged, inner = self._merged_selector(already_tested)
+            plan = inner.plan_waves_ilp(
+                wave_limits,
+                already_tested=set(),
+                remaining_arms=remaining_arms,
+                selection_bonus=selection_bonus,
+                time_limit=time_limit,
+                warm_start_plan=self._compress_plan(merged, warm_start_plan) if warm_start_plan else None,
+                mip_gap=mip_gap
+            )
+            self._adopt_reports(inner)
+            return [merged.expand_software(wave_software) for wave_software in plan]
+
+        n_waves = len(wave_limits)
+        budgets = np.cumsum(wave_limits)
+        model_inputs = self._max_coverage_inputs(int(budgets[-1]), already_tested, remaining_arms) if n_waves else None
+        if model_inputs is None:
+            return [set() for _ in wave_limits]
+        profiles, software, all_available_software = model_inputs
+        if not profiles:
+            return self._pad_plan([set() for _ in wave_limits], wave_limits, all_available_software)
+
+        n_software = len(software)
+        n_profiles = len(profiles)
+        sw_index = {sw: i for i, sw in enumerate(software)}
+        cost = self._software_costs(software)
+        cost_row = np.array([cost[sw] for sw in software], dtype=float)
+        profile_cost = np.array([sum(cost[sw] for sw in p) for p, _ in profiles])
+        inf = highspy.kHighsInf
+
+        # Строки связи z с x одной волны (столбцы x, затем z - как в _solve_highspy)
+        if self.formulation == 'lean':
+            base_rows = self._lean_rows(profiles, software)
+        else:
+            # Строки z >= sum(x) - (N-1) не нужны: целевая функция сама поднимает z
+            base_rows = [
+                ([n_software + j, sw_index[sw]], [1.0, -1.0])
+                for j, (p, _) in enumerate(profiles) for sw in sorted(p)
+            ]
+        base_index = np.array([col for columns, _ in base_rows for col in columns], dtype=np.int64)
+        base_value = np.array([c for _, coefficients in base_rows for c in coefficients])
+        base_lengths = np.array([len(columns) for columns, _ in base_rows], dtype=np.int64)
+
+        # Столбцы модели: x всех волн, затем z всех волн
+        z_offset = n_waves * n_software
+        index_parts, value_parts, length_parts, lower_parts, upper_parts = [], [], [], [], []
+        for w in range(n_waves):
+            index_parts.append(np.where(
+                base_index < n_software,
+                base_index + w * n_software,
+                base_index - n_software + z_offset + w * n_profiles
+            ))
+            value_parts.append(base_value)
+            length_parts.append(base_lengths)
+            lower_parts.append(np.full(len(base_lengths), -inf))
+            upper_parts.append(np.zeros(len(base_lengths)))
+
+        software_columns = np.arange(n_software)
+        for w in range(1, n_waves):
+            # Протестированное ПО остаётся протестированным: x[sw, w-1] - x[sw, w] <= 0
+            index_parts.append(np.column_stack([
+                software_columns + (w - 1) * n_software, software_columns + w * n_software
+            ]).ravel())
+            value_parts.append(np.tile([1.0, -1.0], n_software))
+            length_parts.append(np.full(n_software, 2))
+            lower_parts.append(np.full(n_software, -inf))
+            upper_parts.append(np.zeros(n_software))
+
+        for w, limit in enumerate(wave_limits):
+            # Лимит волны: стоимость ПО к концу волны w минус к концу волны w-1
+            columns = software_columns + w * n_software
+            values = cost_row
+            if w > 0:
+                columns = np.concatenate([columns, software_columns + (w - 1) * n_software])
+                values = np.concatenate([cost_row, -cost_row])
+            index_parts.append(columns)
+            value_parts.append(values)
+            length_parts.append([len(columns)])
+            lower_parts.append([-inf])
+            upper_parts.append([limit])
+
+        # Набор, не помещающийся в суммарный лимит первых волн, не может мигрировать в них
+        z_upper = np.concatenate([(profile_cost <= budget).astype(float) for budget in budgets])
+        weights = np.array([len(arms) for _, arms in profiles], dtype=float)
+        matrix_index = np.concatenate(index_parts)
+        row_lengths = np.concatenate(length_parts).astype(np.int64)
+        self._record_model_stats(
+            z_offset + n_waves * n_profiles, len(row_lengths), len(matrix_index), remaining_arms, profiles
+        )
+
+        start_values = None
+        cumulative_start = self._cumulative_plan(warm_start_plan) if warm_start_plan else None
+        if cumulative_start:
+            start_values = [
+                1.0 if sw in tested else 0.0 for tested in cumulative_start for sw in software
+            ] + [
+                1.0 if p <= tested else 0.0 for tested in cumulative_start for p, _ in profiles
+            ]
+
+        values, status = self._run_highspy(
+            col_cost=np.concatenate([np.tile(selection_bonus * cost_row, n_waves), np.tile(weights, n_waves)]),
+            col_upper=np.concatenate([np.ones(z_offset), z_upper]),
+            row_lengths=row_lengths,
+            matrix_index=matrix_index,
+            matrix_value=np.concatenate(value_parts),
+            row_lower=np.concatenate(lower_parts),
+            row_upper=np.concatenate(upper_parts),
+            maximize=True,
+            time_limit=time_limit,
+            start_values=start_values,
+            mip_gap=mip_gap
+        )
+        self.last_model_stats['status'] = status
+
+        if values is None:
+            # Решатель не нашёл допустимого решения - остаётся стартовый план
+            plan = [set(wave_software) for wave_software in warm_start_plan] if warm_start_plan else [
+                set() for _ in wave_limits
+            ]
+        else:
+            plan = []
+            tested: Set[str] = set()
+            for w in range(n_waves):
+                wave_values = values[w * n_software:(w + 1) * n_software]
+                selected = {sw for sw, v in zip(software, wave_values) if v > 0.5}
+                plan.append(selected - tested)
+                tested |= selected
+        return self._pad_plan(plan, wave_limits, all_available_software)
+
+    @staticmethod
+    def _cumulative_plan(plan: List[Set[str]]) -> List[Set[str]]:
+        """ПО, протестированное к концу каждой волны плана"""
+        cumulative, tested = [], set()
+        for wave_software in plan:
+            tested = tested | set(wave_software)
+            cumulative.append(tested)
+        return cumulative
+
+    def _compress_plan(self, merged: DataProcessor, plan: List[Set[str]]) -> List[Set[str]]:
+        """
+        Перевести план в супер-элементы: класс попадает в волну, к концу которой
+        протестирован весь класс
+        """
+        compressed, previous = [], set()
+        for tested in self._cumulative_plan(plan):
+            current = merged.compress_software(tested)
+            compressed.append(current - previous)
+            previous = current
+        return compressed
+
+    def _pad_plan(self, plan: List[Set[str]], wave_limits: List[int], software: List[str]) -> List[Set[str]]:
+        """
+        Дополнить каждую волну плана до её лимита популярным ПО,
+        не выбранным ни в одной волне
+        """
+        used = set().union(*plan) if plan else set()
+        padded = []
+        for wave_software, limit in zip(plan, wave_limits):
+            wave_software = self._pad_selection(
+                wave_software, limit, [sw for sw in software if sw not in used or sw in wave_software]
+            )
+            used |= wave_software
+            padded.append(wave_software)
+        return padded
+
+    def _lean_rows(
+        self,
+        profiles: List[Tuple[FrozenSet[str], List[str]]],
+        software: List[str]
+    ) -> List[Tuple[List[int], List[float]]]:
+        """
+        Строки компактной модели максимального покрытия (все вида sum(c * v) <= 0).
+
+        Столбцы: x (ПО в порядке software), затем z (наборы). Отличия от стандартной модели:
+        - строки z[p] >= sum(x) - (N-1) не нужны: целевая функция сама поднимает z;
+        - если набор q вложен в p, связь z[p] <= x[sw] для ПО из q заменяется
+          одной строкой z[p] <= z[q] (берётся наибольший вложенный набор);
+        - ПО одной стоимости, встречающееся только в одном наборе, связывается одной
+          агрегированной строкой k * z[p] <= sum(x[sw]): такие x взаимозаменяемы, и LP-оценка
+          не ослабевает. Супер-элементы разной стоимости агрегируются только внутри групп
+          равной стоимости - иначе LP выбрала бы дешёвые x вместо дорогих и завысила оценку.
+        """
+        n_software = len(software)
+        sw_index = {sw: i for i, sw in enumerate(software)}
+        cost = self._software_costs(software)
+        cost_row = [cost[sw] for sw in software]
+        members = [frozenset(sw_index[sw] for sw in p) for p, _ in profiles]
+        occurrences = np.zeros(n_software, dtype=np.int64)
+        for profile_members in members:
+            occurrences[list(profile_members)] += 1
+        parents = self._profile_parents(members, n_software)
+
+        rows = []
+        for j, profile_members in enumerate(members):
+            z_column = n_software + j
+            rest = profile_members
+            if parents[j] >= 0:
+                rows.append(([z_column, n_software + int(parents[j])], [1.0, -1.0]))
+                rest = profile_members - members[parents[j]]
+            shared = sorted(i for i in rest if occurrences[i] > 1)
+            private = defaultdict(list)
+            for i in sorted(i for i in rest if occurrences[i] == 1):
+                private[cost_row[i]].append(i)
+            for i in shared:
+                rows.append(([z_column, i], [1.0, -1.0]))
+            for group in private.values():
+                rows.append(([z_column] + group, [float(len(group))] + [-1.0] * len(group)))
+        return rows
+
+    def _profile_parents(self, members: List[FrozenSet[int]], n_software: int) -> np.ndarray:
+        """
+        Для каждого набора - наибольший вложенный в него другой набор (-1, если нет).
+        Вложенность проверяется умножением матриц инцидентности блоками строк
+        """
+        n_profiles = len(members)
+        parents = np.full(n_profiles, -1, dtype=np.int64)
+        if n_profiles < 2 or n_profiles * n_profiles * n_software > self.MAX_NESTING_WORK:
+            return parents
+
+        sizes = np.array([len(m) for m in members], dtype=np.float32)
+        incidence = np.zeros((n_profiles, n_software), dtype=np.float32)
+        for j, profile_members in enumerate(members):
+            incidence[j, list(profile_members)] = 1.0
+
+        block = 1024
+        for start in range(0, n_profiles, block):
+            stop = min(start + block, n_profiles)
+            common = incidence[start:stop] @ incidence.T
+            # q вложен в p: все ПО q есть в p, и q меньше p
+            nested = (common == sizes[None, :]) & (sizes[None, :] < sizes[start:stop, None])
+            score = np.where(nested, sizes[None, :], -1.0)
+            best = score.argmax(axis=1)
+            found = score[np.arange(stop - start), best] > 0
+            parents[start:stop] = np.where(found, best, -1)
+        return parents
+
+    def _residual_profiles(
+        self,
+        already_tested: Set[str],
+        arms: Set[str]
+    ) -> List[Tuple[FrozenSet[str], List[str]]]:
+        """
+        Сгруппировать АРМ по остаточным наборам ПО (ПО АРМ без уже протестированного).
+
+        АРМ без непротестированного ПО пропускаются.
+
+        Returns:
+            Список пар (остаточный набор ПО, список АРМ с этим набором)
+        """
+        processor = self.processor
+        tested_mask = processor.software_mask(already_tested)
+        arm_indices = processor.arm_indices
+        indptr = processor.arm_indptr
+
+        groups: Dict[tuple, List[int]] = {}
+        for arm_id in sorted(processor.encode_arms(arms).tolist()):
+            software_ids = arm_indices[indptr[arm_id]:indptr[arm_id + 1]]
+            residual = software_ids[~tested_mask[software_ids]]
+            if len(residual):
+                groups.setdefault(tuple(residual.tolist()), []).append(arm_id)
+
+        return [
+            (frozenset(processor.decode_software(software_ids)), processor.arm_names[arm_ids].tolist())
+            for software_ids, arm_ids in groups.items()
+        ]
+
+    def _merged_selector(self, already_tested: Set[str]) -> Tuple[DataProcessor, 'ILPSoftwareSelector']:
+        """
+        Сжать взаимозаменяемое непротестированное ПО в супер-элементы и создать
+        решатель над сжатым процессором (уже протестированное ПО в нём отсутствует)
+        """
+        merged = self.processor.merge_equivalent_software(already_tested)
+        return merged, ILPSoftwareSelector(
+            merged,
+            merge_equivalent=False,
+            backend=self.backend,
+            formulation=self.formulation,
+            solver_options=self.solver_options
+        )
+
+    def _adopt_reports(self, inner: 'ILPSoftwareSelector') -> None:
+        """Перенести статистику модели из решателя над супер-элементами"""
+        self.last_model_stats = inner.last_model_stats
+        self.last_kernel_report = inner.last_kernel_report
+
+    def _software_costs(self, software: Iterable[str]) -> Dict[str, int]:
+        """Стоимость ПО в единицах исходного ПО (1 для обычного ПО)"""
+        index = self.processor.software_index
+        weights = self.processor.software_weights
+        return {sw: int(weights[index[sw]]) for sw in software}
+
+    def _kernelize(
+        self,
+        profiles: List[Tuple[FrozenSet[str], List[str]]],
+        software: List[str],
+        max_profile_size: Optional[int]
+    ) -> Tuple[List[Tuple[FrozenSet[str], List[str]]], List[str]]:
+        """
+        Сокращение задачи перед решением (кернелизация).
+
+        Итеративно удаляет наборы (строки), которым нужно больше max_profile_size ПО,
+        и ПО (столбцы), которое не встречается ни в одном оставшемся наборе,
+        пока модель не перестанет уменьшаться. Отчёт сохраняется в last_kernel_report.
+
+        Args:
+            profiles: Остаточные наборы ПО с их АРМ
+            software: Доступное ПО
+            max_profile_size: Максимальная стоимость покрываемого набора (None = без ограничения)
+
+        Returns:
+            Сокращённые наборы и список оставшегося ПО (в исходном порядке)
+        """
+        def model_size(profiles, software):
+            variables = len(software) + len(profiles)
+            constraints = sum(len(p) for p, _ in profiles) + len(profiles) + 1
+            return variables, constraints
+
+        variables_before, constraints_before = model_size(profiles, software)
+        report = {
+            'arms_before': sum(len(arms) for _, arms in profiles),
+            'profiles_before': len(profiles),
+            'software_before': len(software),
+            'uncoverable_arms_removed': 0,
+            'uncoverable_profiles_removed': 0,
+            'dead_software_removed': 0,
+            'iterations': 0,
+        }
+
+        cost = self._software_costs(software)
+
+        while True:
+            report['iterations'] += 1
+            changed = False
+
+            # Строки: наборы, которые не помещаются в лимит
+            if max_profile_size is not None:
+                kept = [
+                    (p, arms) for p, arms in profiles
+                    if sum(cost[sw] for sw in p) <= max_profile_size
+                ]
+                if len(kept) < len(profiles):
+                    report['uncoverable_profiles_removed'] += len(profiles) - len(kept)
+                    report['uncoverable_arms_removed'] += (
+                        sum(len(arms) for _, arms in profiles) - sum(len(arms) for _, arms in kept)
+                    )
+                    profiles = kept
+                    changed = True
+
+            # Столбцы: ПО, которого нет ни в одном оставшемся наборе
+            used_software = set().union(*(p for p, _ in profiles))
+            live_software = [sw for sw in software if sw in used_software]
+            if len(live_software) < len(software):
+                report['dead_software_removed'] += len(software) - len(live_software)
+                software = live_software
+                changed = True
+
+            if not changed:
+                break
+
+        variables_after, constraints_after = model_size(profiles, software)
+        report.update({
+            'arms_after': sum(len(arms) for _, arms in profiles),
+            'profiles_after': len(profiles),
+            'software_after': len(software),
+            'variables_before': variables_before,
+            'variables_after': variables_after,
+            'constraints_before': constraints_before,
+            'constraints_after': constraints_after,
+        })
+        self.last_kernel_report = report
+        return profiles, software
+
+    def _pad_selection(self, selected: Set[str], limit: int, software: List[str]) -> Set[str]:
+        """
+        Дополнить выбор до лимита самым популярным из доступного ПО
+        (как это делал бонус за выбор ПО в полной модели).
+        Супер-элементы, не помещающиеся в остаток лимита, пропускаются.
+        """
+        cost = self._software_costs(software)
+        budget = limit - sum(cost.get(sw, 1) for sw in selected)
+        if budget <= 0:
+            return selected
+        popularity = self.processor.get_software_popularity()
+        candidates = sorted(
+            (sw for sw in software if sw not in selected),
+            key=lambda sw: (-popularity.get(sw, 0), sw)
+        )
+        padded = set(selected)
+        for sw in candidates:
+            if budget <= 0:
+                break
+            if cost[sw] <= budget:
+                padded.add(sw)
+                budget -= cost[sw]
+        return padded
+
+    def _record_model_stats(
+        self,
+        variables: int,
+        constraints: int,
+        nonzeros: int,
+        arms: Set[str],
+        profiles: List
+    ) -> None:
+        """Сохранить размеры построенной модели для отображения и бенчмарков"""
+        self.last_model_stats = {
+            'arms': len(arms),
+            'profiles': len(profiles),
+            'variables': variables,
+            'constraints': constraints,
+            'nonzeros': nonzeros,
+        }
+
+    def _pulp_solver(self, time_limit: Optional[float], mip_gap: Optional[float] = None, **params):
+        """
+        Решатель PuLP для backend: CBC при 'cbc', иначе HiGHS (через highspy).
+        solver_options передаются решателю (для CBC - строками "имя значение")
+        """
+        if self.backend == 'cbc':
+            return PULP_CBC_CMD(
+                msg=0,
+                timeLimit=time_limit,
+                gapRel=mip_gap,
+                warmStart=True,
+                options=[f"{name} {option}" for name, option in self.solver_options.items()]
+            )
+        return HiGHS(
+            msg=0,
+            timeLimit=time_limit,
+            gapRel=mip_gap,
+            warmStart=True,  # Включаем использование начальных значений переменных
+            **params,
+            **self.solver_options
+        )
+
+    @staticmethod
+    def _pulp_status(problem: LpProblem) -> str:
+        """
+        Статус решённой модели PuLP. CBC, остановленный по времени, сообщает
+        'Optimal' и для допустимого решения - оптимальность проверяется по статусу решения
+        """
+        status = LpStatus[problem.status]
+        if status == 'Optimal' and problem.sol_status != LpSolutionOptimal:
+            return 'Not Solved'
+        return status
+
+    def _record_pulp_result(self, problem: LpProblem) -> None:
+        """Сохранить значение целевой функции и разрыв решённой модели PuLP"""
+        self.last_model_stats['objective'] = value(problem.objective)
+        # HiGHS решает через highspy: разрыв берём из его модели (CBC разрыв не сообщает)
+        solver_model = getattr(problem, 'solverModel', None)
+        self.last_model_stats['gap'] = solver_model.getInfo().mip_gap if solver_model is not None else None
+
+    def _solve_highspy(
+        self,
+        profiles: List[Tuple[FrozenSet[str], List[str]]],
+        software: List[str],
+        x_objective: np.ndarray,
+        z_objective: np.ndarray,
+        maximize: bool,
+        rows: List[Tuple[Optional[np.ndarray], Optional[np.ndarray], float, float]],
+        arms: Set[str],
+        time_limit: Optional[float],
+        warm_start_solution: Optional[Set[str]],
+        lean: bool = False,
+        relax: bool = False,
+        mip_gap: Optional[float] = None
+    ) -> Tuple[Optional[List[float]], Optional[List[float]], str]:
+        """
+        Решить модель покрытия наборов напрямую через highspy.
+
+        Столбцы: x (ПО), затем z (наборы). Строки: z[p] <= x[sw] для каждого ПО
+        набора, z[p] >= sum(x[sw]) - (N-1) для каждого набора (при lean - строки
+        _lean_rows) и дополнительные строки `rows` вида (коэффициенты x,
+        коэффициенты z, нижняя граница, верхняя граница).
+        Матрица собирается массивами NumPy без имён ограничений.
+        При relax решается LP-релаксация; значение целевой функции сохраняется
+        в last_model_stats['objective'].
+
+        Returns:
+            Значения x, значения z (None, если решения нет) и статус в терминах PuLP
+        """
+        n_software = len(software)
+        n_profiles = len(profiles)
+        sw_index = {sw: i for i, sw in enumerate(software)}
+        inf = highspy.kHighsInf
+
+        if lean:
+            lean_rows = self._lean_rows(profiles, software)
+            coverage_index = [np.array([col for columns, _ in lean_rows for col in columns], dtype=np.int64)]
+            coverage_value = [np.array([c for _, coefficients in lean_rows for c in coefficients])]
+            coverage_lengths = [np.array([len(columns) for columns, _ in lean_rows], dtype=np.int64)]
+            coverage_lower = [np.full(len(lean_rows), -inf)]
+            coverage_upper = [np.zeros(len(lean_rows))]
+        else:
+            # Пары (набор, ПО) модели
+            sizes = np.array([len(p) for p, _ in profiles], dtype=np.int64)
+            member_profile = np.repeat(np.arange(n_profiles), sizes)
+            member_software = np.array(
+                [sw_index[sw] for p, _ in profiles for sw in sorted(p)], dtype=np.int64
+            )
+            n_members = len(member_software)
+            z_column = n_software + member_profile
+
+            # Строки z[p] - x[sw] <= 0: по два ненулевых элемента на строку
+            comp_index = np.column_stack([z_column, member_software]).ravel()
+            comp_value = np.tile([1.0, -1.0], n_members)
+
+            # Строки z[p] - sum(x[sw]) >= 1 - N: z и все ПО набора
+            force_start = np.concatenate([[0], np.cumsum(sizes + 1)])
+            force_index = np.empty(force_start[-1], dtype=np.int64)
+            force_value = np.full(force_start[-1], -1.0)
+            force_index[force_start[:-1]] = n_software + np.arange(n_profiles)
+            force_value[force_start[:-1]] = 1.0
+            member_slot = np.delete(np.arange(force_start[-1]), force_start[:-1])
+            force_index[member_slot] = member_software
+
+            coverage_index = [comp_index, force_index]
+            coverage_value = [comp_value, force_value]
+            coverage_lengths = [np.full(n_members, 2), sizes + 1]
+            coverage_lower = [np.full(n_members, -inf), 1.0 - sizes]
+            coverage_upper = [np.zeros(n_members), np.full(n_profiles, inf)]
+
+        # Дополнительные строки (лимит, целевое покрытие, верхняя граница)
+        extra_index, extra_value, extra_lengths = [], [], []
+        for x_coeffs, z_coeffs, _, _ in rows:
+            x_coeffs = np.zeros(n_software) if x_coeffs is None else x_coeffs
+            z_coeffs = np.zeros(n_profiles) if z_coeffs is None else z_coeffs
+            coeffs = np.concatenate([x_coeffs, z_coeffs])
+            nonzero = np.flatnonzero(coeffs)
+            extra_index.append(nonzero)
+            extra_value.append(coeffs[nonzero])
+            extra_lengths.append(len(nonzero))
+
+        matrix_index = np.concatenate(coverage_index + extra_index)
+        matrix_value = np.concatenate(coverage_value + extra_value)
+        row_lengths = np.concatenate(coverage_lengths + [extra_lengths]).astype(np.int64)
+
+        self._record_model_stats(n_software + n_profiles, len(row_lengths), len(matrix_index), arms, profiles)
+
+        start_values = None
+        if warm_start_solution:
+            start_values = [1.0 if sw in warm_start_solution else 0.0 for sw in software] + [
+                1.0 if p.issubset(warm_start_solution) else 0.0 for p, _ in profiles
+            ]
+
+        values, status = self._run_highspy(
+            col_cost=np.concatenate([x_objective, z_objective]),
+            col_upper=np.ones(n_software + n_profiles),
+            row_lengths=row_lengths,
+            matrix_index=matrix_index,
+            matrix_value=matrix_value,
+            row_lower=np.concatenate(coverage_lower + [[lower for _, _, lower, _ in rows]]),
+            row_upper=np.concatenate(coverage_upper + [[upper for _, _, _, upper in rows]]),
+            maximize=maximize,
+            time_limit=time_limit,
+            start_values=start_values,
+            relax=relax,
+            mip_gap=mip_gap
+        )
+        if values is None:
+            return [None] * n_software, [None] * n_profiles, status
+        return values[:n_software], values[n_software:], status
+
+    def _run_highspy(
+        self,
+        col_cost: np.ndarray,
+        col_upper: np.ndarray,
+        row_lengths: np.ndarray,
+        matrix_index: np.ndarray,
+        matrix_value: np.ndarray,
+        row_lower: np.ndarray,
+        row_upper: np.ndarray,
+        maximize: bool,
+        time_limit: Optional[float],
+        start_values: Optional[List[float]] = None,
+        relax: bool = False,
+        mip_gap: Optional[float] = None
+    ) -> Tuple[Optional[List[float]], str]:
+        """
+        Передать модель с бинарными переменными (матрица по строкам) в HiGHS и решить.
+        Значение целевой функции и достигнутый относительный разрыв сохраняются
+        в last_model_stats['objective'] и last_model_stats['gap'].
+
+        Returns:
+            Значения переменных (None, если допустимого решения нет) и статус в терминах PuLP
+        """
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(col_cost)
+        lp.num_row_ = len(row_lengths)
+        lp.col_cost_ = np.asarray(col_cost, dtype=float)
+        lp.col_lower_ = np.zeros(lp.num_col_)
+        lp.col_upper_ = np.asarray(col_upper, dtype=float)
+        lp.row_lower_ = np.asarray(row_lower, dtype=float)
+        lp.row_upper_ = np.asarray(row_upper, dtype=float)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = np.concatenate([[0], np.cumsum(row_lengths)]).astype(np.int64)
+        lp.a_matrix_.index_ = np.asarray(matrix_index, dtype=np.int64)
+        lp.a_matrix_.value_ = np.asarray(matrix_value, dtype=float)
+        variable_type = highspy.HighsVarType.kContinuous if relax else highspy.HighsVarType.kInteger
+        lp.integrality_ = [variable_type] * lp.num_col_
+        lp.sense_ = highspy.ObjSense.kMaximize if maximize else highspy.ObjSense.kMinimize
+
+        solver = highspy.Highs()
+        solver.setOptionValue('output_flag', False)
+        if time_limit is not None:
+            solver.setOptionValue('time_limit', float(time_limit))
+        if mip_gap is not None:
+            solver.setOptionValue('mip_rel_gap', float(mip_gap))
+        for name, option in self.solver_options.items():
+            solver.setOptionValue(name, option)
+        solver.passModel(lp)
+
+        if start_values is not None:
+            start = highspy.HighsSolution()
+            start.col_value = start_values
+            start.value_valid = True
+            solver.setSolution(start)
+
+        solver.run()
+        self.last_model_stats['objective'] = solver.getInfo().objective_function_value
+        self.last_model_stats['gap'] = 0.0 if relax else solver.getInfo().mip_gap
+
+        status = 'Optimal' if solver.getModelStatus() == highspy.HighsModelStatus.kOptimal else 'Not Solved'
+        if solver.getInfo().primal_solution_status != highspy.kSolutionStatusFeasible:
+            return None, status
+        return list(solver.getSolution().col_value), status
     
     def find_minimum_software_for_coverage_ilp(
     self,
@@ -171,6 +1012,17 @@ class ILPSoftwareSelector:
         if already_tested is None:
             already_tested = set()
 
+        if self.merge_equivalent:
+            merged, inner = self._merged_selector(already_tested)
+            selected_software, covered_arms = inner.find_minimum_software_for_coverage_ilp(
+                target_arms_count=target_arms_count,
+                already_tested=set(),
+                warm_start_solution=merged.compress_software(warm_start_solution) if warm_start_solution else None,
+                time_limit=time_limit
+            )
+            self._adopt_reports(inner)
+            return merged.expand_software(selected_software), covered_arms
+
         # --- Доступное ПО и пользователи ---
         available_software_set = set(self.processor.software_to_arms.keys()) - already_tested
         available_software = list(available_software_set)
@@ -180,97 +1032,116 @@ class ILPSoftwareSelector:
             return set(), set()
 
         # --- Если есть warm start, используем его размер как верхнюю границу K ---
+        cost = self._software_costs(available_software)
         if warm_start_solution:
-            upper_bound = len(warm_start_solution)
+            upper_bound = sum(cost.get(sw, 1) for sw in warm_start_solution)
         else:
             upper_bound = None
 
-        # --- Фильтрация пользователей, которые требуют > K ПО ---
-        def arm_degree(arm: str) -> int:
-            """Количество ПО, требуемых для покрытия данного пользователя (с учетом already_tested)."""
-            return len((self.processor.arm_software_map.get(arm, set()) - already_tested) & available_software_set)
+        # --- Пользователи, которым нужно хотя бы одно непротестированное ПО ---
+        # Количество ПО, требуемых для покрытия каждого пользователя (с учетом already_tested)
+        arm_degree = CoverageState(self.processor, already_tested).missing
+        candidate_arms = self.processor.decode_arms(np.flatnonzero(arm_degree > 0))
 
-        if upper_bound is not None:
-            remaining_arms = {
-                arm for arm in all_arms
-                if 0 < arm_degree(arm) <= upper_bound
-            }
+        # --- Группировка пользователей по остаточным наборам ПО ---
+        profiles = self._residual_profiles(already_tested, candidate_arms)
+
+        # --- Сокращение задачи: пользователи, которые требуют > K ПО, и ПО только на них ---
+        profiles, available_software = self._kernelize(profiles, available_software, upper_bound)
+        remaining_arms = {arm for _, arms in profiles for arm in arms}
+
+        if self.backend == 'highspy':
+            cost_row = np.array([cost[sw] for sw in available_software], dtype=float)
+            weights = np.array([len(arms) for _, arms in profiles], dtype=float)
+            rows = [(None, weights, target_arms_count, highspy.kHighsInf)]
+            if warm_start_solution:
+                rows.append((cost_row, None, -highspy.kHighsInf, upper_bound))
+            x_values, z_values, status = self._solve_highspy(
+                profiles,
+                available_software,
+                x_objective=cost_row,
+                z_objective=np.zeros(len(profiles)),
+                maximize=False,
+                rows=rows,
+                arms=remaining_arms,
+                time_limit=time_limit,
+                warm_start_solution=warm_start_solution
+            )
         else:
-            remaining_arms = {
-                arm for arm in all_arms
-                if arm_degree(arm) > 0
-            }
+            # --- Создаем задачу ILP ---
+            problem = LpProblem("Minimize_Software_for_Target_Coverage", LpMinimize)
 
+            # Переменные выбора ПО
+            x = {sw: LpVariable(f"sw_{i}", cat=LpBinary) for i, sw in enumerate(available_software)}
 
-        # --- Создаем задачу ILP ---
-        problem = LpProblem("Minimize_Software_for_Target_Coverage", LpMinimize)
+            # Задаем начальные значения из warm start
+            if warm_start_solution:
+                for sw in available_software:
+                    x[sw].setInitialValue(1 if sw in warm_start_solution else 0)
 
-        # Переменные выбора ПО
-        x = {sw: LpVariable(f"sw_{i}", cat=LpBinary) for i, sw in enumerate(available_software)}
+            # Переменные покрытия наборов (вес набора = количество его пользователей)
+            z = [LpVariable(f"prof_{j}", cat=LpBinary) for j in range(len(profiles))]
 
-        # Задаем начальные значения из warm start
-        if warm_start_solution:
-            for sw in available_software:
-                x[sw].setInitialValue(1 if sw in warm_start_solution else 0)
+            # Задаем начальные значения для z[p] на основе warm_start
+            if warm_start_solution:
+                for j, (profile_software, _) in enumerate(profiles):
+                    # Набор покрыт, если все его непротестированное ПО есть в warm_start
+                    z[j].setInitialValue(1 if profile_software.issubset(warm_start_solution) else 0)
 
-        # Переменные покрытия пользователей
-        z = {arm: LpVariable(f"arm_{j}", cat=LpBinary) for j, arm in enumerate(remaining_arms)}
+            # Создаем индексы для уникальных имён ограничений
+            sw_index = {sw: i for i, sw in enumerate(available_software)}
 
-        # Задаем начальные значения для z[arm] на основе warm_start
-        if warm_start_solution:
-            for arm in remaining_arms:
-                untested_sw_for_arm = (self.processor.arm_software_map.get(arm, set()) - already_tested) & available_software_set
-                # АРМ покрыт, если все его непротестированное ПО есть в warm_start
-                is_covered = untested_sw_for_arm and untested_sw_for_arm.issubset(warm_start_solution)
-                z[arm].setInitialValue(1 if is_covered else 0)
-
-        # Создаем индексы для уникальных имён ограничений
-        arm_index = {arm: j for j, arm in enumerate(remaining_arms)}
-        sw_index = {sw: i for i, sw in enumerate(available_software)}
-
-        # Целевая функция — минимизировать количество выбранных ПО
-        problem += lpSum(x.values()), "Minimize_Software_Count"
-
-        # --- Ограничения покрытия ---
-        for arm in remaining_arms:
-            untested_sw_for_arm = list(
-                (self.processor.arm_software_map.get(arm, set()) - already_tested) & available_software_set
-            )
-            if not untested_sw_for_arm:
-                problem += z[arm] == 0, f"MIN_uncoverable_a{arm_index[arm]}"
-                continue
+            # Целевая функция — минимизировать количество выбранных ПО
+            problem += lpSum(cost[sw] * x[sw] for sw in available_software), "Minimize_Software_Count"
 
-            n = len(untested_sw_for_arm)
+            # --- Ограничения покрытия ---
+            for j, (profile_software, _) in enumerate(profiles):
+                n = len(profile_software)
 
-            # z[arm] ≤ x[sw] для всех sw ∈ требуемом множестве
-            for sw in untested_sw_for_arm:
-                problem += z[arm] <= x[sw], f"MIN_comp_a{arm_index[arm]}_s{sw_index[sw]}"
+                # z[p] ≤ x[sw] для всех sw ∈ требуемом множестве
+                for sw in profile_software:
+                    problem += z[j] <= x[sw], f"MIN_comp_p{j}_s{sw_index[sw]}"
 
-            # z[arm] ≥ sum(x[sw]) - (n - 1)
-            problem += z[arm] >= lpSum(x[sw] for sw in untested_sw_for_arm) - (n - 1), f"MIN_force_a{arm_index[arm]}"
+                # z[p] ≥ sum(x[sw]) - (n - 1)
+                problem += z[j] >= lpSum(x[sw] for sw in profile_software) - (n - 1), f"MIN_force_p{j}"
 
-        # Целевое количество покрытых пользователей
-        problem += lpSum(z.values()) >= target_arms_count, "Target_Coverage"
+            # Целевое количество покрытых пользователей
+            problem += lpSum(len(arms) * z[j] for j, (_, arms) in enumerate(profiles)) >= target_arms_count, "Target_Coverage"
 
-        # --- Ограничение на количество ПО из warm start ---
-        if warm_start_solution:
-            problem += lpSum(x.values()) <= upper_bound, "Heuristic_Upper_Bound"
+            # --- Ограничение на количество ПО из warm start ---
+            if warm_start_solution:
+                problem += lpSum(cost[sw] * x[sw] for sw in available_software) <= upper_bound, "Heuristic_Upper_Bound"
 
-        # --- Решатель ---
-        solver = HiGHS(
-            timeLimit=time_limit,
-            options=['randomSeed 123', 'randomCbcSeed 456'],
-            msg=0,
-            warmStart=True  # Включаем использование начальных значений переменных
-        )
-        problem.solve(solver)
+            self._record_model_stats(
+                len(problem.variables()),
+                len(problem.constraints),
+                sum(len(constraint) for constraint in problem.constraints.values()),
+                remaining_arms,
+                profiles
+            )
 
-        # --- Проверка статуса решения ---
-        status = LpStatus[problem.status]
+            # --- Решатель ---
+            problem.solve(self._pulp_solver(time_limit, options=['randomSeed 123', 'randomCbcSeed 456']))
+            self._record_pulp_result(problem)
+
+            # --- Проверка статуса решения ---
+            status = self._pulp_status(problem)
+            x_values = [x[sw].varValue for sw in available_software]
+            z_values = [z[j].varValue for j in range(len(profiles))]
         
+        self.last_model_stats['status'] = status
+
         # Извлекаем решение из переменных (если есть)
-        selected_software = {sw for sw in available_software if x[sw].varValue is not None and x[sw].varValue > 0.5}
-        covered_arms = {arm for arm in remaining_arms if z[arm].varValue is not None and z[arm].varValue > 0.5}
+        selected_software = {
+            sw for sw, value in zip(available_software, x_values)
+            if value is not None and value > 0.5
+        }
+        covered_arms = {
+            arm
+            for (_, arms), value in zip(profiles, z_values)
+            if value is not None and value > 0.5
+            for arm in arms
+        }
         
         # Если решение оптимальное или найдено непустое feasible решение - возвращаем его
         if status == 'Optimal' or (selected_software and covered_arms):
@@ -6,8 +6,11 @@ Streamlit приложение для анализа и планирования
 import streamlit as st
 import pandas as pd
 import io
+import os
 from typing import Dict, Set, Tuple, List
 from optimizer import MigrationOptimizer
+from result_cache import ResultCache
+from inventory_cache import InventoryCache
 from data_processor import DataProcessor
 from exporter import Exporter
 from tabs import tabs
@@ -20,6 +23,34 @@ st.set_page_config(
 
 st.title("🐧 Оптимизатор волн миграции ПО на Linux")
 
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """
+    Кэш результатов расчёта, общий для всех сессий (ключ включает хэш данных,
+    поэтому разные файлы не смешиваются). RESULT_CACHE_DIR - каталог для
+    хранения на диске
+    """
+    return ResultCache(directory=os.getenv('RESULT_CACHE_DIR') or None)
+
+
+@st.cache_resource
+def get_inventory_cache() -> InventoryCache:
+    """
+    Parquet-кэш загруженных файлов, общий для всех сессий: один и тот же файл
+    разбирается один раз. INVENTORY_CACHE_DIR - каталог кэша,
+    INVENTORY_CACHE_MB - наибольший размер каталога в мегабайтах
+    """
+    return InventoryCache(
+        directory=os.getenv('INVENTORY_CACHE_DIR') or None,
+        max_bytes=int(os.getenv('INVENTORY_CACHE_MB', '2048')) * 1024 ** 2
+    )
+
+
+# Файлы XLSX больше этого размера обрабатываются потоково, минуя Parquet-кэш
+INVENTORY_STREAM_BYTES = int(os.getenv('INVENTORY_STREAM_MB', '100')) * 1024 ** 2
+
+
 # Инициализация session_state
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
@@ -101,15 +132,10 @@ with st.sidebar:
         # Загружаем только заголовки для выбора колонок (быстро, без полной загрузки)
         if st.session_state.tested_df_preview is None:
             with st.spinner("Чтение заголовков..."):
-                if tested_software_file.name.endswith('.csv'):
-                    # Читаем только первую строку для получения заголовков
-                    tested_df_preview = pd.read_csv(tested_software_file, encoding='utf-8-sig', nrows=0)
-                else:
-                    # Читаем только первую строку для получения заголовков
-                    try:
-                        tested_df_preview = pd.read_excel(tested_software_file, sheet_name='ПО', nrows=0)
-                    except:
-                        tested_df_preview = pd.read_excel(tested_software_file, nrows=0)
+                # Заголовки из Parquet-кэша, если файл уже загружали (лист "ПО", иначе первый)
+                tested_df_preview = get_inventory_cache().read_header(
+                    tested_software_file.getvalue(), tested_software_file.name, sheet_name='ПО'
+                )
                 
                 # Кэшируем заголовки
                 st.session_state.tested_df_preview = tested_df_preview
@@ -146,13 +172,9 @@ with st.sidebar:
                 # ЗДЕСЬ загружаем полный файл с протестированным ПО (если еще не загружен)
                 if st.session_state.tested_df_full is None or st.session_state.tested_file_name != tested_software_file.name:
                     # Загружаем полный файл первый раз или если файл сменился
-                    if tested_software_file.name.endswith('.csv'):
-                        tested_df_full = pd.read_csv(tested_software_file, encoding='utf-8-sig')
-                    else:
-                        try:
-                            tested_df_full = pd.read_excel(tested_software_file, sheet_name='ПО')
-                        except:
-                            tested_df_full = pd.read_excel(tested_software_file)
+                    tested_df_full = get_inventory_cache().load(
+                        tested_software_file.getvalue(), tested_software_file.name, sheet_name='ПО'
+                    )
                     
                     # Кэшируем полный файл
                     st.session_state.tested_df_full = tested_df_full
@@ -213,12 +235,8 @@ with st.sidebar:
             # Загружаем только заголовки для выбора колонок (быстро, без полной загрузки)
             if st.session_state.uploaded_df is None:
                 with st.spinner("Чтение заголовков..."):
-                    if uploaded_file.name.endswith('.csv'):
-                        # Читаем только первую строку для получения заголовков
-                        df = pd.read_csv(uploaded_file, encoding='utf-8-sig', nrows=0)
-                    else:
-                        # Читаем только первую строку для получения заголовков
-                        df = pd.read_excel(uploaded_file, nrows=0)
+                    # Заголовки из Parquet-кэша, если файл уже загружали
+                    df = get_inventory_cache().read_header(uploaded_file.getvalue(), uploaded_file.name)
                     
                     # Кэшируем только заголовки (не весь файл!)
                     st.session_state.uploaded_df = df
@@ -266,38 +284,46 @@ with st.sidebar:
             # Кнопка обработки данных
             if st.button("📊 Обработать данные", type="primary", width="stretch"):
                 with st.spinner("Загрузка и обработка данных..."):
-                    # ЗДЕСЬ загружаем полный файл (если еще не загружен или файл сменился)
-                    if st.session_state.uploaded_df_full is None:
-                        # Загружаем полный файл
-                        if uploaded_file.name.endswith('.csv'):
-                            df_full = pd.read_csv(uploaded_file, encoding='utf-8-sig')
+                    file_name = uploaded_file.name.lower()
+                    if file_name.endswith('.csv'):
+                        # CSV обрабатывается потоково по частям: полный DataFrame не хранится,
+                        # исходные строки перечитываются из файла при экспорте
+                        processor = DataProcessor.from_csv(
+                            uploaded_file.getvalue(), arm_column, software_column,
+                            compact=False, family_column=software_family_column
+                        )
+                    elif file_name.endswith(('.xlsx', '.xlsm')) and uploaded_file.size > INVENTORY_STREAM_BYTES:
+                        # Большой XLSX разбирается один раз потоково, читаются только выбранные
+                        # столбцы (без Parquet-кэша: полный DataFrame не создаётся)
+                        processor = DataProcessor.from_xlsx(
+                            uploaded_file.getvalue(), arm_column, software_column,
+                            compact=False, family_column=software_family_column
+                        )
+                    else:
+                        # ЗДЕСЬ загружаем полный файл (если еще не загружен или файл сменился)
+                        if st.session_state.uploaded_df_full is None:
+                            # Загружаем полный файл (повторно тот же файл читается из Parquet-кэша)
+                            df_full = get_inventory_cache().load(uploaded_file.getvalue(), uploaded_file.name)
+                            
+                            # Кэшируем полный файл
+                            st.session_state.uploaded_df_full = df_full
                         else:
-                            df_full = pd.read_excel(uploaded_file)
+                            # Используем кэшированный полный файл
+                            df_full = st.session_state.uploaded_df_full
                         
-                        # Кэшируем полный файл
-                        st.session_state.uploaded_df_full = df_full
-                    else:
-                        # Используем кэшированный полный файл
-                        df_full = st.session_state.uploaded_df_full
-                    
-                    # Обработка основного файла с пользователями
-                    processor = DataProcessor(df_full, arm_column, software_column)
-                    processor.process()
+                        # Обработка основного файла с пользователями
+                        processor = DataProcessor(df_full, arm_column, software_column)
+                        processor.process()
 
                     # Обработка файла с протестированным ПО (если загружен)
                     if tested_software_file is not None and tested_software_column is not None and tested_status_column is not None:
                         try:
                             # Загрузка файла с протестированным ПО (если еще не загружен или файл сменился)
                             if st.session_state.tested_df_full is None:
-                                # Загружаем полный файл
-                                if tested_software_file.name.endswith('.csv'):
-                                    tested_df = pd.read_csv(tested_software_file, encoding='utf-8-sig')
-                                else:
-                                    # Пытаемся прочитать лист "ПО", если не найден - читаем первый лист
-                                    try:
-                                        tested_df = pd.read_excel(tested_software_file, sheet_name='ПО')
-                                    except:
-                                        tested_df = pd.read_excel(tested_software_file)
+                                # Загружаем полный файл (лист "ПО", если не найден - первый лист)
+                                tested_df = get_inventory_cache().load(
+                                    tested_software_file.getvalue(), tested_software_file.name, sheet_name='ПО'
+                                )
                                 
                                 # Кэшируем полный файл
                                 st.session_state.tested_df_full = tested_df
@@ -330,7 +356,7 @@ with st.sidebar:
 
                     st.session_state.processor = processor
                     st.session_state.data_loaded = True
-                    st.session_state.optimizer = MigrationOptimizer(processor)
+                    st.session_state.optimizer = MigrationOptimizer(processor, cache=get_result_cache())
                     st.session_state.exporter = Exporter(processor)
 
                     st.success("✓ Данные обработаны!")
@@ -354,9 +380,9 @@ if st.session_state.data_loaded:
     with col2:
         st.metric("Уникальное ПО", processor.total_software)
     with col3:
-        st.metric("Уникальных наборов ПО", len(processor.set_to_arms_map))
+        st.metric("Уникальных наборов ПО", processor.profile_count)
     with col4:
-        avg_software = sum(len(s) for s in processor.arm_software_map.values()) / len(processor.arm_software_map)
+        avg_software = processor.arm_degrees.mean()
         st.metric("Среднее ПО на АРМ", f"{avg_software:.1f}")
     
     # Информация о протестированном ПО
@@ -365,14 +391,15 @@ if st.session_state.data_loaded:
         st.info(f"📋 Загружен файл с протестированным ПО: **{st.session_state.tested_software_file_name}** ({tested_count} ПО)")
 
     # Вкладки для разных режимов
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "🎯 Ручной режим (эвристика)", 
         "🔬 Ручной режим (точный)", 
         "👥 Миграция N пользователей (эвристика)",
-        "🔬 Миграция N пользователей (точный)"
+        "🔬 Миграция N пользователей (точный)",
+        "📉 Кривая покрытия"
     ])
 
-    tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, exporter)
+    tabs(tab1, tab2, tab3, tab4, tab5, st, processor, optimizer, uploaded_file, exporter)
 
    
 
@@ -390,7 +417,8 @@ else:
        - **Ручной (эвристика)** - быстрый расчет оптимальных волн
        - **Ручной (точный)** - математически оптимальное решение через целочисленное линейное программирование (ILP) - может работать дольше, но дает гарантированно лучший результат. Если ограничить по времени, то вернет наилучшее приближение к гарантированному результату.
        - **Миграция N пользователей (эвристика)** - быстрый поиск минимального ПО
-       - **Миграция N пользователей (точный)** - оптимальный минимальный набор ПО через целочисленное линейное программирование (ILP) - работает долго (в некоторых условиях 5-15 минут), но гарантированно дает оптимальный результат. Если ограничить по времени, то вернет наилучшее приближение к гарантированному результату.
+       - **Миграция N пользователей (точный)** - оптимальный минимальный набор ПО через целочисленное линейное программирование (ILP) - работает долго (в некоторых условиях 5-15 минут), но гарантированно дает оптимальный результат. Если ограничить по времени, то вернет наилучшее приближение к гарантированному результату. На многоядерном сервере время сокращает режим «Портфель решателей».
+       - **Кривая покрытия** - сколько АРМ покрывает любой лимит ПО, за один расчёт; помогает выбрать лимиты волн
     5. **Экспортируйте результаты** - сохраните план миграции в Excel
 
     ### 📊 Формат данных:
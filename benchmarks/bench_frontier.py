@@ -0,0 +1,44 @@
+"""
+Бенчмарк кривой покрытия MigrationOptimizer.coverage_frontier
+
+Сравнивает построение кривой для всех лимитов за один проход с отдельными
+жадными расчётами (find_best_software_set) по сетке лимитов: время и покрытие
+в точках сетки.
+
+Запуск:
+    python benchmarks/bench_frontier.py
+"""
+
+import time
+
+from synthetic import make_processor
+from optimizer import MigrationOptimizer
+
+
+def main():
+    for label, params in [
+        ('synthetic 1.2k ARM x 500 ПО', dict(n_arms=1200, n_software=500, avg_software=12, n_roles=20, seed=1)),
+        ('real-shaped 3.6k ARM x 1.3k ПО', dict(n_arms=3600, n_software=1300, avg_software=31)),
+    ]:
+        processor = make_processor(**params)
+        optimizer = MigrationOptimizer(processor)
+        all_arms = set(processor.arm_software_map.keys())
+        grid = list(range(25, processor.total_software + 1, 25))
+
+        start = time.perf_counter()
+        frontier = optimizer.coverage_frontier()
+        frontier_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        separate = [len(optimizer.find_best_software_set(limit, set(), all_arms)[1]) for limit in grid]
+        separate_time = time.perf_counter() - start
+
+        print(f"\n{label}: {processor.total_arms} АРМ, {processor.total_software} ПО, {len(grid)} лимитов")
+        print(f"кривая: {frontier_time:.2f} с, отдельные расчёты: {separate_time:.2f} с")
+        print(f"{'Лимит':>6} {'Кривая':>7} {'Жадный':>7}")
+        for limit, greedy in list(zip(grid, separate))[::4]:
+            print(f"{limit:>6} {frontier.arms[limit]:>7} {greedy:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Бенчмарк эвристик MigrationOptimizer
+
+find_best_software_set: сравнивает событийную версию (ленивая куча) с прежним
+алгоритмом, который на каждой итерации заново строил карту "закрывающих" ПО,
+проверяет побайтовое совпадение планов волн и печатает время по каждой волне.
+
+_find_minimum_software_greedy: сравнивает инкрементальную версию с прежним
+пересчётом пересечений и покрытия на каждом шаге.
+
+Запуск:
+    python benchmarks/bench_greedy.py
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from synthetic import make_processor
+from optimizer import MigrationOptimizer
+
+
+def reference_find_best_software_set(
+    processor,
+    limit: int,
+    already_tested: Set[str],
+    remaining_arms: Set[str]
+) -> Tuple[Set[str], Set[str]]:
+    """Прежняя реализация: полный проход по АРМ на каждой итерации"""
+    wave_software = set()
+    migrating_arms = set()
+
+    available_software = set(processor.software_to_arms.keys()) - already_tested
+    untested_needs: Dict[str, int] = {
+        arm: len(processor.arm_software_map.get(arm, set()) - already_tested)
+        for arm in remaining_arms
+    }
+    popularity = {
+        sw: len(processor.software_to_arms.get(sw, set()) & remaining_arms)
+        for sw in available_software
+    }
+
+    for _ in range(limit):
+        if not available_software:
+            break
+
+        last_sw_map = defaultdict(list)
+        for arm, needs in untested_needs.items():
+            if needs == 1:
+                rest = processor.arm_software_map[arm] - already_tested - wave_software
+                if rest:
+                    last_sw = next(iter(rest))
+                    if last_sw in available_software:
+                        last_sw_map[last_sw].append(arm)
+
+        software_scores = {sw: len(arms) for sw, arms in last_sw_map.items()}
+        best_software = None
+        if software_scores:
+            best_software = max(software_scores.keys(), key=lambda sw: (software_scores[sw], sw))
+        else:
+            current_popularity = {sw: pop for sw, pop in popularity.items() if sw in available_software}
+            if current_popularity:
+                best_software = max(current_popularity.keys(), key=lambda sw: (current_popularity[sw], sw))
+
+        if best_software is None:
+            break
+
+        wave_software.add(best_software)
+        available_software.remove(best_software)
+        for arm in processor.software_to_arms.get(best_software, set()):
+            if arm in untested_needs:
+                untested_needs[arm] -= 1
+                if untested_needs[arm] == 0:
+                    migrating_arms.add(arm)
+                    del untested_needs[arm]
+
+    return wave_software, migrating_arms
+
+
+def reference_min_software_greedy(
+    processor,
+    target_arms_count: int,
+    already_tested: Set[str]
+) -> Tuple[Set[str], Set[str]]:
+    """Прежняя реализация: пересечение с непокрытыми АРМ для каждого ПО на каждом шаге"""
+    selected_software = set()
+    covered_arms = {
+        arm for arm, software_set in processor.arm_software_map.items()
+        if software_set.issubset(already_tested)
+    }
+    available_software_list = sorted(set(processor.software_to_arms.keys()) - already_tested)
+
+    while len(covered_arms) < target_arms_count and available_software_list:
+        uncovered_arms = set(processor.arm_software_map.keys()) - covered_arms
+        if not uncovered_arms:
+            break
+
+        best_software = None
+        best_score = -1
+        for software in available_software_list:
+            score = len(processor.software_to_arms.get(software, set()) & uncovered_arms)
+            if score > best_score:
+                best_score = score
+                best_software = software
+
+        selected_software.add(best_software)
+        available_software_list.remove(best_software)
+        tested = already_tested | selected_software
+        covered_arms = {
+            arm for arm, software_set in processor.arm_software_map.items()
+            if software_set.issubset(tested)
+        }
+
+    return selected_software, covered_arms
+
+
+def run_waves(solve, processor, wave_limits: List[int]):
+    """Последовательный расчёт волн, возвращает планы и время каждой волны"""
+    tested: Set[str] = set()
+    remaining = set(processor.arm_software_map.keys())
+    plans = []
+    timings = []
+    for limit in wave_limits:
+        start = time.perf_counter()
+        software, arms = solve(limit, tested, remaining)
+        timings.append(time.perf_counter() - start)
+        plans.append((sorted(software), sorted(arms)))
+        tested |= software
+        remaining -= arms
+    return plans, timings
+
+
+def main():
+    wave_limits = [100, 100, 100]
+    for label, params in [
+        ('real-shaped 3.6k ARM x 1.3k ПО', dict(n_arms=3600, n_software=1300, avg_software=31)),
+        ('large 20k ARM x 5k ПО', dict(n_arms=20000, n_software=5000, avg_software=25, seed=1)),
+    ]:
+        processor = make_processor(**params)
+        optimizer = MigrationOptimizer(processor)
+
+        new_plans, new_times = run_waves(optimizer.find_best_software_set, processor, wave_limits)
+        ref_plans, ref_times = run_waves(
+            lambda *args: reference_find_best_software_set(processor, *args),
+            processor,
+            wave_limits
+        )
+
+        assert new_plans == ref_plans, "Планы волн не совпадают с прежним алгоритмом"
+
+        print(f"\n{label}: {processor.total_arms} АРМ, {processor.total_software} ПО")
+        print(f"{'Волна':>6} {'Прежний, с':>12} {'Новый, с':>10} {'Ускорение':>10} {'АРМ':>6}")
+        for wave, (old, new, plan) in enumerate(zip(ref_times, new_times, new_plans), 1):
+            print(f"{wave:>6} {old:>12.3f} {new:>10.3f} {old / new:>9.1f}x {len(plan[1]):>6}")
+        print("Планы идентичны")
+
+        print(f"{'Цель АРМ':>9} {'Прежний, с':>12} {'Новый, с':>10} {'Ускорение':>10} {'ПО':>6}")
+        for share in (0.05, 0.1, 0.2):
+            target = int(processor.total_arms * share)
+            start = time.perf_counter()
+            new_result = optimizer._find_minimum_software_greedy(target, set())
+            new_time = time.perf_counter() - start
+            start = time.perf_counter()
+            ref_result = reference_min_software_greedy(processor, target, set())
+            ref_time = time.perf_counter() - start
+            assert new_result == ref_result, "Жадный Set Cover не совпадает с прежним алгоритмом"
+            print(f"{target:>9} {ref_time:>12.3f} {new_time:>10.4f} {ref_time / new_time:>9.0f}x {len(new_result[0]):>6}")
+        print("Наборы ПО идентичны")
+
+
+if __name__ == "__main__":
+    main()
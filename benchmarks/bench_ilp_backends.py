@@ -0,0 +1,39 @@
+"""
+Бенчмарк способов решения ILP в ILPSoftwareSelector
+
+Сравнивает построение модели через объекты PuLP (с именованными ограничениями
+и передачей задачи в HiGHS через файл) и прямую сборку матрицы NumPy в highspy:
+время одной волны, размер модели и число мигрирующих АРМ.
+
+Запуск:
+    python benchmarks/bench_ilp_backends.py
+"""
+
+import time
+
+from synthetic import make_processor
+from ILP import ILPSoftwareSelector
+
+
+def main():
+    time_limit = 30
+    for label, params, limit in [
+        ('small 600 ARM x 300 ПО', dict(n_arms=600, n_software=300, avg_software=10, n_roles=15), 60),
+        ('medium 1.2k ARM x 500 ПО', dict(n_arms=1200, n_software=500, avg_software=12, n_roles=20, seed=1), 50),
+    ]:
+        processor = make_processor(**params)
+        all_arms = set(processor.arm_software_map.keys())
+
+        print(f"\n{label}: {processor.total_arms} АРМ, {processor.total_software} ПО, лимит {limit}")
+        print(f"{'Backend':>8} {'Время, с':>9} {'Переменные':>11} {'Ограничения':>12} {'АРМ':>6}")
+        for backend in ILPSoftwareSelector.BACKENDS:
+            solver = ILPSoftwareSelector(processor, backend=backend)
+            start = time.perf_counter()
+            _, arms = solver.find_best_software_set_ilp(limit, set(), all_arms, time_limit=time_limit)
+            elapsed = time.perf_counter() - start
+            stats = solver.last_model_stats
+            print(f"{backend:>8} {elapsed:>9.2f} {stats['variables']:>11} {stats['constraints']:>12} {len(arms):>6}")
+
+
+if __name__ == "__main__":
+    main()
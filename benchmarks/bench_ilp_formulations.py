@@ -0,0 +1,54 @@
+"""
+Бенчмарк формулировок модели максимального покрытия в ILPSoftwareSelector
+
+Сравнивает стандартную модель (z <= x для каждой пары "набор - ПО" и строки
+z >= sum(x) - (N-1)) с компактной (formulation='lean'): размер модели,
+LP-оценку (значение релаксации, чем ближе к целочисленному оптимуму, тем лучше),
+время решения и число мигрирующих АРМ при одинаковом лимите времени.
+
+На данных реального размера HiGHS тратит на корневой узел больше лимита времени
+в обеих формулировках, поэтому для них сравниваются только модели и LP-релаксация.
+
+Запуск:
+    python benchmarks/bench_ilp_formulations.py
+"""
+
+import time
+
+from synthetic import make_processor
+from ILP import ILPSoftwareSelector
+
+
+def main():
+    time_limit = 60
+    for label, params, limit, solve_ilp in [
+        ('synthetic 600 ARM x 300 ПО', dict(n_arms=600, n_software=300, avg_software=10, n_roles=15), 60, True),
+        ('synthetic 1.2k ARM x 500 ПО', dict(n_arms=1200, n_software=500, avg_software=12, n_roles=20, seed=1), 50, True),
+        ('real-shaped 3.6k ARM x 1.3k ПО', dict(n_arms=3600, n_software=1300, avg_software=31), 100, False),
+    ]:
+        processor = make_processor(**params)
+        all_arms = set(processor.arm_software_map.keys())
+
+        print(f"\n{label}: {processor.total_arms} АРМ, {processor.total_software} ПО, лимит {limit}")
+        print(f"{'Модель':>9} {'Ограничения':>12} {'Ненулевые':>10} {'LP-оценка':>10} "
+              f"{'LP, с':>7} {'ILP, с':>7} {'АРМ':>6}")
+        for formulation in ILPSoftwareSelector.FORMULATIONS:
+            solver = ILPSoftwareSelector(processor, backend='highspy', formulation=formulation)
+
+            start = time.perf_counter()
+            bound = solver.lp_relaxation_bound(limit, set(), all_arms)
+            lp_time = time.perf_counter() - start
+
+            stats = dict(solver.last_model_stats)
+            ilp_time, migrated = '-', '-'
+            if solve_ilp:
+                start = time.perf_counter()
+                _, arms = solver.find_best_software_set_ilp(limit, set(), all_arms, time_limit=time_limit)
+                ilp_time, migrated = f"{time.perf_counter() - start:.2f}", len(arms)
+
+            print(f"{formulation:>9} {stats['constraints']:>12} {stats['nonzeros']:>10} {bound:>10.1f} "
+                  f"{lp_time:>7.2f} {ilp_time:>7} {migrated:>6}")
+
+
+if __name__ == "__main__":
+    main()
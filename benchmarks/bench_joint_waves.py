@@ -0,0 +1,42 @@
+"""
+Бенчмарк режимов планирования волн ILP
+
+Сравнивает последовательное решение волн (каждая волна - своя модель) с
+совместной моделью всех волн (planning='joint') и скользящим окном
+(planning='rolling', окно из текущей и следующей волны): мигрировавшие АРМ по волнам,
+сумму АРМ-волн (АРМ учитывается в каждой волне после миграции) и время.
+
+Запуск:
+    python benchmarks/bench_joint_waves.py
+"""
+
+import time
+
+from synthetic import make_processor
+from optimizer import MigrationOptimizer
+
+
+def main():
+    time_limit = 120
+    for label, params, limits in [
+        ('synthetic 600 ARM x 300 ПО', dict(n_arms=600, n_software=300, avg_software=10, n_roles=15), [30, 30, 30]),
+        ('synthetic 1.2k ARM x 500 ПО', dict(n_arms=1200, n_software=500, avg_software=12, n_roles=20, seed=1), [40, 40, 40]),
+        ('synthetic 1.2k ARM x 500 ПО', dict(n_arms=1200, n_software=500, avg_software=12, n_roles=20, seed=1), [20] * 8),
+    ]:
+        processor = make_processor(**params)
+        optimizer = MigrationOptimizer(processor, ilp_backend='highspy')
+
+        print(f"\n{label}: {processor.total_arms} АРМ, {processor.total_software} ПО, лимиты {limits}")
+        print(f"{'Режим':>11} {'АРМ по волнам':>20} {'АРМ-волны':>10} {'Время, с':>9}")
+        for planning in MigrationOptimizer.PLANNING_MODES:
+            start = time.perf_counter()
+            results = optimizer.calculate_waves(
+                limits, use_ilp=True, time_limit=time_limit, planning=planning, horizon=1
+            )
+            elapsed = time.perf_counter() - start
+            migrated = str([wave['arms_migrated'] for wave in results['waves']])
+            print(f"{planning:>11} {migrated:>20} {MigrationOptimizer._arm_waves(results):>10} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Генератор синтетических данных для бенчмарков оптимизатора
+Форма данных близка к реальным выгрузкам: популярность ПО распределена
+по закону Ципфа, на АРМ в среднем несколько десятков программ
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Модули приложения лежат в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_processor import DataProcessor
+
+ARM_COLUMN = 'Устройство'
+SOFTWARE_COLUMN = 'Программное обеспечение'
+
+
+def make_inventory(
+    n_arms: int = 3600,
+    n_software: int = 1300,
+    avg_software: float = 31.0,
+    n_roles: int = 40,
+    role_share: float = 0.8,
+    zipf: float = 1.1,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Сгенерировать таблицу (АРМ, ПО)
+
+    Каждый АРМ получает типовой набор своей роли (подразделения) и несколько
+    случайных программ сверху, поэтому часть АРМ имеет одинаковые наборы ПО.
+
+    Args:
+        n_arms: Количество АРМ
+        n_software: Количество уникального ПО
+        avg_software: Среднее количество ПО на АРМ
+        n_roles: Количество типовых наборов ПО
+        role_share: Доля ПО АРМ, приходящаяся на типовой набор
+        zipf: Показатель степени распределения популярности ПО
+        seed: Зерно генератора
+
+    Returns:
+        DataFrame со столбцами ARM_COLUMN и SOFTWARE_COLUMN
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_software + 1) ** zipf
+    popularity /= popularity.sum()
+
+    role_size = max(1, int(avg_software * role_share))
+    roles = [
+        rng.choice(n_software, size=min(n_software, role_size), replace=False, p=popularity)
+        for _ in range(n_roles)
+    ]
+
+    arms = []
+    software = []
+    for arm in range(n_arms):
+        extra = rng.poisson(avg_software - role_size)
+        chosen = set(roles[rng.integers(n_roles)].tolist())
+        if extra:
+            chosen.update(rng.choice(n_software, size=min(n_software, extra), replace=False, p=popularity).tolist())
+        arms.extend([f"ARM-{arm:06d}"] * len(chosen))
+        software.extend(f"Software {sw:05d}" for sw in sorted(chosen))
+
+    return pd.DataFrame({ARM_COLUMN: arms, SOFTWARE_COLUMN: software})
+
+
+def make_processor(**kwargs) -> DataProcessor:
+    """Сгенерировать данные и вернуть обработанный DataProcessor"""
+    processor = DataProcessor(make_inventory(**kwargs), ARM_COLUMN, SOFTWARE_COLUMN)
+    processor.process()
+    return processor
@@ -0,0 +1,119 @@
+"""
+Модуль верхних оценок покрытия для эвристических планов
+Лагранжева релаксация модели максимального покрытия: ограничения "АРМ покрыт,
+только если выбрано всё его ПО" переносятся в целевую функцию с множителями,
+после чего задача распадается на независимый выбор АРМ и дробный рюкзак по ПО.
+Множители уточняются субградиентным методом; любая итерация даёт допустимую
+верхнюю оценку, поэтому расчёт можно остановить в любой момент
+"""
+
+import numpy as np
+from typing import Iterable, Optional, Tuple
+from data_processor import DataProcessor
+from coverage import CoverageState
+
+
+def _fractional_knapsack(values: np.ndarray, costs: np.ndarray, limit: float) -> Tuple[float, np.ndarray]:
+    """
+    Дробный рюкзак: максимум суммы values * x при сумме costs * x <= limit, 0 <= x <= 1
+
+    Returns:
+        Значение и решение x
+    """
+    x = np.zeros(len(values))
+    useful = np.flatnonzero(values > 0)
+    if not len(useful) or limit <= 0:
+        return 0.0, x
+    order = useful[np.argsort(-values[useful] / costs[useful], kind='stable')]
+    filled = np.cumsum(costs[order])
+    taken = order[filled <= limit]
+    x[taken] = 1.0
+    if len(taken) < len(order):
+        # Следующее ПО входит частично
+        nxt = order[len(taken)]
+        x[nxt] = (limit - (filled[len(taken) - 1] if len(taken) else 0.0)) / costs[nxt]
+    return float(values @ x), x
+
+
+def lagrangian_bound(
+    processor: DataProcessor,
+    limit: int,
+    already_tested: Iterable[str] = (),
+    arms: Optional[Iterable[str]] = None,
+    lower_bound: float = 0.0,
+    iterations: int = 300
+) -> float:
+    """
+    Верхняя оценка числа мигрирующих АРМ в волне (лагранжева релаксация).
+
+    Модель: максимум суммы z[a] при z[a] <= x[s] для каждого ПО s на АРМ a
+    и лимите волны на стоимость выбранного ПО. Множитель lambda[a, s] >= 0 для
+    каждой пары "АРМ - непротестированное ПО"; оценка
+    L = сумма max(0, 1 - сумма lambda[a, *]) + дробный рюкзак с ценностью ПО
+    сумма lambda[*, s]. Шаг субградиента - по Поляку к нижней оценке.
+
+    Args:
+        processor: DataProcessor (для супер-элементов - сжатый)
+        limit: Лимит ПО в волне (в единицах стоимости ПО)
+        already_tested: Уже протестированное ПО
+        arms: Учитываемые АРМ (None = все АРМ)
+        lower_bound: Известное количество мигрирующих АРМ (например, жадное решение)
+        iterations: Количество итераций субградиентного метода
+
+    Returns:
+        Верхняя оценка (не меньше оптимального количества мигрирующих АРМ)
+    """
+    state = CoverageState(processor, already_tested, arms)
+    costs = processor.software_weights.astype(float)
+
+    # АРМ-кандидаты: ещё не покрыты, и всё недостающее ПО помещается в лимит
+    untested_entry = ~state.selected[processor.arm_indices]
+    missing_cost = np.bincount(
+        processor.arm_of_entry,
+        weights=costs[processor.arm_indices] * untested_entry,
+        minlength=len(processor.arm_names)
+    )
+    candidate = state.active & (state.missing > 0) & (missing_cost <= limit)
+    n_candidates = int(np.count_nonzero(candidate))
+    if n_candidates == 0:
+        return 0.0
+
+    entries = candidate[processor.arm_of_entry] & untested_entry
+    entry_arm = processor.arm_of_entry[entries]
+    entry_software = processor.arm_indices[entries]
+    n_arms = len(processor.arm_names)
+    n_software = len(processor.software_names)
+
+    # Начальные множители: 1 / количество недостающего ПО (штраф АРМ равен нулю)
+    multipliers = 1.0 / state.missing[entry_arm]
+    best = float(n_candidates)
+    theta = 2.0
+    stalled = 0
+    for _ in range(iterations):
+        reduced = 1.0 - np.bincount(entry_arm, weights=multipliers, minlength=n_arms)
+        z = (reduced > 0) & candidate
+        arm_value = float(reduced[z].sum())
+        software_value = np.bincount(entry_software, weights=multipliers, minlength=n_software)
+        knapsack_value, x = _fractional_knapsack(software_value, costs, limit)
+
+        bound = arm_value + knapsack_value
+        if bound < best - 1e-9:
+            best, stalled = bound, 0
+        else:
+            stalled += 1
+            if stalled >= 10:
+                theta, stalled = theta / 2, 0
+        if best - lower_bound < 1e-6 or theta < 1e-4:
+            break
+
+        # Субградиент по lambda[a, s]: x[s] - z[a]; нулевые множители при
+        # положительном субградиенте не меняются (проекция на lambda >= 0)
+        gradient = x[entry_software] - z[entry_arm]
+        gradient[(multipliers <= 0) & (gradient > 0)] = 0.0
+        norm = float(gradient @ gradient)
+        if norm == 0:
+            break
+        step = theta * max(bound - lower_bound, 1e-3) / norm
+        multipliers = np.maximum(multipliers - step * gradient, 0.0)
+
+    return min(best, float(n_candidates))
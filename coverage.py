@@ -0,0 +1,297 @@
+"""
+Модуль проверки покрытия АРМ протестированным ПО
+Хранит наборы ПО каждого АРМ в виде битовых масок и отвечает на вопрос
+"какие АРМ покрыты данным набором ПО" одной векторной операцией
+"""
+
+import numpy as np
+from typing import Iterable, Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data_processor import DataProcessor
+
+
+class BitsetCoverage:
+    """
+    Движок покрытия на битовых масках: строка uint64-слов на каждый АРМ,
+    бит с номером ПО установлен, если ПО есть на АРМ
+    """
+
+    # Ограничение на размер плотной битовой матрицы; при превышении
+    # покрытие считается по CSR индексу без выделения битовой матрицы
+    MAX_BITSET_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, processor: 'DataProcessor'):
+        """
+        Инициализация движка покрытия
+
+        Args:
+            processor: DataProcessor с построенным целочисленным индексом
+        """
+        self.processor = processor
+        self.n_arms = len(processor.arm_names)
+        self.n_software = len(processor.software_names)
+        self.n_words = (self.n_software + 63) // 64
+
+        self.bits = None
+        if self.n_arms * self.n_words * 8 <= self.MAX_BITSET_BYTES:
+            self.bits = self._build_bits()
+
+    def _build_bits(self) -> np.ndarray:
+        """
+        Упаковка CSR индекса АРМ -> ПО в матрицу битовых масок
+        """
+        bits = np.zeros((self.n_arms, max(self.n_words, 1)), dtype=np.uint64)
+        rows = self.processor.arm_of_entry
+        cols = self.processor.arm_indices.astype(np.int64)
+        np.bitwise_or.at(
+            bits,
+            (rows, cols >> 6),
+            np.left_shift(np.uint64(1), (cols & 63).astype(np.uint64))
+        )
+        return bits
+
+    def pack(self, software_mask: np.ndarray) -> np.ndarray:
+        """
+        Упаковать булеву маску по номерам ПО в битовую строку
+
+        Args:
+            software_mask: Булева маска длины n_software
+
+        Returns:
+            Массив uint64 длины n_words
+        """
+        padded = np.zeros(self.n_words * 64, dtype=bool)
+        padded[:self.n_software] = software_mask
+        # packbits с little-порядком бит внутри байта + little-endian слова
+        return np.packbits(padded, bitorder='little').view('<u8').astype(np.uint64)
+
+    def covered_mask(self, software_mask: np.ndarray) -> np.ndarray:
+        """
+        Булева маска покрытых АРМ (все ПО АРМ входит в software_mask)
+
+        Args:
+            software_mask: Булева маска протестированного ПО по номерам ПО
+
+        Returns:
+            Булев массив длины n_arms
+        """
+        if self.n_arms == 0:
+            return np.zeros(0, dtype=bool)
+        if self.bits is None:
+            # Без битовой матрицы: АРМ покрыт, если у него нет непротестированного ПО
+            untested = np.bincount(
+                self.processor.arm_of_entry,
+                weights=~software_mask[self.processor.arm_indices],
+                minlength=self.n_arms
+            )
+            return untested == 0
+        tested_bits = self.pack(software_mask)
+        return ~np.any(self.bits & ~tested_bits, axis=1)
+
+    def covered_arm_ids(self, tested_software: Iterable[str]) -> np.ndarray:
+        """
+        Номера АРМ, покрытых набором ПО
+
+        Args:
+            tested_software: Множество протестированного ПО (имена)
+
+        Returns:
+            Массив номеров покрытых АРМ
+        """
+        return np.flatnonzero(self.covered_mask(self.processor.software_mask(tested_software)))
+
+    def is_arm_covered(self, arm_id: int, software_mask: np.ndarray) -> bool:
+        """
+        Проверить покрытие одного АРМ по номеру
+
+        Args:
+            arm_id: Номер АРМ
+            software_mask: Булева маска протестированного ПО по номерам ПО
+
+        Returns:
+            True если все ПО на АРМ протестировано
+        """
+        if self.bits is None:
+            return bool(software_mask[self.processor.arm_software_ids(arm_id)].all())
+        return not np.any(self.bits[arm_id] & ~self.pack(software_mask))
+
+
+class CoverageState:
+    """
+    Инкрементальное состояние покрытия: для каждого АРМ хранится количество
+    ещё не протестированного ПО. Добавление и удаление ПО обновляет только
+    АРМ, на которых это ПО установлено (O(степень ПО))
+    """
+
+    def __init__(
+        self,
+        processor: 'DataProcessor',
+        tested_software: Iterable[str] = (),
+        arms: Optional[Iterable[str]] = None
+    ):
+        """
+        Инициализация состояния покрытия
+
+        Args:
+            processor: DataProcessor с построенным целочисленным индексом
+            tested_software: Уже протестированное ПО (имена)
+            arms: АРМ, которые учитываются в покрытии (None = все АРМ)
+        """
+        self.processor = processor
+        n_arms = len(processor.arm_names)
+
+        # selected - протестированное и добавленное ПО, added - только добавленное
+        self.selected = processor.software_mask(tested_software)
+        self.added: Set[int] = set()
+        self.active = np.ones(n_arms, dtype=bool) if arms is None else processor.arm_mask(arms)
+
+        # Количество непротестированного ПО на каждом АРМ
+        self.missing = np.bincount(
+            processor.arm_of_entry,
+            weights=~self.selected[processor.arm_indices],
+            minlength=n_arms
+        ).astype(np.int32)
+
+        self.covered_count = int(np.count_nonzero(self.active & (self.missing == 0)))
+        # АРМ, которым не хватает ровно одного ПО
+        self.near_miss: Set[int] = set(np.flatnonzero(self.active & (self.missing == 1)).tolist())
+
+        # Результат последней операции add_software / remove_software
+        self.last_newly_covered = np.zeros(0, dtype=np.int64)
+        self.last_new_near_miss = np.zeros(0, dtype=np.int64)
+
+    def copy(self) -> 'CoverageState':
+        """Независимая копия состояния (для сценариев "что если")"""
+        other = CoverageState.__new__(CoverageState)
+        other.processor = self.processor
+        other.selected = self.selected.copy()
+        other.added = set(self.added)
+        other.active = self.active
+        other.missing = self.missing.copy()
+        other.covered_count = self.covered_count
+        other.near_miss = set(self.near_miss)
+        other.last_newly_covered = self.last_newly_covered
+        other.last_new_near_miss = self.last_new_near_miss
+        return other
+
+    def _active_arms_of(self, software_id: int) -> np.ndarray:
+        arm_ids = self.processor.software_arm_ids(software_id)
+        return arm_ids[self.active[arm_ids]]
+
+    def add_software(self, software_id: int) -> np.ndarray:
+        """
+        Отметить ПО как протестированное
+
+        Args:
+            software_id: Номер ПО
+
+        Returns:
+            Номера АРМ, ставших покрытыми
+        """
+        if self.selected[software_id]:
+            self.last_newly_covered = self.last_new_near_miss = np.zeros(0, dtype=np.int64)
+            return self.last_newly_covered
+        self.selected[software_id] = True
+        self.added.add(software_id)
+
+        arm_ids = self._active_arms_of(software_id)
+        self.missing[arm_ids] -= 1
+        left = self.missing[arm_ids]
+        newly_covered = arm_ids[left == 0]
+        new_near_miss = arm_ids[left == 1]
+
+        self.covered_count += len(newly_covered)
+        self.near_miss.difference_update(newly_covered.tolist())
+        self.near_miss.update(new_near_miss.tolist())
+
+        self.last_newly_covered = newly_covered
+        self.last_new_near_miss = new_near_miss
+        return newly_covered
+
+    def remove_software(self, software_id: int) -> np.ndarray:
+        """
+        Снять отметку о тестировании ПО
+
+        Args:
+            software_id: Номер ПО
+
+        Returns:
+            Номера АРМ, переставших быть покрытыми
+        """
+        if not self.selected[software_id]:
+            self.last_newly_covered = self.last_new_near_miss = np.zeros(0, dtype=np.int64)
+            return self.last_newly_covered
+        self.selected[software_id] = False
+        self.added.discard(software_id)
+
+        arm_ids = self._active_arms_of(software_id)
+        self.missing[arm_ids] += 1
+        left = self.missing[arm_ids]
+        uncovered = arm_ids[left == 1]
+
+        self.covered_count -= len(uncovered)
+        self.near_miss.difference_update(arm_ids[left == 2].tolist())
+        self.near_miss.update(uncovered.tolist())
+
+        self.last_newly_covered = np.zeros(0, dtype=np.int64)
+        self.last_new_near_miss = uncovered
+        return uncovered
+
+    def retire_covered(self) -> np.ndarray:
+        """
+        Исключить покрытые АРМ из учёта (АРМ, мигрировавшие в прошлых волнах):
+        состояние становится таким же, как созданное с оставшимися АРМ
+
+        Returns:
+            Номера исключённых АРМ
+        """
+        covered = self.covered_arm_ids()
+        # Маска может быть общей с копиями состояния
+        self.active = self.active.copy()
+        self.active[covered] = False
+        self.covered_count -= len(covered)
+        return covered
+
+    def add(self, software: str) -> Set[str]:
+        """Добавить ПО по имени, вернуть имена ставших покрытыми АРМ"""
+        software_id = self.processor.software_index.get(software)
+        if software_id is None:
+            return set()
+        return self.processor.decode_arms(self.add_software(software_id))
+
+    def remove(self, software: str) -> Set[str]:
+        """Убрать ПО по имени, вернуть имена переставших быть покрытыми АРМ"""
+        software_id = self.processor.software_index.get(software)
+        if software_id is None:
+            return set()
+        return self.processor.decode_arms(self.remove_software(software_id))
+
+    def is_covered(self, arm_id: int) -> bool:
+        """Покрыт ли АРМ (все его ПО протестировано)"""
+        return bool(self.active[arm_id] and self.missing[arm_id] == 0)
+
+    def missing_software_ids(self, arm_id: int) -> np.ndarray:
+        """Номера непротестированного ПО на АРМ"""
+        software_ids = self.processor.arm_software_ids(arm_id)
+        return software_ids[~self.selected[software_ids]]
+
+    def covered_mask(self) -> np.ndarray:
+        """Булева маска покрытых АРМ"""
+        return self.active & (self.missing == 0)
+
+    def covered_arm_ids(self) -> np.ndarray:
+        """Номера покрытых АРМ"""
+        return np.flatnonzero(self.covered_mask())
+
+    def covered_arms(self) -> Set[str]:
+        """Имена покрытых АРМ"""
+        return self.processor.decode_arms(self.covered_arm_ids())
+
+    def near_miss_arms(self) -> Set[str]:
+        """Имена АРМ, которым не хватает ровно одного ПО"""
+        return self.processor.decode_arms(self.near_miss)
+
+    def added_software(self) -> Set[str]:
+        """Имена ПО, добавленного после создания состояния"""
+        return self.processor.decode_software(self.added)
@@ -3,9 +3,41 @@
 Преобразует сырые данные из Excel/CSV в структуры для оптимизации
 """
 
+import hashlib
+import io
+import numpy as np
 import pandas as pd
-from typing import Dict, Set, FrozenSet
-from collections import defaultdict
+from typing import Dict, Set, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+from coverage import BitsetCoverage
+from xlsx_reader import XlsxReader
+
+
+class _CsvSource:
+    """
+    Потоковый источник строк CSV (тот же интерфейс, что у XlsxReader)
+    """
+
+    def __init__(self, source: Union[str, bytes], options: Dict):
+        self.source = source
+        self.options = options
+
+    def _open(self):
+        return io.BytesIO(self.source) if isinstance(self.source, bytes) else self.source
+
+    def iter_chunks(
+        self,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 200_000,
+        dtype: Optional[Dict] = None
+    ) -> Iterator[pd.DataFrame]:
+        options = dict(self.options)
+        if dtype is not None:
+            options['dtype'] = dtype
+        with pd.read_csv(self._open(), usecols=columns, chunksize=chunksize, **options) as reader:
+            yield from reader
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_csv(self._open(), **self.options)
 
 
 class DataProcessor:
@@ -13,7 +45,7 @@ class DataProcessor:
     Класс для обработки и подготовки данных о ПО на рабочих станциях
     """
 
-    def __init__(self, df: pd.DataFrame, arm_column: str, software_column: str):
+    def __init__(self, df: pd.DataFrame, arm_column: str, software_column: str, compact: bool = False):
         """
         Инициализация процессора данных
 
@@ -21,28 +53,336 @@ class DataProcessor:
             df: DataFrame с исходными данными
             arm_column: Название столбца с идентификаторами АРМ
             software_column: Название столбца с наименованиями ПО
+            compact: Компактный режим - словари arm_software_map, software_to_arms и
+                     set_to_arms_map не строятся при обработке, а выводятся из
+                     целочисленных индексов только при первом обращении
         """
         self.df = df.copy()
         self.arm_column = arm_column
         self.software_column = software_column
+        self.compact = compact
+
+        # Целочисленное представление: АРМ и ПО кодируются плотными номерами
+        # (в порядке сортировки имён), матрица инцидентности хранится в CSR/CSC
+        self.arm_names: np.ndarray = np.array([], dtype=object)
+        self.software_names: np.ndarray = np.array([], dtype=object)
+        self.arm_index: Dict[str, int] = {}
+        self.software_index: Dict[str, int] = {}
+        # CSR: ПО АРМ с номером a - software_ids[arm_indptr[a]:arm_indptr[a + 1]]
+        self.arm_indptr = np.zeros(1, dtype=np.int64)
+        self.arm_indices = np.array([], dtype=np.int32)
+        # CSC: АРМ с ПО номер s - arm_ids[software_indptr[s]:software_indptr[s + 1]]
+        self.software_indptr = np.zeros(1, dtype=np.int64)
+        self.software_indices = np.array([], dtype=np.int32)
+        # Номер уникального набора ПО для каждого АРМ
+        self.arm_profile_ids = np.array([], dtype=np.int64)
+        self.profile_count = 0
+
+        # Стоимость каждого ПО в единицах исходного ПО и состав супер-элементов
+        # (для процессора, полученного merge_equivalent_software)
+        self.software_weights = np.array([], dtype=np.int64)
+        self.software_members: Optional[Dict[str, List[str]]] = None
+
+        # Основные структуры данных (выводятся из целочисленных индексов)
+        self._arm_software_map: Optional[Dict[str, Set[str]]] = None
+        self._set_to_arms_map: Optional[Dict[FrozenSet[str], Set[str]]] = None
+        self._software_to_arms: Optional[Dict[str, Set[str]]] = None
 
-        # Основные структуры данных
-        self.arm_software_map: Dict[str, Set[str]] = {}
-        self.set_to_arms_map: Dict[FrozenSet[str], Set[str]] = {}
-        self.software_to_arms: Dict[str, Set[str]] = defaultdict(set)
+        # Движок покрытия на битовых масках (строится лениво)
+        self._coverage: Optional[BitsetCoverage] = None
+        # Хэш содержимого индекса (вычисляется лениво, см. fingerprint)
+        self._fingerprint: Optional[str] = None
 
         # Статистика
         self.total_arms = 0
         self.total_software = 0
-        self.original_df = None
+        self._original_df: Optional[pd.DataFrame] = None
+        # Потоковый источник (from_csv, from_xlsx): _CsvSource или XlsxReader
+        self._source: Optional[Union[_CsvSource, XlsxReader]] = None
+        # Коды строк и пары кодов между шагами process() (после построения индекса - None)
+        self._row_codes: Optional[Dict[str, tuple]] = None
+        self._pairs: Optional[np.ndarray] = None
+        # Пары "ПО - семейство ПО" по столбцу семейства (см. software_families)
+        self._families: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_csv(
+        cls,
+        source: Union[str, bytes],
+        arm_column: str,
+        software_column: str,
+        chunksize: int = 200_000,
+        compact: bool = True,
+        family_column: Optional[str] = None,
+        encoding: str = 'utf-8-sig',
+        **read_csv_kwargs
+    ) -> 'DataProcessor':
+        """
+        Потоковая обработка CSV: файл читается частями, каждая часть очищается
+        и кодируется сразу, в памяти остаются только номера пар "АРМ - ПО".
+        Исходные строки не хранятся - original_df и экспорт перечитывают их
+        из источника
+
+        Args:
+            source: Путь к CSV или его содержимое
+            arm_column: Название столбца с идентификаторами АРМ
+            software_column: Название столбца с наименованиями ПО
+            chunksize: Количество строк в части
+            compact: Компактный режим (см. __init__)
+            family_column: Столбец с семейством ПО (пары для software_families
+                           собираются за тот же проход)
+            encoding: Кодировка файла
+            **read_csv_kwargs: Дополнительные параметры pd.read_csv (sep и т.п.)
+
+        Returns:
+            Обработанный DataProcessor (process() вызывать не нужно)
+        """
+        source = _CsvSource(source, dict(read_csv_kwargs, encoding=encoding))
+        return cls._from_source(
+            source, arm_column, software_column, chunksize, compact, family_column, infer_numbers=True
+        )
+
+    @classmethod
+    def from_xlsx(
+        cls,
+        source: Union[str, bytes],
+        arm_column: str,
+        software_column: str,
+        sheet_name: Optional[str] = None,
+        chunksize: int = 200_000,
+        compact: bool = True,
+        family_column: Optional[str] = None
+    ) -> 'DataProcessor':
+        """
+        Потоковая обработка XLSX (см. from_csv): лист разбирается один раз,
+        из него берутся только столбцы АРМ, ПО и семейства ПО
+
+        Args:
+            source: Путь к XLSX или его содержимое
+            arm_column: Название столбца с идентификаторами АРМ
+            software_column: Название столбца с наименованиями ПО
+            sheet_name: Лист (если его нет или None - первый лист)
+            chunksize: Количество строк в части
+            compact: Компактный режим (см. __init__)
+            family_column: Столбец с семейством ПО
+
+        Returns:
+            Обработанный DataProcessor (process() вызывать не нужно)
+        """
+        source = XlsxReader(source, sheet_name)
+        return cls._from_source(source, arm_column, software_column, chunksize, compact, family_column)
+
+    @classmethod
+    def _from_source(
+        cls,
+        source: Union[_CsvSource, XlsxReader],
+        arm_column: str,
+        software_column: str,
+        chunksize: int,
+        compact: bool,
+        family_column: Optional[str],
+        infer_numbers: bool = False
+    ) -> 'DataProcessor':
+        """
+        Построение индекса по частям потокового источника
+
+        Args:
+            infer_numbers: Ключевые столбцы читаются текстом, а числовой тип столбца
+                           определяется по всем значениям, как pd.read_csv всего файла
+                           (CSV; в XLSX тип задан самими ячейками)
+        """
+        processor = cls(
+            pd.DataFrame(columns=[arm_column, software_column]), arm_column, software_column, compact=compact
+        )
+        processor._source = source
+
+        # Номера присваиваются в порядке появления, пары хранятся одним int64
+        arm_ids: Dict[str, int] = {}
+        software_ids: Dict[str, int] = {}
+        pairs = [np.array([], dtype=np.int64)]
+        families = []
+        key_columns = [arm_column, software_column]
+        columns = list(dict.fromkeys(key_columns + ([family_column] if family_column else [])))
+        dtype = {column: str for column in key_columns}
+        # Есть ли в столбце пустые значения (pd.read_csv хранит такой числовой столбец как float)
+        has_missing = dict.fromkeys(key_columns, False)
+        for chunk in source.iter_chunks(columns, chunksize, dtype=dtype):
+            for column in key_columns:
+                has_missing[column] = has_missing[column] or bool(chunk[column].isna().any())
+            if family_column:
+                families.append(chunk[list(dict.fromkeys([software_column, family_column]))].drop_duplicates())
+            arm_codes = cls._encode_values(chunk[arm_column], arm_ids)
+            software_codes = cls._encode_values(chunk[software_column], software_ids)
+            valid = (arm_codes >= 0) & (software_codes >= 0)
+            pairs.append(np.unique((arm_codes[valid] << 32) | software_codes[valid]))
+        pairs = np.unique(np.concatenate(pairs))
+        if families:
+            processor._families[family_column] = pd.concat(families, ignore_index=True).drop_duplicates()
+
+        pair_arms, pair_software = pairs >> 32, pairs & 0xFFFFFFFF
+        if infer_numbers:
+            # Числовые столбцы - имена как при обработке DataFrame из pd.read_csv
+            # ("1" и "1.0" - одно значение 1); совпавшие имена объединяются
+            arm_ids, arm_merge = cls._number_ids(arm_ids, has_missing[arm_column])
+            software_ids, software_merge = cls._number_ids(software_ids, has_missing[software_column])
+            pairs = np.unique((arm_merge[pair_arms] << 32) | software_merge[pair_software])
+            pair_arms, pair_software = pairs >> 32, pairs & 0xFFFFFFFF
+
+        # Перенумерация в порядке сортировки имён (как в _build_index); имена,
+        # встречавшиеся только в строках с пустым значением пары, отбрасываются
+        processor.arm_names, arm_rank = cls._sorted_names(arm_ids, pair_arms)
+        processor.software_names, software_rank = cls._sorted_names(software_ids, pair_software)
+        processor.arm_index = {arm: i for i, arm in enumerate(processor.arm_names.tolist())}
+        processor.software_index = {sw: i for i, sw in enumerate(processor.software_names.tolist())}
+        processor.software_weights = np.ones(len(processor.software_names), dtype=np.int64)
+        processor._set_incidence(arm_rank[pair_arms], software_rank[pair_software])
+        processor._build_structures()
+        return processor
+
+    @staticmethod
+    def _number_ids(ids: Dict[str, int], has_missing: bool) -> Tuple[Dict[str, int], np.ndarray]:
+        """
+        Если все значения столбца - числа, имена заменяются числовыми, как у
+        столбца pd.read_csv: целые - "1", дробные или с пустыми значениями - "1.0"
+
+        Args:
+            ids: Номера текстовых имён
+            has_missing: В столбце есть пустые значения
+
+        Returns:
+            Номера новых имён и новый номер для каждого прежнего номера
+        """
+        names = pd.Series(list(ids), dtype=object)
+        numbers = pd.to_numeric(names, errors='coerce')
+        if names.empty or numbers.isna().any():
+            return ids, np.arange(len(ids), dtype=np.int64)
+        if has_missing:
+            numbers = numbers.astype(float)
+        merged: Dict[str, int] = {}
+        remap = [merged.setdefault(name, len(merged)) for name in pd.Index(numbers).astype(str).tolist()]
+        return merged, np.array(remap, dtype=np.int64)
+
+    @staticmethod
+    def _encode_values(values: pd.Series, ids: Dict[str, int]) -> np.ndarray:
+        """
+        Номера очищенных значений части (-1 - пустое значение); новым значениям
+        присваиваются следующие номера
+        """
+        codes, names = DataProcessor._factorize_clean(values)
+        mapping = np.array([ids.setdefault(name, len(ids)) for name in names.tolist()] + [-1], dtype=np.int64)
+        return mapping[codes]
+
+    @staticmethod
+    def _factorize_raw(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+        """
+        Коды строк по исходным значениям (-1 - пустое значение) и уникальные
+        значения без сортировки. Смешанные столбцы сравниваются как текст: 2 и 2.0 различны
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Категориальный столбец уже закодирован
+            return values.cat.codes.to_numpy(), values.cat.categories
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+            values = values.where(values.isna(), values.astype(str))
+        return pd.factorize(values)
+
+    @staticmethod
+    def _factorize_clean(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+        """
+        Кодирование столбца с очисткой: пробелы по краям убираются один раз для
+        каждого уникального значения, а не для каждой строки
+
+        Returns:
+            Коды строк по очищенным значениям (-1 - пустое значение или пустая
+            строка) и очищенные значения в порядке сортировки
+        """
+        raw_codes, uniques = DataProcessor._factorize_raw(values)
+        stripped = pd.Index(uniques.astype(str), dtype=object).str.strip()
+        keep = np.asarray(stripped != '')
+        clean_codes = np.full(len(stripped) + 1, -1, dtype=np.int64)
+        kept_codes, names = pd.factorize(stripped[keep], sort=True)
+        clean_codes[:-1][keep] = kept_codes
+        # Код -1 (пустое значение) указывает на последний элемент, равный -1
+        return clean_codes[raw_codes], names
+
+    @staticmethod
+    def _sorted_names(ids: Dict[str, int], codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Использованные в codes имена в порядке сортировки и новый номер для
+        каждого номера в порядке появления
+        """
+        names = np.array(list(ids), dtype=object)
+        used = np.unique(codes)
+        order = used[np.argsort(names[used], kind='stable')]
+        rank = np.full(len(names), -1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        return names[order], rank
+
+    def iter_source_chunks(
+        self,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 200_000,
+        dtype: Optional[Dict] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Исходные строки по частям: из потокового источника или из original_df
+
+        Args:
+            columns: Только эти столбцы (None = все)
+            chunksize: Количество строк в части
+            dtype: Типы столбцов (для потокового источника)
+        """
+        if self._source is not None:
+            yield from self._source.iter_chunks(columns, chunksize, dtype=dtype)
+            return
+        df = self._original_df if self._original_df is not None else self.df
+        if columns is not None:
+            df = df[columns]
+        # Пустой DataFrame отдаётся одной частью (со столбцами)
+        for start in range(0, max(len(df), 1), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    @property
+    def original_df(self) -> Optional[pd.DataFrame]:
+        """
+        Исходный DataFrame; для потокового источника (from_csv, from_xlsx)
+        перечитывается из него при каждом обращении и не хранится
+        """
+        if self._original_df is None and self._source is not None:
+            return self._source.read()
+        return self._original_df
+
+    @original_df.setter
+    def original_df(self, value: Optional[pd.DataFrame]):
+        self._original_df = value
+        self._families = {}
+
+    def software_families(self, family_column: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        Уникальные пары "ПО - семейство ПО" из исходных строк (для экспорта
+        списков ПО); вычисляются по частям один раз для каждого столбца
+
+        Args:
+            family_column: Столбец с семейством ПО (None = семейства не нужны)
+
+        Returns:
+            DataFrame со столбцами ПО и семейства или None
+        """
+        if family_column is None:
+            return None
+        if family_column not in self._families:
+            columns = list(dict.fromkeys([self.software_column, family_column]))
+            parts = [chunk.drop_duplicates() for chunk in self.iter_source_chunks(columns)]
+            self._families[family_column] = pd.concat(parts, ignore_index=True).drop_duplicates()
+        return self._families[family_column]
 
     def process(self):
         """
         Основной метод обработки данных
         Выполняет все этапы преобразования
         """
-        # Сохраняем оригинальный DataFrame
-        self.original_df = self.df.copy()
+        # Сохраняем оригинальный DataFrame (очистка создаёт новый DataFrame
+        # и его не изменяет, поэтому копия не нужна)
+        self.original_df = self.df
 
         # Шаг 1: Очистка данных
         self._clean_data()
@@ -50,60 +390,785 @@ class DataProcessor:
         # Шаг 2: Удаление дубликатов
         self._deduplicate()
 
-        # Шаг 3: Создание основной карты АРМ -> ПО
-        self._build_arm_software_map()
+        # Шаг 3: Кодирование АРМ и ПО целыми числами, построение CSR/CSC индексов
+        self._build_index()
 
-        # Шаг 4: Создание инвертированной карты наборов ПО -> АРМ
-        self._build_set_to_arms_map()
+        # Шаги 4-6
+        self._build_structures()
 
-        # Шаг 5: Создание карты ПО -> АРМ
-        self._build_software_to_arms_map()
+    def _build_structures(self):
+        """
+        Структуры, выводимые из CSR/CSC индексов: наборы ПО, словари, статистика
+        """
+        # Шаг 4: Группировка АРМ по уникальным наборам ПО
+        self._build_profiles()
+
+        # Шаг 5: Словари АРМ -> ПО, наборы ПО -> АРМ, ПО -> АРМ
+        # (в компактном режиме строятся лениво при первом обращении)
+        self._arm_software_map = None
+        self._set_to_arms_map = None
+        self._software_to_arms = None
+        self._coverage = None
+        self._fingerprint = None
+        if not self.compact:
+            self._build_arm_software_map()
+            self._build_set_to_arms_map()
+            self._build_software_to_arms_map()
 
         # Шаг 6: Подсчёт статистики
         self._calculate_statistics()
 
     def _clean_data(self):
         """
-        Очистка данных от пустых значений и пробелов
+        Очистка данных от пустых значений и пробелов: ключевые столбцы кодируются
+        целыми числами по очищенным значениям (пустые значения и пустые строки - код -1)
         """
-        # Удаляем строки с пустыми значениями в ключевых столбцах
-        self.df = self.df.dropna(subset=[self.arm_column, self.software_column])
+        self._row_codes = {
+            column: self._factorize_clean(self.df[column])
+            for column in dict.fromkeys([self.arm_column, self.software_column])
+        }
 
-        # Убираем лишние пробелы
-        self.df[self.arm_column] = self.df[self.arm_column].astype(str).str.strip()
-        self.df[self.software_column] = self.df[self.software_column].astype(str).str.strip()
+    def _deduplicate(self):
+        """
+        Удаление дубликатов пар (АРМ, ПО) по целочисленным кодам: в df остаются
+        первые строки каждой пары с очищенными значениями ключевых столбцов
+        """
+        self._pairs, rows = self._unique_pairs(self._row_codes)
+        self.df = self._cleaned_rows(self.df, rows, self._row_codes)
 
-        # Удаляем пустые строки после очистки
-        self.df = self.df[
-            (self.df[self.arm_column] != '') &
-            (self.df[self.software_column] != '')
-        ]
+    def _unique_pairs(self, row_codes: Dict[str, tuple]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Упорядоченные ключи уникальных пар без пустых значений и номера строк
+        их первого появления (в порядке строк)
+        """
+        arm_codes, _ = row_codes[self.arm_column]
+        software_codes, software_names = row_codes[self.software_column]
+        rows = np.flatnonzero((arm_codes >= 0) & (software_codes >= 0))
+        n_software = max(len(software_names), 1)
+        pairs, first = np.unique(arm_codes[rows] * n_software + software_codes[rows], return_index=True)
+        return pairs, np.sort(rows[first])
 
-    def _deduplicate(self):
+    def _cleaned_rows(self, df: pd.DataFrame, rows: np.ndarray, row_codes: Dict[str, tuple]) -> pd.DataFrame:
+        """Строки rows с очищенными значениями ключевых столбцов"""
+        return df.iloc[rows].assign(**{
+            column: np.asarray(names, dtype=object)[codes[rows]]
+            for column, (codes, names) in row_codes.items()
+        })
+
+    def _clean_rows(self, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Очищенные строки без дубликатов пар (как df после process())"""
+        if df is None or df.empty:
+            return pd.DataFrame(columns=list(dict.fromkeys([self.arm_column, self.software_column])))
+        row_codes = {
+            column: self._factorize_clean(df[column])
+            for column in dict.fromkeys([self.arm_column, self.software_column])
+        }
+        return self._cleaned_rows(df, self._unique_pairs(row_codes)[1], row_codes)
+
+    def _build_index(self):
         """
-        Удаление дубликатов пар (АРМ, ПО)
+        Кодирование АРМ и ПО плотными целыми номерами и построение
+        разреженной матрицы инцидентности в форматах CSR (АРМ -> ПО) и CSC (ПО -> АРМ)
         """
-        # Оставляем только уникальные пары
-        self.df = self.df.drop_duplicates(
-            subset=[self.arm_column, self.software_column]
-        )
+        _, arm_names = self._row_codes[self.arm_column]
+        _, software_names = self._row_codes[self.software_column]
+        n_software = max(len(software_names), 1)
+        pair_arms, pair_software = self._pairs // n_software, self._pairs % n_software
+        self._row_codes, self._pairs = None, None
+
+        # Остаются только АРМ и ПО из пар без пустых значений (порядок имён сохраняется)
+        arm_codes, used_arms = pd.factorize(pair_arms, sort=True)
+        software_codes, used_software = pd.factorize(pair_software, sort=True)
+
+        self.arm_names = np.asarray(arm_names[used_arms], dtype=object)
+        self.software_names = np.asarray(software_names[used_software], dtype=object)
+        self.arm_index = {arm: i for i, arm in enumerate(self.arm_names.tolist())}
+        self.software_index = {sw: i for i, sw in enumerate(self.software_names.tolist())}
+        self.software_weights = np.ones(len(self.software_names), dtype=np.int64)
+
+        self._set_incidence(arm_codes, software_codes)
+
+    def _set_incidence(self, arm_codes: np.ndarray, software_codes: np.ndarray):
+        """
+        Построение CSR/CSC индексов по парам (номер АРМ, номер ПО) без дубликатов
+        """
+        n_arms = len(self.arm_names)
+        n_software = len(self.software_names)
+        arm_codes = np.asarray(arm_codes, dtype=np.int64)
+        software_codes = np.asarray(software_codes, dtype=np.int64)
+
+        # CSR: сортируем пары по АРМ, внутри АРМ - по ПО
+        order = np.lexsort((software_codes, arm_codes))
+        self.arm_indices = software_codes[order].astype(np.int32)
+        self.arm_indptr = np.zeros(n_arms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arm_codes, minlength=n_arms), out=self.arm_indptr[1:])
+
+        # CSC: сортируем пары по ПО, внутри ПО - по АРМ
+        order = np.lexsort((arm_codes, software_codes))
+        self.software_indices = arm_codes[order].astype(np.int32)
+        self.software_indptr = np.zeros(n_software + 1, dtype=np.int64)
+        np.cumsum(np.bincount(software_codes, minlength=n_software), out=self.software_indptr[1:])
+
+    def _build_profiles(self):
+        """
+        Присвоение каждому АРМ номера его уникального набора ПО
+        """
+        profile_of: Dict[tuple, int] = {}
+        arm_indices = self.arm_indices.tolist()
+        indptr = self.arm_indptr.tolist()
+        profile_ids = np.empty(len(self.arm_names), dtype=np.int64)
+        for arm_id in range(len(self.arm_names)):
+            key = tuple(arm_indices[indptr[arm_id]:indptr[arm_id + 1]])
+            profile_ids[arm_id] = profile_of.setdefault(key, len(profile_of))
+        self.arm_profile_ids = profile_ids
+        self.profile_count = len(profile_of)
 
     def _build_arm_software_map(self):
-        self.arm_software_map = self.df.groupby(self.arm_column)[self.software_column].apply(set).to_dict()
+        software_names = self.software_names.tolist()
+        arm_indices = self.arm_indices.tolist()
+        indptr = self.arm_indptr.tolist()
+        self._arm_software_map = {
+            arm: {software_names[s] for s in arm_indices[indptr[a]:indptr[a + 1]]}
+            for a, arm in enumerate(self.arm_names.tolist())
+        }
 
     def _build_set_to_arms_map(self):
-        s = pd.Series(self.arm_software_map)
-        self.set_to_arms_map = s.index.to_series().groupby(s.apply(frozenset)).apply(set).to_dict()
+        arm_software_map = self.arm_software_map
+        set_to_arms_map: Dict[FrozenSet[str], Set[str]] = {}
+        by_profile: Dict[int, Set[str]] = {}
+        for arm, profile_id in zip(self.arm_names.tolist(), self.arm_profile_ids.tolist()):
+            arms = by_profile.get(profile_id)
+            if arms is None:
+                arms = by_profile[profile_id] = set()
+                set_to_arms_map[frozenset(arm_software_map[arm])] = arms
+            arms.add(arm)
+        self._set_to_arms_map = set_to_arms_map
 
     def _build_software_to_arms_map(self):
-        self.software_to_arms = self.df.groupby(self.software_column)[self.arm_column].apply(set).to_dict()
+        arm_names = self.arm_names.tolist()
+        software_indices = self.software_indices.tolist()
+        indptr = self.software_indptr.tolist()
+        self._software_to_arms = {
+            sw: {arm_names[a] for a in software_indices[indptr[s]:indptr[s + 1]]}
+            for s, sw in enumerate(self.software_names.tolist())
+        }
+
+    @property
+    def arm_software_map(self) -> Dict[str, Set[str]]:
+        """Карта АРМ -> множество ПО (строится лениво из CSR индекса)"""
+        if self._arm_software_map is None:
+            self._build_arm_software_map()
+        return self._arm_software_map
+
+    @arm_software_map.setter
+    def arm_software_map(self, value: Dict[str, Set[str]]):
+        self._arm_software_map = value
+
+    @property
+    def set_to_arms_map(self) -> Dict[FrozenSet[str], Set[str]]:
+        """Карта набор ПО -> множество АРМ (строится лениво)"""
+        if self._set_to_arms_map is None:
+            self._build_set_to_arms_map()
+        return self._set_to_arms_map
+
+    @set_to_arms_map.setter
+    def set_to_arms_map(self, value: Dict[FrozenSet[str], Set[str]]):
+        self._set_to_arms_map = value
+
+    @property
+    def software_to_arms(self) -> Dict[str, Set[str]]:
+        """Карта ПО -> множество АРМ (строится лениво из CSC индекса)"""
+        if self._software_to_arms is None:
+            self._build_software_to_arms_map()
+        return self._software_to_arms
+
+    @software_to_arms.setter
+    def software_to_arms(self, value: Dict[str, Set[str]]):
+        self._software_to_arms = value
+
+    @property
+    def coverage(self) -> BitsetCoverage:
+        """Движок покрытия на битовых масках (строится при первом обращении)"""
+        if self._coverage is None:
+            self._coverage = BitsetCoverage(self)
+        return self._coverage
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Хэш содержимого данных: имена АРМ и ПО, пары "АРМ - ПО" и стоимости ПО.
+        Одинаковые выгрузки дают одинаковый хэш независимо от порядка строк
+        (ключ кэша результатов расчёта)
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for names in (self.arm_names, self.software_names):
+                digest.update('\x00'.join(map(str, names.tolist())).encode('utf-8'))
+                digest.update(b'\x01')
+            for array in (self.arm_indptr, self.arm_indices, self.software_weights):
+                digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
 
     def _calculate_statistics(self):
         """
         Подсчёт статистики по данным
         """
-        self.total_arms = len(self.arm_software_map)
-        self.total_software = len(self.software_to_arms)
+        self.total_arms = len(self.arm_names)
+        self.total_software = len(self.software_names)
+
+    def merge_equivalent_software(self, exclude: Iterable[str] = ()) -> 'DataProcessor':
+        """
+        Сжать взаимозаменяемое ПО в супер-элементы
+
+        ПО с одинаковым набором АРМ (распространяемые библиотеки, компоненты
+        одного пакета) в любом оптимальном плане выбирается только целиком:
+        АРМ с одним из них содержит и остальные. Каждый такой класс становится
+        одним элементом со стоимостью, равной размеру класса.
+
+        Args:
+            exclude: ПО, не участвующее в сжатии (например, уже протестированное)
+
+        Returns:
+            Новый DataProcessor (те же АРМ, ПО - супер-элементы). Имя супер-элемента -
+            наименьшее имя из класса, состав - в software_members, стоимость - в software_weights
+        """
+        excluded = self.software_mask(exclude)
+        classes: Dict[tuple, List[int]] = {}
+        for software_id in np.flatnonzero(~excluded).tolist():
+            footprint = tuple(self.software_arm_ids(software_id).tolist())
+            classes.setdefault(footprint, []).append(software_id)
+
+        # Номера ПО упорядочены по именам, поэтому сортировка по первому
+        # элементу сохраняет порядок имён супер-элементов
+        members = sorted(classes.values(), key=lambda ids: ids[0])
+        class_of = np.full(len(self.software_names), -1, dtype=np.int64)
+        for class_id, software_ids in enumerate(members):
+            class_of[software_ids] = class_id
+
+        # Пары (АРМ, класс) без дубликатов
+        entry_class = class_of[self.arm_indices]
+        keep = entry_class >= 0
+        pairs = np.unique(self.arm_of_entry[keep] * max(len(members), 1) + entry_class[keep])
+
+        names = self.software_names
+        return self._derived(
+            self.arm_names,
+            np.array([names[ids[0]] for ids in members], dtype=object),
+            pairs // max(len(members), 1),
+            pairs % max(len(members), 1),
+            software_weights=np.array([len(ids) for ids in members], dtype=np.int64),
+            software_members={names[ids[0]]: [names[i] for i in ids] for ids in members}
+        )
+
+    def subset(self, arm_ids: np.ndarray, software_ids: np.ndarray) -> 'DataProcessor':
+        """
+        Подзадача на части АРМ и ПО (например, на компоненте связности)
+
+        Args:
+            arm_ids: Номера АРМ подзадачи
+            software_ids: Номера ПО подзадачи; остальное ПО из наборов АРМ исключается
+
+        Returns:
+            Новый компактный DataProcessor (веса и состав супер-элементов сохраняются)
+        """
+        arm_ids = np.sort(np.asarray(arm_ids, dtype=np.int64))
+        software_ids = np.sort(np.asarray(software_ids, dtype=np.int64))
+        arm_code = np.full(len(self.arm_names), -1, dtype=np.int64)
+        arm_code[arm_ids] = np.arange(len(arm_ids))
+        software_code = np.full(len(self.software_names), -1, dtype=np.int64)
+        software_code[software_ids] = np.arange(len(software_ids))
+
+        entry_arm = arm_code[self.arm_of_entry]
+        entry_software = software_code[self.arm_indices]
+        keep = (entry_arm >= 0) & (entry_software >= 0)
+
+        software_names = self.software_names[software_ids]
+        members = None
+        if self.software_members is not None:
+            members = {sw: self.software_members[sw] for sw in software_names.tolist()}
+        return self._derived(
+            self.arm_names[arm_ids],
+            software_names,
+            entry_arm[keep],
+            entry_software[keep],
+            software_weights=self.software_weights[software_ids],
+            software_members=members
+        )
+
+    def _derived(
+        self,
+        arm_names: np.ndarray,
+        software_names: np.ndarray,
+        arm_codes: np.ndarray,
+        software_codes: np.ndarray,
+        software_weights: np.ndarray,
+        software_members: Optional[Dict[str, List[str]]]
+    ) -> 'DataProcessor':
+        """
+        Компактный DataProcessor, построенный по готовым парам (номер АРМ, номер ПО)
+        """
+        derived = DataProcessor(
+            pd.DataFrame(columns=[self.arm_column, self.software_column]),
+            self.arm_column,
+            self.software_column,
+            compact=True
+        )
+        derived.arm_names = arm_names
+        derived.arm_index = (
+            self.arm_index if arm_names is self.arm_names
+            else {arm: i for i, arm in enumerate(arm_names.tolist())}
+        )
+        derived.software_names = software_names
+        derived.software_index = {sw: i for i, sw in enumerate(software_names.tolist())}
+        derived.software_weights = software_weights
+        derived.software_members = software_members
+        derived._set_incidence(arm_codes, software_codes)
+        derived._build_profiles()
+        derived._calculate_statistics()
+        return derived
+
+    def apply_delta(
+        self,
+        added_rows: Optional[pd.DataFrame] = None,
+        removed_rows: Optional[pd.DataFrame] = None,
+        plan_software: Optional[Iterable[str]] = None
+    ) -> Dict:
+        """
+        Применить изменения выгрузки без полной переобработки: пары вырезаются
+        из CSR/CSC индексов и вставляются в них без пересортировки, наборы ПО
+        и построенные словари обновляются только для затронутых АРМ. Отчёт
+        позволяет перепроверить действующий план вместо его пересчёта
+
+        Строки очищаются по тем же правилам, что и в process(); пара, которая
+        есть и в добавленных, и в удалённых строках, остаётся. В original_df
+        (если он хранится в памяти) удаляются все строки удалённых пар и
+        добавляются новые строки, df (очищенные строки) изменяется так же, как
+        после process(); строки потокового источника не меняются.
+
+        Args:
+            added_rows: Новые строки (столбцы АРМ и ПО, остальные столбцы - для original_df)
+            removed_rows: Удалённые строки (учитываются столбцы АРМ и ПО)
+            plan_software: ПО действующего плана (например, всё ПО рассчитанных волн)
+
+        Returns:
+            Словарь: количество добавленных и удалённых пар (added_pairs, removed_pairs),
+            появившиеся и исчезнувшие АРМ и ПО (new_arms, removed_arms, new_software,
+            removed_software), АРМ с изменившимся набором ПО (changed_arms) и АРМ,
+            изменившие статус покрытия планом (все ПО АРМ входит в plan_software):
+            newly_covered (в том числе новые АРМ) и no_longer_covered (без удалённых АРМ)
+
+        Raises:
+            ValueError: Процессор со сжатым взаимозаменяемым ПО (merge_equivalent_software)
+        """
+        if self.software_members is not None:
+            raise ValueError("apply_delta requires a processor without merged software")
+        removed_clean, added_clean = self._clean_rows(removed_rows), self._clean_rows(added_rows)
+        removed_arm_names = removed_clean[self.arm_column].to_numpy(dtype=object)
+        removed_software_names = removed_clean[self.software_column].to_numpy(dtype=object)
+        added_arm_names = added_clean[self.arm_column].to_numpy(dtype=object)
+        added_software_names = added_clean[self.software_column].to_numpy(dtype=object)
+
+        old_arm_names, old_software_names = self.arm_names, self.software_names
+        n_old_arms, n_old_software = len(old_arm_names), len(old_software_names)
+
+        # Временная нумерация: прежние номера, новые имена - в конце
+        new_arms = sorted(set(added_arm_names.tolist()) - self.arm_index.keys())
+        new_software = sorted(set(added_software_names.tolist()) - self.software_index.keys())
+        extra_arms = {arm: n_old_arms + i for i, arm in enumerate(new_arms)}
+        extra_software = {sw: n_old_software + i for i, sw in enumerate(new_software)}
+        n_temp_arms, n_temp_software = n_old_arms + len(new_arms), n_old_software + len(new_software)
+
+        def temp_keys(arm_names, software_names):
+            arm_ids = [self.arm_index.get(arm, extra_arms.get(arm, -1)) for arm in arm_names.tolist()]
+            software_ids = [
+                self.software_index.get(sw, extra_software.get(sw, -1)) for sw in software_names.tolist()
+            ]
+            arm_ids = np.array(arm_ids, dtype=np.int64)
+            software_ids = np.array(software_ids, dtype=np.int64)
+            # Удалённые пары с неизвестными именами не существуют
+            known = (arm_ids >= 0) & (software_ids >= 0)
+            return np.unique(arm_ids[known] * n_temp_software + software_ids[known])
+
+        # Ключи пар CSR (АРМ, затем ПО) упорядочены по возрастанию
+        old_arm_of_entry = self.arm_of_entry
+        old_keys = old_arm_of_entry * n_temp_software + self.arm_indices
+        removed_keys = temp_keys(removed_arm_names, removed_software_names)
+        added_keys = temp_keys(added_arm_names, added_software_names)
+        removed_keys = removed_keys[~np.isin(removed_keys, added_keys)]
+        removed_keys = removed_keys[self._sorted_contains(old_keys, removed_keys)]
+        added_keys = added_keys[~self._sorted_contains(old_keys, added_keys)]
+        removed_arms, removed_software = removed_keys // n_temp_software, removed_keys % n_temp_software
+        added_arms, added_software = added_keys // n_temp_software, added_keys % n_temp_software
+
+        # Затронутые АРМ: наборы ПО до изменения (по прежним номерам)
+        changed = np.unique(np.concatenate([removed_arms, added_arms]))
+        temp_arm_names = np.concatenate([old_arm_names, np.array(new_arms, dtype=object)])
+        temp_software_names = np.concatenate([old_software_names, np.array(new_software, dtype=object)])
+        before = {
+            temp_arm_names[arm_id]: set(old_software_names[self.arm_software_ids(arm_id)].tolist())
+            for arm_id in changed.tolist() if arm_id < n_old_arms
+        }
+
+        # Новая нумерация в порядке имён; АРМ и ПО без пар исключаются
+        arm_degrees = (
+            np.bincount(added_arms, minlength=n_temp_arms) - np.bincount(removed_arms, minlength=n_temp_arms)
+        )
+        arm_degrees[:n_old_arms] += self.arm_degrees
+        software_degrees = (
+            np.bincount(added_software, minlength=n_temp_software)
+            - np.bincount(removed_software, minlength=n_temp_software)
+        )
+        software_degrees[:n_old_software] += self.software_degrees
+        arm_used, software_used = arm_degrees > 0, software_degrees > 0
+        arm_names, arm_rank = self._merge_sorted_names(old_arm_names, new_arms, arm_used)
+        software_names, software_rank = self._merge_sorted_names(old_software_names, new_software, software_used)
+        n_arms, n_software = len(arm_names), len(software_names)
+
+        # Новая нумерация сохраняет порядок прежних имён, поэтому оставшиеся
+        # элементы CSR и CSC остаются упорядоченными: удалённые пары вырезаются,
+        # добавленные вставляются на свои места без пересортировки индексов
+        csr_keys = self._splice_sorted(
+            old_keys, removed_keys,
+            arm_rank[old_arm_of_entry] * n_software + software_rank[self.arm_indices],
+            np.sort(arm_rank[added_arms] * n_software + software_rank[added_software])
+        )
+        old_csc_keys = self.software_of_entry * n_temp_arms + self.software_indices
+        csc_keys = self._splice_sorted(
+            old_csc_keys, np.sort(removed_software * n_temp_arms + removed_arms),
+            software_rank[self.software_of_entry] * n_arms + arm_rank[self.software_indices],
+            np.sort(software_rank[added_software] * n_arms + arm_rank[added_arms])
+        )
+
+        old_profile_ids = self.arm_profile_ids
+        self.arm_names, self.software_names = arm_names, software_names
+        if len(new_arms) or len(new_software) or not arm_used.all() or not software_used.all():
+            self.arm_index = {arm: i for i, arm in enumerate(arm_names.tolist())}
+            self.software_index = {sw: i for i, sw in enumerate(software_names.tolist())}
+        self.software_weights = np.ones(n_software, dtype=np.int64)
+        self.arm_indices = (csr_keys % n_software).astype(np.int32)
+        self.arm_indptr = np.zeros(n_arms + 1, dtype=np.int64)
+        self.arm_indptr[1:][arm_rank[arm_used]] = arm_degrees[arm_used]
+        np.cumsum(self.arm_indptr, out=self.arm_indptr)
+        self.software_indices = (csc_keys % n_arms).astype(np.int32)
+        self.software_indptr = np.zeros(n_software + 1, dtype=np.int64)
+        self.software_indptr[1:][software_rank[software_used]] = software_degrees[software_used]
+        np.cumsum(self.software_indptr, out=self.software_indptr)
+
+        # Наборы ПО: у незатронутых АРМ номер набора прежний, затронутые АРМ
+        # сравниваются с наборами по хэшу имён ПО (не зависит от нумерации)
+        # и точной проверкой набора АРМ-представителя
+        affected = np.zeros(n_temp_arms, dtype=bool)
+        affected[changed] = True
+        kept = np.flatnonzero(~affected[:n_old_arms])
+        kept_new = arm_rank[kept]
+        profile_ids = np.empty(n_arms, dtype=np.int64)
+        profile_ids[kept_new] = old_profile_ids[kept]
+        representative = np.full(self.profile_count, -1, dtype=np.int64)
+        representative[old_profile_ids[kept]] = kept_new
+
+        if n_arms:
+            name_hashes = pd.util.hash_array(software_names)
+            arm_hashes = np.add.reduceat(name_hashes[self.arm_indices], self.arm_indptr[:-1])
+        else:
+            arm_hashes = np.array([], dtype=np.uint64)
+        known_profiles = np.flatnonzero(representative >= 0)
+        profile_hashes = arm_hashes[representative[known_profiles]]
+        order = np.argsort(profile_hashes, kind='stable')
+        known_profiles, profile_hashes = known_profiles[order], profile_hashes[order]
+
+        after = {}
+        new_profiles: Dict[tuple, int] = {}
+        n_profiles = self.profile_count
+        changed_new = arm_rank[changed]
+        changed_new = changed_new[changed_new >= 0]
+        firsts = np.searchsorted(profile_hashes, arm_hashes[changed_new], side='left').tolist()
+        lasts = np.searchsorted(profile_hashes, arm_hashes[changed_new], side='right').tolist()
+        for arm_id, first, last in zip(changed_new.tolist(), firsts, lasts):
+            software_ids = self.arm_software_ids(arm_id)
+            after[arm_names[arm_id]] = set(software_names[software_ids].tolist())
+            profile_id = next((
+                int(known_profiles[i]) for i in range(first, last)
+                if np.array_equal(self.arm_software_ids(representative[known_profiles[i]]), software_ids)
+            ), None)
+            if profile_id is None:
+                profile_id = new_profiles.setdefault(tuple(software_ids.tolist()), n_profiles + len(new_profiles))
+            profile_ids[arm_id] = profile_id
+        # Наборы ПО без АРМ удаляются, номера остаются плотными
+        counts = np.bincount(profile_ids, minlength=n_profiles + len(new_profiles))
+        if not counts.all():
+            profile_ids = (np.cumsum(counts > 0) - 1)[profile_ids]
+        self.arm_profile_ids = profile_ids
+        self.profile_count = int(np.count_nonzero(counts))
+
+        self._update_maps(
+            before, after, removed_keys, added_keys, temp_arm_names, temp_software_names, n_temp_software
+        )
+        self._update_rows(
+            added_rows, added_clean,
+            temp_arm_names[removed_arms], temp_software_names[removed_software],
+            set(zip(temp_arm_names[added_arms].tolist(), temp_software_names[added_software].tolist()))
+        )
+        self._coverage = None
+        self._fingerprint = None
+        self._calculate_statistics()
+
+        plan = set(plan_software) if plan_software is not None else None
+        newly_covered, no_longer_covered = set(), set()
+        if plan is not None:
+            for arm in before.keys() | after.keys():
+                was = arm in before and before[arm] <= plan
+                now = arm in after and after[arm] <= plan
+                if now and not was:
+                    newly_covered.add(arm)
+                elif was and not now and arm in after:
+                    no_longer_covered.add(arm)
+        return {
+            'added_pairs': len(added_keys),
+            'removed_pairs': len(removed_keys),
+            'new_arms': set(temp_arm_names[n_old_arms:][arm_used[n_old_arms:]].tolist()),
+            'removed_arms': set(old_arm_names[~arm_used[:n_old_arms]].tolist()),
+            'new_software': set(temp_software_names[n_old_software:][software_used[n_old_software:]].tolist()),
+            'removed_software': set(old_software_names[~software_used[:n_old_software]].tolist()),
+            'changed_arms': set(before) | set(after),
+            'newly_covered': newly_covered,
+            'no_longer_covered': no_longer_covered
+        }
+
+    @staticmethod
+    def _sorted_contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Маска: есть ли каждый из keys в отсортированном массиве sorted_keys"""
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), max(len(sorted_keys) - 1, 0))
+        return sorted_keys[positions] == keys if len(sorted_keys) else np.zeros(len(keys), dtype=bool)
+
+    @staticmethod
+    def _row_ids(values: pd.Series, ids: Dict[str, int]) -> np.ndarray:
+        """
+        Номера очищенных значений строк по словарю ids (-1 - значения нет в ids
+        или оно пустое); значения кодируются без сортировки, очищаются уникальные
+        """
+        codes, uniques = DataProcessor._factorize_raw(values)
+        names = pd.Index(uniques.astype(str), dtype=object).str.strip()
+        return np.array([ids.get(name, -1) for name in names.tolist()] + [-1], dtype=np.int64)[codes]
+
+    @staticmethod
+    def _splice_sorted(
+        keys: np.ndarray,
+        removed: np.ndarray,
+        renumbered: np.ndarray,
+        added: np.ndarray
+    ) -> np.ndarray:
+        """
+        Упорядоченные ключи после изменения: из renumbered (ключи keys в новой
+        нумерации) вырезаются позиции ключей removed, вставляются ключи added
+
+        Args:
+            keys: Упорядоченные ключи в прежней нумерации
+            removed: Упорядоченные удаляемые ключи (все есть в keys)
+            renumbered: Ключи keys в новой нумерации (порядок тот же)
+            added: Упорядоченные добавляемые ключи в новой нумерации
+        """
+        result = np.delete(renumbered, np.searchsorted(keys, removed))
+        return np.insert(result, np.searchsorted(result, added), added)
+
+    @staticmethod
+    def _merge_sorted_names(
+        old_names: np.ndarray,
+        new_names: List[str],
+        used: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Слияние отсортированных имён с отсортированными новыми (во временной
+        нумерации новые имена идут после прежних) с отбором использованных
+
+        Returns:
+            Использованные имена в порядке сортировки и новый номер для каждого
+            временного номера (-1 - имя не используется)
+        """
+        new_names = np.array(new_names, dtype=object)
+        # Позиция имени в объединённом порядке: собственный номер + количество меньших имён другого списка
+        positions = np.concatenate([
+            np.arange(len(old_names)) + np.searchsorted(new_names, old_names),
+            np.arange(len(new_names)) + np.searchsorted(old_names, new_names)
+        ]).astype(np.int64)
+        order = np.empty(len(positions), dtype=np.int64)
+        order[positions] = np.arange(len(positions))
+        used_in_order = used[order]
+        rank = np.where(used, (np.cumsum(used_in_order) - 1)[positions], -1)
+        names = np.concatenate([old_names, new_names])[order][used_in_order]
+        return names, rank
+
+    def _update_maps(
+        self,
+        before: Dict[str, Set[str]],
+        after: Dict[str, Set[str]],
+        removed_keys: np.ndarray,
+        added_keys: np.ndarray,
+        arm_names: np.ndarray,
+        software_names: np.ndarray,
+        n_software: int
+    ):
+        """Обновить уже построенные словари для затронутых АРМ (непостроенные остаются ленивыми)"""
+        if self._arm_software_map is not None:
+            for arm in before.keys() - after.keys():
+                del self._arm_software_map[arm]
+            for arm, software in after.items():
+                self._arm_software_map[arm] = set(software)
+
+        if self._set_to_arms_map is not None:
+            for arm, software in before.items():
+                key = frozenset(software)
+                arms = self._set_to_arms_map[key]
+                arms.discard(arm)
+                if not arms:
+                    del self._set_to_arms_map[key]
+            for arm, software in after.items():
+                self._set_to_arms_map.setdefault(frozenset(software), set()).add(arm)
+
+        if self._software_to_arms is not None:
+            for key in removed_keys.tolist():
+                arm, sw = arm_names[key // n_software], software_names[key % n_software]
+                arms = self._software_to_arms[sw]
+                arms.discard(arm)
+                if not arms:
+                    del self._software_to_arms[sw]
+            for key in added_keys.tolist():
+                arm, sw = arm_names[key // n_software], software_names[key % n_software]
+                self._software_to_arms.setdefault(sw, set()).add(arm)
+
+    def _update_rows(
+        self,
+        added_rows: Optional[pd.DataFrame],
+        added_clean: pd.DataFrame,
+        removed_arm_names: np.ndarray,
+        removed_software_names: np.ndarray,
+        added_pairs: Set[tuple]
+    ):
+        """
+        Изменить строки в памяти: из original_df удаляются строки удалённых пар и
+        добавляются новые строки, в df (очищенные строки) - то же для пар
+        (потоковый источник не изменяется)
+
+        Args:
+            added_rows: Новые строки
+            added_clean: Очищенные новые строки без дубликатов пар
+            removed_arm_names: АРМ удалённых пар
+            removed_software_names: ПО удалённых пар
+            added_pairs: Добавленные пары (АРМ, ПО), которых не было в данных
+        """
+        if self._source is not None:
+            return
+        df = self._drop_pairs(self.df, removed_arm_names, removed_software_names)
+        if added_pairs:
+            keys = zip(added_clean[self.arm_column].tolist(), added_clean[self.software_column].tolist())
+            new_rows = added_clean[[key in added_pairs for key in keys]]
+            df = pd.concat([df, new_rows], ignore_index=True)
+        self.df = df
+
+        if self._original_df is not None:
+            original_df = self._drop_pairs(self._original_df, removed_arm_names, removed_software_names)
+            if added_rows is not None and not added_rows.empty:
+                original_df = pd.concat([original_df, added_rows], ignore_index=True)
+            self.original_df = original_df
+
+    def _drop_pairs(self, df: pd.DataFrame, arm_names: np.ndarray, software_names: np.ndarray) -> pd.DataFrame:
+        """Строки df без строк пар (arm_names[i], software_names[i]) (сравниваются очищенные значения)"""
+        if not len(arm_names):
+            return df
+        arm_ids = {arm: i for i, arm in enumerate(dict.fromkeys(arm_names.tolist()))}
+        software_ids = {sw: i for i, sw in enumerate(dict.fromkeys(software_names.tolist()))}
+        n_software = len(software_ids)
+        pairs = np.unique(
+            np.array([arm_ids[arm] for arm in arm_names.tolist()], dtype=np.int64) * n_software
+            + np.array([software_ids[sw] for sw in software_names.tolist()], dtype=np.int64)
+        )
+        # ПО проверяется только в строках с АРМ удалённых пар
+        row_arms = self._row_ids(df[self.arm_column], arm_ids)
+        candidates = np.flatnonzero(row_arms >= 0)
+        row_software = self._row_ids(df[self.software_column].iloc[candidates], software_ids)
+        keys = row_arms[candidates] * n_software + row_software
+        drop = np.zeros(len(df), dtype=bool)
+        drop[candidates[(row_software >= 0) & np.isin(keys, pairs)]] = True
+        return df[~drop]
+
+    def expand_software(self, software: Iterable[str]) -> Set[str]:
+        """Развернуть супер-элементы в исходные наименования ПО"""
+        if self.software_members is None:
+            return set(software)
+        return {member for sw in software for member in self.software_members[sw]}
+
+    def compress_software(self, software: Iterable[str]) -> Set[str]:
+        """
+        Перевести набор исходного ПО в супер-элементы
+        (супер-элемент входит в результат, только если в наборе есть весь его класс)
+        """
+        if self.software_members is None:
+            return set(software)
+        software = set(software)
+        return {
+            sw for sw, members in self.software_members.items()
+            if software.issuperset(members)
+        }
+
+    @property
+    def arm_degrees(self) -> np.ndarray:
+        """Количество ПО на каждом АРМ (по номерам АРМ)"""
+        return np.diff(self.arm_indptr)
+
+    @property
+    def software_degrees(self) -> np.ndarray:
+        """Количество АРМ с каждым ПО (по номерам ПО)"""
+        return np.diff(self.software_indptr)
+
+    @property
+    def arm_of_entry(self) -> np.ndarray:
+        """Номер АРМ для каждого элемента CSR индекса"""
+        return np.repeat(np.arange(len(self.arm_names)), self.arm_degrees)
+
+    @property
+    def software_of_entry(self) -> np.ndarray:
+        """Номер ПО для каждого элемента CSC индекса"""
+        return np.repeat(np.arange(len(self.software_names)), self.software_degrees)
+
+    def arm_software_ids(self, arm_id: int) -> np.ndarray:
+        """Номера ПО, установленного на АРМ с номером arm_id"""
+        return self.arm_indices[self.arm_indptr[arm_id]:self.arm_indptr[arm_id + 1]]
+
+    def software_arm_ids(self, software_id: int) -> np.ndarray:
+        """Номера АРМ, на которых установлено ПО с номером software_id"""
+        return self.software_indices[self.software_indptr[software_id]:self.software_indptr[software_id + 1]]
+
+    def encode_software(self, software: Iterable[str]) -> np.ndarray:
+        """Номера ПО по именам (неизвестные имена пропускаются)"""
+        index = self.software_index
+        return np.array([index[sw] for sw in software if sw in index], dtype=np.int64)
+
+    def encode_arms(self, arms: Iterable[str]) -> np.ndarray:
+        """Номера АРМ по именам (неизвестные имена пропускаются)"""
+        index = self.arm_index
+        return np.array([index[arm] for arm in arms if arm in index], dtype=np.int64)
+
+    def software_mask(self, software: Iterable[str]) -> np.ndarray:
+        """Булева маска по номерам ПО для заданного множества имён"""
+        mask = np.zeros(len(self.software_names), dtype=bool)
+        mask[self.encode_software(software)] = True
+        return mask
+
+    def arm_mask(self, arms: Iterable[str]) -> np.ndarray:
+        """Булева маска по номерам АРМ для заданного множества имён"""
+        mask = np.zeros(len(self.arm_names), dtype=bool)
+        mask[self.encode_arms(arms)] = True
+        return mask
+
+    def decode_software(self, software_ids: Iterable[int]) -> Set[str]:
+        """Имена ПО по номерам"""
+        names = self.software_names
+        return {names[s] for s in software_ids}
+
+    def decode_arms(self, arm_ids: Iterable[int]) -> Set[str]:
+        """Имена АРМ по номерам"""
+        names = self.arm_names
+        return {names[a] for a in arm_ids}
 
     def get_software_popularity(self) -> Dict[str, int]:
         """
@@ -112,10 +1177,7 @@ class DataProcessor:
         Returns:
             Словарь {ПО: количество АРМ}
         """
-        return {
-            software: len(arms)
-            for software, arms in self.software_to_arms.items()
-        }
+        return dict(zip(self.software_names.tolist(), self.software_degrees.tolist()))
 
     def get_arm_software_count(self) -> Dict[str, int]:
         """
@@ -124,10 +1186,7 @@ class DataProcessor:
         Returns:
             Словарь {АРМ: количество ПО}
         """
-        return {
-            arm: len(software_set)
-            for arm, software_set in self.arm_software_map.items()
-        }
+        return dict(zip(self.arm_names.tolist(), self.arm_degrees.tolist()))
 
     def get_set_statistics(self) -> Dict[str, any]:
         """
@@ -136,11 +1195,13 @@ class DataProcessor:
         Returns:
             Словарь со статистикой
         """
-        set_sizes = [len(s) for s in self.set_to_arms_map.keys()]
-        set_arm_counts = [len(arms) for arms in self.set_to_arms_map.values()]
+        # Размер и количество АРМ для каждого набора считаем по номерам наборов
+        first_arm = np.unique(self.arm_profile_ids, return_index=True)[1]
+        set_sizes = self.arm_degrees[first_arm].tolist()
+        set_arm_counts = np.bincount(self.arm_profile_ids, minlength=self.profile_count).tolist()
 
         return {
-            'unique_sets': len(self.set_to_arms_map),
+            'unique_sets': self.profile_count,
             'min_set_size': min(set_sizes) if set_sizes else 0,
             'max_set_size': max(set_sizes) if set_sizes else 0,
             'avg_set_size': sum(set_sizes) / len(set_sizes) if set_sizes else 0,
@@ -173,8 +1234,10 @@ class DataProcessor:
         Returns:
             True если все ПО на АРМ протестировано
         """
-        arm_software = self.arm_software_map.get(arm, set())
-        return arm_software.issubset(tested_software)
+        arm_id = self.arm_index.get(arm)
+        if arm_id is None:
+            return True
+        return self.coverage.is_arm_covered(arm_id, self.software_mask(tested_software))
 
     def get_covered_arms(self, tested_software: Set[str]) -> Set[str]:
         """
@@ -186,8 +1249,4 @@ class DataProcessor:
         Returns:
             Множество идентификаторов покрытых АРМ
         """
-        covered = set()
-        for arm, software_set in self.arm_software_map.items():
-            if software_set.issubset(tested_software):
-                covered.add(arm)
-        return covered
+        return self.decode_arms(self.coverage.covered_arm_ids(tested_software))
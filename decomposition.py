@@ -0,0 +1,293 @@
+"""
+Модуль декомпозиции задачи на компоненты связности
+Двудольный граф АРМ - ПО часто распадается на независимые части (подразделения
+со своим специализированным ПО). Каждая компонента решается отдельно, в пуле
+процессов, а лимит ПО или целевое покрытие распределяется между компонентами
+по кривым "количество ПО -> покрытые АРМ"
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from data_processor import DataProcessor
+from coverage import CoverageState
+from ILP import ILPSoftwareSelector
+
+
+def connected_components(
+    processor: DataProcessor,
+    already_tested: Iterable[str] = (),
+    arms: Optional[Iterable[str]] = None
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Компоненты связности остаточного графа АРМ - ПО
+
+    Уже протестированное ПО и АРМ вне `arms` в граф не входят; АРМ без
+    непротестированного ПО не образуют компонент.
+
+    Args:
+        processor: DataProcessor с построенным индексом
+        already_tested: Уже протестированное ПО
+        arms: Учитываемые АРМ (None = все АРМ)
+
+    Returns:
+        Список пар (номера АРМ, номера ПО) по убыванию количества АРМ
+    """
+    n_arms = len(processor.arm_names)
+    n_software = len(processor.software_names)
+    active = np.ones(n_arms, dtype=bool) if arms is None else processor.arm_mask(arms)
+    allowed = ~processor.software_mask(already_tested)
+
+    keep = active[processor.arm_of_entry] & allowed[processor.arm_indices]
+    entry_arm = processor.arm_of_entry[keep]
+    entry_software = processor.arm_indices[keep].astype(np.int64)
+
+    # Распространение меток: метка АРМ - наименьший номер АРМ в компоненте
+    arm_label = np.arange(n_arms)
+    while True:
+        software_label = np.full(n_software, n_arms, dtype=np.int64)
+        np.minimum.at(software_label, entry_software, arm_label[entry_arm])
+        new_label = arm_label.copy()
+        np.minimum.at(new_label, entry_arm, software_label[entry_software])
+        # Перескок по указателям сокращает число итераций на длинных цепочках
+        new_label = new_label[new_label]
+        if np.array_equal(new_label, arm_label):
+            break
+        arm_label = new_label
+
+    arm_in_graph = np.zeros(n_arms, dtype=bool)
+    arm_in_graph[entry_arm] = True
+    software_in_graph = np.zeros(n_software, dtype=bool)
+    software_in_graph[entry_software] = True
+
+    arm_ids = np.flatnonzero(arm_in_graph)
+    software_ids = np.flatnonzero(software_in_graph)
+    labels, arm_component = np.unique(arm_label[arm_ids], return_inverse=True)
+    software_component = np.searchsorted(labels, software_label[software_ids])
+
+    components = [
+        (arm_ids[arm_component == c], software_ids[software_component == c])
+        for c in range(len(labels))
+    ]
+    components.sort(key=lambda component: -len(component[0]))
+    return components
+
+
+def coverage_curve(processor: DataProcessor, order: List[int]) -> np.ndarray:
+    """
+    Кривая покрытия: сколько АРМ покрыто после выбора первых k ПО из order
+
+    Returns:
+        Массив длины len(order) + 1, начинающийся с покрытия без выбора
+    """
+    state = CoverageState(processor)
+    curve = [state.covered_count]
+    for software_id in order:
+        state.add_software(software_id)
+        curve.append(state.covered_count)
+    return np.array(curve, dtype=np.int64)
+
+
+def profile_order(
+    processor: DataProcessor,
+    limit: int,
+    target: Optional[int] = None,
+    already_tested: Iterable[str] = (),
+    arms: Optional[Iterable[str]] = None
+) -> List[int]:
+    """
+    Порядок выбора ПО целыми наборами: на каждом шаге добавляется остаточный
+    набор ПО, покрывающий больше всего АРМ на единицу ПО. Даёт лучшую кривую
+    при малых лимитах, где выбор по одному ПО ещё ничего не покрывает
+
+    Args:
+        processor: DataProcessor компоненты
+        limit: Максимальное количество ПО
+        target: Остановиться, когда покрыто столько АРМ (None = не останавливаться)
+        already_tested: Уже протестированное ПО
+        arms: Учитываемые АРМ (None = все АРМ)
+
+    Returns:
+        Номера ПО в порядке выбора (не длиннее limit)
+    """
+    state = CoverageState(processor, already_tested, arms)
+    order: List[int] = []
+
+    # Остаточный набор каждого непокрытого АРМ и количество АРМ на набор;
+    # после выбора ПО пересчитываются только АРМ с этим ПО
+    arm_keys: Dict[int, tuple] = {}
+    counts: Dict[tuple, int] = {}
+
+    def update(arm_ids) -> None:
+        for arm_id in arm_ids:
+            old = arm_keys.pop(arm_id, None)
+            if old is not None:
+                counts[old] -= 1
+                if not counts[old]:
+                    del counts[old]
+            if state.missing[arm_id] > 0:
+                key = tuple(state.missing_software_ids(arm_id).tolist())
+                arm_keys[arm_id] = key
+                counts[key] = counts.get(key, 0) + 1
+
+    update(np.flatnonzero(state.active & (state.missing > 0)).tolist())
+    while len(order) < limit and (target is None or state.covered_count < target):
+        left = limit - len(order)
+        candidates = [key for key in counts if len(key) <= left]
+        if not candidates:
+            break
+        best = max(candidates, key=lambda key: (counts[key] / len(key), -len(key)))
+        for software_id in best:
+            state.add_software(software_id)
+            order.append(software_id)
+            arm_ids = processor.software_arm_ids(software_id)
+            update(arm_ids[state.active[arm_ids]].tolist())
+    return order
+
+
+def envelope_curve(processor: DataProcessor, orders: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Верхняя огибающая кривых покрытия нескольких порядков выбора ПО
+
+    Returns:
+        Кривая покрытия и номер порядка, дающего максимум при каждом k
+        (стартовое решение для k ПО - первые k элементов этого порядка)
+    """
+    length = max(len(order) for order in orders) + 1
+    curves = []
+    for order in orders:
+        curve = coverage_curve(processor, order)
+        # Короткий порядок: дальше покрытие не растёт, лишний лимит не используется
+        curves.append(np.concatenate([curve, np.full(length - len(curve), curve[-1])]))
+    stacked = np.vstack(curves)
+    return stacked.max(axis=0), stacked.argmax(axis=0)
+
+
+def allocate_budget(curves: List[np.ndarray], budget: int) -> List[int]:
+    """
+    Распределить лимит ПО между компонентами (задача о рюкзаке с выбором)
+
+    Args:
+        curves: Кривые покрытия компонент (coverage_curve)
+        budget: Общий лимит ПО
+
+    Returns:
+        Количество ПО для каждой компоненты, максимизирующее суммарное покрытие
+    """
+    budget = max(int(budget), 0)
+    best = np.zeros(budget + 1)
+    choices = []
+    for curve in curves:
+        new_best = best.copy()
+        choice = np.zeros(budget + 1, dtype=np.int64)
+        for k in _useful_steps(curve, budget):
+            candidate = np.full(budget + 1, -np.inf)
+            candidate[k:] = best[:budget + 1 - k] + curve[k]
+            better = candidate > new_best
+            new_best[better] = candidate[better]
+            choice[better] = k
+        choices.append(choice)
+        best = new_best
+
+    # Восстановление распределения с конца
+    allocation = [0] * len(curves)
+    remaining = budget
+    for c in range(len(curves) - 1, -1, -1):
+        allocation[c] = int(choices[c][remaining])
+        remaining -= allocation[c]
+    return allocation
+
+
+def allocate_target(curves: List[np.ndarray], target: int) -> Optional[List[int]]:
+    """
+    Распределить целевое покрытие между компонентами при минимуме ПО
+
+    Args:
+        curves: Кривые покрытия компонент (coverage_curve)
+        target: Требуемое количество покрытых АРМ
+
+    Returns:
+        Количество ПО для каждой компоненты или None, если цель недостижима
+    """
+    target = max(int(target), 0)
+    covered = np.arange(target + 1)
+    # cost[t] - минимум ПО для покрытия не менее t АРМ
+    cost = np.full(target + 1, np.inf)
+    cost[0] = 0
+    choices = []
+    for curve in curves:
+        new_cost = cost.copy()
+        choice = np.zeros(target + 1, dtype=np.int64)
+        for k in _useful_steps(curve, len(curve) - 1):
+            candidate = cost[np.maximum(covered - curve[k], 0)] + k
+            better = candidate < new_cost
+            new_cost[better] = candidate[better]
+            choice[better] = k
+        choices.append(choice)
+        cost = new_cost
+
+    if not np.isfinite(cost[target]):
+        return None
+
+    allocation = [0] * len(curves)
+    remaining = target
+    for c in range(len(curves) - 1, -1, -1):
+        allocation[c] = int(choices[c][remaining])
+        remaining = max(remaining - int(curves[c][allocation[c]]), 0)
+    return allocation
+
+
+def _useful_steps(curve: np.ndarray, max_steps: int) -> List[int]:
+    """Количества ПО, на которых кривая покрытия растёт (остальные не выгодны)"""
+    steps = np.flatnonzero(np.diff(curve[:max_steps + 1]) > 0) + 1
+    return steps.tolist()
+
+
+def solve_component(task: Tuple) -> Tuple[Set[str], Set[str], Dict[str, int]]:
+    """
+    Решить ILP на одной компоненте (выполняется в процессе пула)
+
+    Args:
+        task: (процессор компоненты, 'max' или 'min', лимит ПО или целевое покрытие,
+               стартовое решение, лимит времени, параметры ILPSoftwareSelector)
+
+    Returns:
+        Выбранное ПО, покрытые АРМ и отчёт о сокращении модели
+    """
+    processor, problem, amount, warm_start, time_limit, solver_options = task
+    solver = ILPSoftwareSelector(processor, **solver_options)
+    if problem == 'max':
+        software, arms = solver.find_best_software_set_ilp(
+            limit=amount,
+            already_tested=set(),
+            remaining_arms=set(processor.arm_names.tolist()),
+            time_limit=time_limit,
+            warm_start_solution=warm_start
+        )
+    else:
+        software, arms = solver.find_minimum_software_for_coverage_ilp(
+            target_arms_count=amount,
+            already_tested=set(),
+            warm_start_solution=warm_start,
+            time_limit=time_limit
+        )
+    return software, arms, solver.last_kernel_report
+
+
+def solve_components(tasks: List[Tuple], n_jobs: Optional[int] = None) -> List[Tuple]:
+    """
+    Решить компоненты в пуле процессов (n_jobs=1 - последовательно)
+
+    Args:
+        tasks: Задачи для solve_component
+        n_jobs: Количество процессов (None = количество ядер)
+
+    Returns:
+        Результаты solve_component в порядке задач
+    """
+    workers = min(len(tasks), n_jobs or os.cpu_count() or 1)
+    if workers <= 1:
+        return [solve_component(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(solve_component, tasks))
@@ -50,19 +50,19 @@ class Exporter:
         # ОПТИМИЗАЦИЯ: xlsxwriter быстрее и эффективнее по памяти для больших файлов
         with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {'strings_to_numbers': False}}) as writer:
             # Лист 1: "Data" - исходные данные + столбцы "Волна миграции" и опционально статус тестирования
-            # ОПТИМИЗАЦИЯ: Не копируем весь DataFrame, работаем с view где возможно
+            # ОПТИМИЗАЦИЯ: исходные строки обрабатываются и записываются по частям
+            # (для потокового источника они перечитываются из файла и не хранятся целиком)
             arm_wave_map = results.get('arm_wave_map', {})
             
-            # Создаем Series с волнами напрямую (без apply для скорости)
-            wave_series = self.processor.original_df[self.processor.arm_column].map(arm_wave_map)
-            
             # Подготавливаем переименования
             rename_map = {
                 self.processor.software_column: 'software_name',
                 self.processor.arm_column: 'arm_id'
             }
             
-            # Присоединяем данные о протестированном ПО через маппинг
+            # Присоединяемые данные о протестированном ПО готовятся один раз для всех частей:
+            # (DataFrame, столбец исходных данных, столбец DataFrame, удаляемые после соединения столбцы)
+            join = None
             if tested_software_df is not None and not tested_software_df.empty and tested_software_column and software_family_column:
                 try:
                     # Загружаем маппинг
@@ -70,7 +70,7 @@ class Exporter:
                     mapping_columns = list(mapping_df.columns)
                     
                     # ОПТИМИЗАЦИЯ: Используем merge вместо циклов и map
-                    # 1. Связываем tested_software с mapping
+                    # Связываем tested_software с mapping
                     tested_with_mapping = tested_software_df.merge(
                         mapping_df,
                         left_on=tested_software_column,
@@ -78,52 +78,34 @@ class Exporter:
                         how='inner'
                     ).drop(columns=['eatool_name'])
                     
-                    # 2. Создаем базовый DataFrame
-                    df_data = self.processor.original_df.copy()  # Нужна копия для добавления колонок
-                    df_data['wave'] = wave_series  # Добавляем wave ДО переименования
-                    
-                    # 3. Присоединяем tested данные через ascupo_name (используя оригинальное имя колонки)
-                    df_data = df_data.merge(
-                        tested_with_mapping,
-                        left_on=software_family_column,  # Используем оригинальное имя колонки
-                        right_on='ascupo_name',
-                        how='left'
-                    )
-                    
-                    # 4. Удаляем служебные колонки из mapping
-                    df_data = df_data.drop(columns=[col for col in mapping_columns if col in df_data.columns], errors='ignore')
-                    
-                    # 5. Переименовываем ключевые колонки в конце
-                    df_data = df_data.rename(columns=rename_map)
+                    # Присоединяем tested данные через ascupo_name (используя оригинальное имя колонки)
+                    # и удаляем служебные колонки из mapping
+                    join = (tested_with_mapping, software_family_column, 'ascupo_name', mapping_columns)
                     
                 except FileNotFoundError:
-                    # Если файл маппинга не найден, делаем прямое соединение
-                    df_data = self.processor.original_df.copy()
-                    df_data['wave'] = wave_series  # Добавляем wave ДО переименования
-                    
+                    # Если файл маппинга не найден, делаем прямое соединение по оригинальному имени колонки ПО
+                    drop_columns = [tested_software_column] if tested_software_column != self.processor.software_column else []
+                    join = (tested_software_df, self.processor.software_column, tested_software_column, drop_columns)
+            
+            start_row = 0
+            for chunk in self.processor.iter_source_chunks():
+                # Создаем Series с волнами напрямую (без apply для скорости) и добавляем wave ДО переименования
+                df_data = chunk.assign(wave=chunk[self.processor.arm_column].map(arm_wave_map))
+                
+                if join is not None:
+                    right_df, left_on, right_on, drop_columns = join
                     # ОПТИМИЗАЦИЯ: merge быстрее чем map с lambda
-                    # Используем оригинальное имя колонки ПО для merge
-                    df_data = df_data.merge(
-                        tested_software_df,
-                        left_on=self.processor.software_column,  # Используем оригинальное имя
-                        right_on=tested_software_column,
-                        how='left'
-                    )
-                    
-                    if tested_software_column != self.processor.software_column:
-                        df_data = df_data.drop(columns=[tested_software_column], errors='ignore')
-                    
-                    # Переименовываем ключевые колонки в конце
-                    df_data = df_data.rename(columns=rename_map)
-            else:
-                # Нет tested_software - просто переименовываем и добавляем wave
-                df_data = self.processor.original_df.copy()
-                df_data['wave'] = wave_series  # Добавляем wave ДО переименования
+                    df_data = df_data.merge(right_df, left_on=left_on, right_on=right_on, how='left')
+                    df_data = df_data.drop(columns=[col for col in drop_columns if col in df_data.columns])
+                
+                # Переименовываем ключевые колонки в конце
                 df_data = df_data.rename(columns=rename_map)
-            
-            # ОПТИМИЗАЦИЯ: Для очень больших файлов записываем по частям
-            # xlsxwriter автоматически записывает напрямую в файл без загрузки всего в память
-            df_data.to_excel(writer, sheet_name='Data', index=False)
+                
+                # xlsxwriter записывает части в один лист друг за другом, заголовок - только у первой
+                df_data.to_excel(
+                    writer, sheet_name='Data', index=False, startrow=start_row, header=start_row == 0
+                )
+                start_row += len(df_data) + (1 if start_row == 0 else 0)
 
             # Лист 2: "Статистика по волнам"
             wave_stats = []
@@ -172,7 +154,7 @@ class Exporter:
                 'Значение': [
                     self.processor.total_arms,
                     self.processor.total_software,
-                    len(self.processor.set_to_arms_map),
+                    self.processor.profile_count,
                     results['total_migrated_arms'],
                     results['total_tested_software'],
                     f"{(results['total_migrated_arms'] / self.processor.total_arms * 100):.1f}%",
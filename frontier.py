@@ -0,0 +1,112 @@
+"""
+Модуль кривой "лимит ПО -> покрытые АРМ"
+Кривая строится за один проход по порядкам выбора ПО (жадному и по целым
+наборам): решение для лимита K - самый длинный префикс порядка, помещающийся
+в K. По кривой подбираются лимиты волн без повторных расчётов, а отдельные
+точки можно уточнить точным ILP
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Set
+from data_processor import DataProcessor
+from coverage import CoverageState
+
+
+class CoverageFrontier:
+    """
+    Кривая покрытия: для каждого лимита ПО - количество покрытых АРМ и набор
+    ПО, на котором оно достигается (префикс одного из порядков выбора)
+    """
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        orders: List[List[int]],
+        already_tested: Set[str],
+        max_software: int
+    ):
+        """
+        Построить кривую по порядкам выбора ПО
+
+        Args:
+            processor: DataProcessor, в номерах ПО которого заданы порядки
+                       (для супер-элементов - сжатый)
+            orders: Порядки выбора ПО (номера ПО)
+            already_tested: Уже протестированное ПО, исходные наименования
+                            (его АРМ покрыты при любом лимите)
+            max_software: Наибольший лимит ПО на кривой
+        """
+        self.processor = processor
+        self.orders = orders
+        self.already_tested = set(already_tested)
+        costs = processor.software_weights.astype(np.int64)
+        budgets = np.arange(max_software + 1)
+
+        best = np.full(max_software + 1, -1, dtype=np.int64)
+        self.source = np.zeros(max_software + 1, dtype=np.int64)
+        self.prefix = np.zeros(max_software + 1, dtype=np.int64)
+        for index, order in enumerate(orders):
+            state = CoverageState(processor, already_tested)
+            covered = [state.covered_count]
+            for software_id in order:
+                state.add_software(software_id)
+                covered.append(state.covered_count)
+            spent = np.concatenate([[0], np.cumsum(costs[order])])
+            # Самый длинный префикс, стоимость которого не больше лимита
+            prefix = np.searchsorted(spent, budgets, side='right') - 1
+            arms = np.array(covered, dtype=np.int64)[prefix]
+            better = arms > best
+            best[better] = arms[better]
+            self.source[better] = index
+            self.prefix[better] = prefix[better]
+
+        self.budgets = budgets
+        self.arms = np.maximum(best, 0)
+        # Уточнённые точным ILP точки: лимит -> {'arms', 'software', 'status'}
+        self.refined: Dict[int, Dict] = {}
+
+    def selection(self, limit: int) -> Set[str]:
+        """Набор ПО (исходные наименования), дающий покрытие кривой при лимите limit"""
+        limit = min(max(int(limit), 0), len(self.budgets) - 1)
+        if limit in self.refined:
+            return set(self.refined[limit]['software'])
+        order = self.orders[self.source[limit]][:self.prefix[limit]]
+        return self.processor.expand_software(self.processor.decode_software(order))
+
+    def arms_at(self, limit: int) -> int:
+        """Покрытые АРМ при лимите limit с учётом уточнённых точек (они верны и для больших лимитов)"""
+        limit = min(max(int(limit), 0), len(self.budgets) - 1)
+        refined = [point['arms'] for budget, point in self.refined.items() if budget <= limit]
+        return max([int(self.arms[limit])] + refined)
+
+    def limit_for_coverage(self, target: int) -> Optional[int]:
+        """
+        Наименьший лимит ПО, при котором кривая покрывает не меньше target АРМ
+
+        Returns:
+            Лимит или None, если цель выше кривой
+        """
+        reached = np.flatnonzero(self.arms >= target)
+        limits = [int(reached[0])] if len(reached) else []
+        limits += [budget for budget, point in self.refined.items() if point['arms'] >= target]
+        return min(limits) if limits else None
+
+    def breakpoints(self, count: int) -> List[int]:
+        """
+        Лимиты, на которых кривая впервые достигает равных долей максимального
+        покрытия (точки для уточнения ILP)
+        """
+        top = int(self.arms[-1])
+        if top == 0 or count <= 0:
+            return []
+        targets = np.linspace(top / count, top, count)
+        return sorted({self.limit_for_coverage(int(np.ceil(target))) for target in targets})
+
+    def to_frame(self) -> pd.DataFrame:
+        """Кривая таблицей: лимит ПО, покрытые АРМ эвристикой и после уточнения ILP"""
+        frame = pd.DataFrame({'Лимит ПО': self.budgets, 'АРМ (эвристика)': self.arms})
+        frame['АРМ (ILP)'] = pd.Series(
+            {budget: point['arms'] for budget, point in self.refined.items()}, dtype='float64'
+        ).reindex(self.budgets).to_numpy()
+        return frame
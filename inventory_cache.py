@@ -0,0 +1,167 @@
+"""
+Модуль кэша загруженных выгрузок
+Файл (Excel или CSV) читается один раз и сохраняется в Parquet под хэшем
+содержимого; повторные загрузки того же файла (в новой сессии или после
+очистки кэша сессии) читают Parquet через отображение в память. Размер
+каталога ограничен, вытесняются давно не использованные файлы
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from xlsx_reader import XlsxReader
+
+
+def read_inventory(data: bytes, name: str, sheet_name: Optional[str] = None, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Прочитать выгрузку из байтов файла
+
+    Args:
+        data: Содержимое файла
+        name: Имя файла (CSV определяется по расширению)
+        sheet_name: Лист Excel (если его нет - первый лист)
+        nrows: Количество строк (0 = только заголовки)
+    """
+    if name.lower().endswith('.csv'):
+        return pd.read_csv(io.BytesIO(data), encoding='utf-8-sig', nrows=nrows)
+    if name.lower().endswith(('.xlsx', '.xlsm')):
+        # Потоковый разбор листа: заголовки - без разбора остальных строк
+        with XlsxReader(data, sheet_name) as reader:
+            if nrows == 0:
+                return pd.DataFrame(columns=reader.header())
+            df = reader.read()
+            return df if nrows is None else df.head(nrows)
+    if sheet_name is not None:
+        try:
+            return pd.read_excel(io.BytesIO(data), sheet_name=sheet_name, nrows=nrows)
+        except ValueError:
+            # Листа с таким именем нет
+            pass
+    return pd.read_excel(io.BytesIO(data), nrows=nrows)
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Подготовить DataFrame к записи в Parquet: имена столбцов - строки, столбцы
+    со значениями разных типов (числа и текст в одном столбце Excel) - текст
+    """
+    df = df.copy(deep=False)
+    df.columns = [str(column) for column in df.columns]
+    for column in df.columns[df.dtypes.eq(object)]:
+        values = df[column]
+        if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+class InventoryCache:
+    """
+    Кэш выгрузок в Parquet по хэшу содержимого файла (общий для всех сессий)
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Args:
+            directory: Каталог кэша (None = подкаталог временного каталога системы)
+            max_bytes: Наибольший суммарный размер файлов кэша
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'migration_inventory_cache')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def content_hash(data: bytes, sheet_name: Optional[str] = None) -> str:
+        """Ключ выгрузки: хэш содержимого файла и имени листа"""
+        digest = hashlib.sha256(data)
+        digest.update(f"\x00{sheet_name or ''}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def read_header(self, data: bytes, name: str, sheet_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Заголовки выгрузки (пустой DataFrame со столбцами файла): из схемы
+        Parquet, если файл уже в кэше, иначе из самого файла
+        """
+        path = self._path(self.content_hash(data, sheet_name))
+        try:
+            schema = pq.read_schema(path)
+            return pd.DataFrame(columns=[field for field in schema.names if field != '__index_level_0__'])
+        except (OSError, pa.ArrowInvalid):
+            return read_inventory(data, name, sheet_name, nrows=0)
+
+    def load(
+        self,
+        data: bytes,
+        name: str,
+        sheet_name: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Выгрузка целиком: из Parquet, если файл уже встречался, иначе чтение
+        файла и сохранение в Parquet
+
+        Args:
+            data: Содержимое файла
+            name: Имя файла
+            sheet_name: Лист Excel (если его нет - первый лист)
+            columns: Читать только эти столбцы (None = все)
+        """
+        path = self._path(self.content_hash(data, sheet_name))
+        try:
+            table = pq.read_table(path, columns=columns, memory_map=True)
+            os.utime(path)
+            return table.to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            pass
+
+        df = _arrow_safe(read_inventory(data, name, sheet_name))
+        self._store(path, df)
+        return df[columns] if columns is not None else df
+
+    def _store(self, path: str, df: pd.DataFrame) -> None:
+        """Записать Parquet атомарно и ограничить размер каталога"""
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), temporary)
+            os.replace(temporary, path)
+        except (OSError, pa.ArrowException) as error:
+            print(f"Inventory cache: cannot write {path}: {error}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удалить давно не использованные файлы сверх max_bytes"""
+        with self._lock:
+            files = []
+            for file_name in os.listdir(self.directory):
+                if not file_name.endswith('.parquet'):
+                    continue
+                path = os.path.join(self.directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            # Последний записанный файл не удаляется, даже если он больше лимита
+            for _, size, path in files[:-1]:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
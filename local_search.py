@@ -0,0 +1,261 @@
+"""
+Модуль локального поиска для улучшения выбора ПО волны
+Обмены 1-1 и 2-2 выбранного ПО на невыбранное оцениваются по количеству
+непротестированного ПО на каждом АРМ (CoverageState) и счётчикам АРМ, которым
+не хватает одного ПО или пары ПО (SwapScores): удаление и добавление ПО
+затрагивают только АРМ с этим ПО
+"""
+
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from data_processor import DataProcessor
+from coverage import CoverageState
+
+
+def closing_scores(state: CoverageState) -> np.ndarray:
+    """
+    Для каждого ПО - количество учитываемых АРМ, которым не хватает только его
+    (сколько АРМ станут покрытыми при добавлении ПО)
+    """
+    processor = state.processor
+    near_miss = state.active & (state.missing == 1)
+    entries = near_miss[processor.arm_of_entry] & ~state.selected[processor.arm_indices]
+    return np.bincount(processor.arm_indices[entries], minlength=len(processor.software_names))
+
+
+def _missing_software(state: CoverageState, arm_ids: np.ndarray, count: int) -> np.ndarray:
+    """
+    Непротестированное ПО АРМ, у каждого из которых его ровно count
+
+    Returns:
+        Матрица (АРМ, count) номеров ПО по возрастанию в строке
+    """
+    processor = state.processor
+    starts = processor.arm_indptr[arm_ids]
+    lengths = processor.arm_indptr[arm_ids + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    software_ids = processor.arm_indices[offsets + np.arange(int(lengths.sum()))].astype(np.int64)
+    return software_ids[~state.selected[software_ids]].reshape(len(arm_ids), count)
+
+
+class SwapScores:
+    """
+    Счётчики для оценки обменов: для каждого ПО - число АРМ, которым не хватает
+    только его, и для каждой пары ПО - число АРМ, которым не хватает ровно этой пары.
+    Счётчики обновляются по событиям добавления и удаления ПО в CoverageState
+    (затрагиваются только АРМ с этим ПО), а не пересчитываются по всему индексу
+    """
+
+    def __init__(self, state: CoverageState):
+        """
+        Args:
+            state: Состояние покрытия; дальше изменяется только через add и remove
+        """
+        self.state = state
+        self.n_software = len(state.processor.software_names)
+        self.closing = closing_scores(state).astype(np.int64)
+        # Ключ пары (a < b) - a * n_software + b
+        self.pairs: Dict[int, int] = {}
+        two_missing = np.flatnonzero(state.active & (state.missing == 2))
+        self._count_pairs(_missing_software(state, two_missing, 2), 1)
+
+    def _count_pairs(self, pairs: np.ndarray, sign: int) -> None:
+        """Прибавить (sign = 1) или вычесть (sign = -1) пары из строк матрицы (a < b)"""
+        if not len(pairs):
+            return
+        keys, counts = np.unique(pairs[:, 0] * self.n_software + pairs[:, 1], return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            value = self.pairs.get(key, 0) + sign * count
+            if value:
+                self.pairs[key] = value
+            else:
+                self.pairs.pop(key, None)
+
+    def _pair_with(self, software_id: int, others: np.ndarray) -> np.ndarray:
+        """Пары (software_id, other) в порядке возрастания номеров"""
+        return np.column_stack([np.minimum(others, software_id), np.maximum(others, software_id)])
+
+    def add(self, software_id: int) -> None:
+        """Добавить ПО в состояние и обновить счётчики"""
+        state = self.state
+        if state.selected[software_id]:
+            return
+        state.add_software(software_id)
+        arm_ids = state.processor.software_arm_ids(software_id)
+        arm_ids = arm_ids[state.active[arm_ids]]
+        left = state.missing[arm_ids]
+
+        self.closing[software_id] -= len(state.last_newly_covered)
+        # Было два недостающих ПО: осталось одно, пара с добавленным распалась
+        others = _missing_software(state, state.last_new_near_miss, 1)[:, 0]
+        np.add.at(self.closing, others, 1)
+        self._count_pairs(self._pair_with(software_id, others), -1)
+        # Было три недостающих ПО: оставшиеся два образуют пару
+        self._count_pairs(_missing_software(state, arm_ids[left == 2], 2), 1)
+
+    def remove(self, software_id: int) -> None:
+        """Убрать ПО из состояния и обновить счётчики"""
+        state = self.state
+        if not state.selected[software_id]:
+            return
+        state.remove_software(software_id)
+        arm_ids = state.processor.software_arm_ids(software_id)
+        arm_ids = arm_ids[state.active[arm_ids]]
+        left = state.missing[arm_ids]
+
+        self.closing[software_id] += len(state.last_new_near_miss)
+        # Стало два недостающих ПО: второе больше не закрывает АРМ в одиночку
+        missing = _missing_software(state, arm_ids[left == 2], 2)
+        others = np.where(missing[:, 0] == software_id, missing[:, 1], missing[:, 0])
+        np.subtract.at(self.closing, others, 1)
+        self._count_pairs(missing, 1)
+        # Стало три недостающих ПО: пара без удалённого ПО больше не закрывает АРМ
+        missing = _missing_software(state, arm_ids[left == 3], 3)
+        rest = missing[missing != software_id].reshape(len(missing), 2)
+        self._count_pairs(rest, -1)
+
+
+def _best_addition(scores: SwapScores, costs: np.ndarray, budget: int, excluded: List[int]) -> Tuple[int, List[int]]:
+    """
+    Лучшее добавление одного ПО в пределах остатка лимита
+
+    Returns:
+        Количество ставших покрытыми АРМ и добавляемое ПО
+    """
+    closing = scores.closing.copy()
+    closing[scores.state.selected | (costs > budget)] = -1
+    closing[excluded] = -1
+    software_id = int(np.argmax(closing))
+    if closing[software_id] <= 0:
+        return 0, []
+    return int(closing[software_id]), [software_id]
+
+
+def _best_pair(scores: SwapScores, costs: np.ndarray, budget: int, excluded: List[int]) -> Tuple[int, List[int]]:
+    """
+    Лучшее добавление двух ПО в пределах остатка лимита: учитываются АРМ,
+    которым не хватает одного из них, и АРМ, которым не хватает ровно этой пары
+
+    Returns:
+        Количество ставших покрытыми АРМ и добавляемое ПО
+    """
+    closing = scores.closing
+    available = ~scores.state.selected & (costs <= budget)
+    available[excluded] = False
+
+    # Пара из двух лучших независимых добавлений
+    best_gain, best_software = 0, []
+    ranked = np.flatnonzero(available & (closing > 0))
+    ranked = ranked[np.argsort(-closing[ranked], kind='stable')]
+    if len(ranked):
+        first = int(ranked[0])
+        best_gain, best_software = int(closing[first]), [first]
+        for second in ranked[1:].tolist():
+            if costs[first] + costs[second] <= budget:
+                best_gain, best_software = best_gain + int(closing[second]), [first, second]
+                break
+
+    # Пары, которые вместе закрывают АРМ с двумя недостающими ПО
+    if scores.pairs:
+        keys = np.fromiter(scores.pairs.keys(), dtype=np.int64, count=len(scores.pairs))
+        counts = np.fromiter(scores.pairs.values(), dtype=np.int64, count=len(scores.pairs))
+        first, second = keys // scores.n_software, keys % scores.n_software
+        gains = counts + closing[first] + closing[second]
+        valid = available[first] & available[second] & (costs[first] + costs[second] <= budget)
+        if valid.any():
+            best = int(np.argmax(np.where(valid, gains, -1)))
+            if gains[best] > best_gain:
+                best_gain, best_software = int(gains[best]), [int(first[best]), int(second[best])]
+    return best_gain, best_software
+
+
+def improve_selection(
+    processor: DataProcessor,
+    selected_ids: Iterable[int],
+    limit: int,
+    already_tested: Set[str],
+    remaining_arms: Optional[Set[str]],
+    time_budget: float,
+    seed: int = 0
+) -> Tuple[List[int], List[int], List[Dict]]:
+    """
+    Улучшить выбор ПО волны локальным поиском за заданное время.
+
+    Сначала перебираются обмены одного выбранного ПО на одно невыбранное, затем,
+    если они ничего не дают, - обмены пар. Принимается первое улучшение; поиск
+    заканчивается в локальном оптимуме или по истечении времени.
+
+    Args:
+        processor: DataProcessor (для супер-элементов - сжатый)
+        selected_ids: Номера выбранного ПО (например, жадное решение)
+        limit: Лимит ПО в волне (в единицах стоимости ПО)
+        already_tested: Уже протестированное ПО
+        remaining_arms: Учитываемые АРМ (None = все АРМ)
+        time_budget: Время поиска в секундах
+        seed: Начальное значение генератора порядка перебора
+
+    Returns:
+        Номера выбранного ПО, номера ставших покрытыми АРМ и история улучшений
+        (время, количество ставших покрытыми АРМ, ход)
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    rng = np.random.default_rng(seed)
+    costs = processor.software_weights.astype(np.int64)
+
+    state = CoverageState(processor, already_tested, remaining_arms)
+    initially_covered = state.covered_mask()
+    scores = SwapScores(state)
+    for software_id in selected_ids:
+        scores.add(int(software_id))
+    base = int(np.count_nonzero(initially_covered))
+    trace = [{'time': 0.0, 'arms': state.covered_count - base, 'move': 'start'}]
+
+    def spent() -> int:
+        return int(costs[list(state.added)].sum()) if state.added else 0
+
+    def try_swap(removed: List[int], find_addition) -> bool:
+        """Заменить removed лучшим добавлением, если покрытие растёт (иначе вернуть как было)"""
+        before = state.covered_count
+        for software_id in removed:
+            scores.remove(software_id)
+        gain, added = find_addition(scores, costs, limit - spent(), removed)
+        if state.covered_count + gain > before:
+            for software_id in added:
+                scores.add(software_id)
+            trace.append({
+                'time': time.perf_counter() - start,
+                'arms': state.covered_count - base,
+                'move': f"{len(removed)}-swap"
+            })
+            return True
+        for software_id in removed:
+            scores.add(software_id)
+        return False
+
+    while time.perf_counter() < deadline:
+        selected = sorted(state.added)
+        improved = False
+        for software_id in rng.permutation(selected).tolist():
+            if time.perf_counter() >= deadline:
+                break
+            if try_swap([software_id], _best_addition):
+                improved = True
+                break
+        if improved:
+            continue
+
+        pairs = [(a, b) for i, a in enumerate(selected) for b in selected[i + 1:]]
+        for index in rng.permutation(len(pairs)).tolist():
+            if time.perf_counter() >= deadline:
+                break
+            if try_swap(list(pairs[index]), _best_pair):
+                improved = True
+                break
+        if not improved:
+            # Локальный оптимум (или время вышло)
+            break
+
+    migrating_ids = np.flatnonzero(state.covered_mask() & ~initially_covered)
+    return sorted(state.added), migrating_ids.tolist(), trace
@@ -3,10 +3,22 @@
 Реализует алгоритмы максимального покрытия и set cover
 """
 
+import heapq
+import time
+import numpy as np
 from typing import Dict, Set, List, Tuple, Optional
-from collections import defaultdict
 from data_processor import DataProcessor
+from coverage import CoverageState
 from ILP import ILPSoftwareSelector
+from portfolio import PortfolioSelector
+from time_budget import WaveTimeBudget
+from local_search import improve_selection
+from bounds import lagrangian_bound
+from frontier import CoverageFrontier
+from result_cache import ResultCache
+from decomposition import (
+    connected_components, profile_order, envelope_curve, allocate_budget, allocate_target, solve_components
+)
 
 
 class MigrationOptimizer:
@@ -14,94 +26,279 @@ class MigrationOptimizer:
     Класс для оптимизации планирования волн миграции
     """
 
-    def __init__(self, processor: DataProcessor):
+    # Режимы планирования волн ILP: каждая волна отдельно, все волны одной моделью
+    # или скользящее окно из нескольких волн, в котором фиксируется только первая
+    PLANNING_MODES = ('sequential', 'joint', 'rolling')
+    # Способы верхней оценки покрытия: лагранжева релаксация или LP-релаксация ILP
+    BOUND_METHODS = ('lagrangian', 'lp')
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        ilp_backend: str = 'pulp',
+        ilp_formulation: str = 'standard',
+        cache: Optional[ResultCache] = None
+    ):
         """
         Инициализация оптимизатора
 
         Args:
             processor: Обработанные данные из DataProcessor
+            ilp_backend: Способ решения ILP ('pulp', 'highspy', 'cbc', см. ILPSoftwareSelector,
+                         или 'portfolio' - несколько решателей параллельно, см. PortfolioSelector)
+            ilp_formulation: Формулировка модели максимального покрытия ('standard' или 'lean')
+            cache: Кэш результатов calculate_waves и find_minimum_software_for_coverage
+                   (None = без кэша; один кэш можно разделять между оптимизаторами)
         """
         self.processor = processor
+        self.ilp_backend = ilp_backend
+        self.ilp_formulation = ilp_formulation
+        self.cache = cache
+
+    def coverage_state(
+        self,
+        already_tested: Set[str] = None,
+        remaining_arms: Optional[Set[str]] = None
+    ) -> CoverageState:
+        """
+        Создать инкрементальное состояние покрытия для жадных алгоритмов,
+        локального поиска и сценариев "что если" в интерфейсе
+
+        Args:
+            already_tested: Уже протестированное ПО
+            remaining_arms: Учитываемые АРМ (None = все АРМ)
+        """
+        return CoverageState(self.processor, already_tested or (), remaining_arms)
 
     def find_best_software_set(
         self,
         limit: int,
         already_tested: Set[str],
-        remaining_arms: Set[str]
+        remaining_arms: Set[str],
+        merge_equivalent: bool = False
     ) -> Tuple[Set[str], Set[str]]:
         """
         Найти оптимальный набор ПО для тестирования в волне (ФИНАЛЬНАЯ ОПТИМИЗАЦИЯ).
         Использует инкрементальный эвристический алгоритм максимального покрытия.
+
+        На каждом шаге выбирается ПО, которое "закрывает" больше всего АРМ
+        (АРМ, которым не хватает ровно этого ПО); при отсутствии таких ПО -
+        самое популярное среди оставшихся АРМ. При равенстве очков выбирается
+        ПО с большим именем.
+
+        Очки "закрытия" пересчитываются событийно: после выбора ПО обновляются
+        только АРМ, на которых оно установлено, а максимум ищется через
+        ленивую кучу (устаревшие записи отбрасываются при извлечении).
+
+        Args:
+            merge_equivalent: Выбирать взаимозаменяемое ПО (с одинаковым набором АРМ)
+                              только целиком, как один элемент стоимостью в размер класса
         """
-        wave_software = set()
-        migrating_arms = set()
-        
-        available_software = set(self.processor.software_to_arms.keys()) - already_tested
+        processor = self.processor
+        if merge_equivalent:
+            # Уже протестированное ПО в классы не входит и не считается недостающим
+            processor = processor.merge_equivalent_software(already_tested)
+            already_tested = set()
+        wave_ids, migrating_ids = self._greedy_wave(processor, limit, already_tested, remaining_arms)
+        return processor.expand_software(processor.decode_software(wave_ids)), processor.decode_arms(migrating_ids)
 
-        untested_needs: Dict[str, int] = {
-            arm: len(self.processor.arm_software_map.get(arm, set()) - already_tested)
-            for arm in remaining_arms
-        }
-        
-        # Предрассчитываем популярность для случая, когда нет "закрывающих" ПО
-        popularity = {
-            sw: len(self.processor.software_to_arms.get(sw, set()) & remaining_arms)
-            for sw in available_software
-        }
+    def improve_wave(
+        self,
+        wave_software: Set[str],
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Optional[Set[str]],
+        time_budget: float,
+        merge_equivalent: bool = False,
+        seed: int = 0
+    ) -> Tuple[Set[str], Set[str], List[Dict]]:
+        """
+        Улучшить набор ПО волны локальным поиском (обмены 1-1 и 2-2, см.
+        local_search.improve_selection) за заданное время
 
-        for _ in range(limit):
-            if not available_software:
-                break
+        Args:
+            wave_software: Исходный набор ПО (например, жадное решение)
+            limit: Лимит ПО в волне
+            already_tested: Уже протестированное ПО
+            remaining_arms: Учитываемые АРМ (None = все АРМ)
+            time_budget: Время поиска в секундах
+            merge_equivalent: Менять взаимозаменяемое ПО только целиком
+            seed: Начальное значение генератора порядка перебора
 
-            software_scores = defaultdict(int)
-            
-            # Строим карту {ПО: [АРМы, которые оно закроет]}
-            # Это надежнее, чем вычислять `last_software_needed` внутри цикла
-            last_sw_map = defaultdict(list)
-            for arm, needs in untested_needs.items():
-                if needs == 1:
-                    # Вычисляем единственное недостающее ПО
-                    # Используем next + iter для безопасного извлечения одного элемента
-                    try:
-                        last_sw = next(iter(self.processor.arm_software_map[arm] - already_tested - wave_software))
-                        if last_sw in available_software:
-                            last_sw_map[last_sw].append(arm)
-                    except StopIteration:
-                        # Это может произойти, если ПО уже было выбрано в wave_software
-                        # на предыдущей итерации этого же цикла. Безопасно пропускаем.
-                        pass
-            
-            # Считаем очки на основе построенной карты
-            if last_sw_map:
-                software_scores = {sw: len(arms) for sw, arms in last_sw_map.items()}
+        Returns:
+            ПО волны, мигрирующие АРМ и история улучшений
+        """
+        processor = self.processor
+        if merge_equivalent:
+            processor = processor.merge_equivalent_software(already_tested)
+            wave_software = processor.compress_software(wave_software)
+            already_tested = set()
+        wave_ids, migrating_ids, trace = improve_selection(
+            processor,
+            processor.encode_software(wave_software).tolist(),
+            limit,
+            already_tested,
+            remaining_arms,
+            time_budget,
+            seed
+        )
+        return processor.expand_software(processor.decode_software(wave_ids)), processor.decode_arms(migrating_ids), trace
 
+    def coverage_upper_bound(
+        self,
+        limit: int,
+        already_tested: Set[str] = None,
+        remaining_arms: Optional[Set[str]] = None,
+        method: str = 'lagrangian',
+        merge_equivalent: bool = False,
+        lower_bound: Optional[int] = None,
+        iterations: int = 300
+    ) -> float:
+        """
+        Верхняя оценка количества мигрирующих АРМ в волне с лимитом limit.
+        Разрыв между оценкой и эвристическим решением показывает, есть ли смысл
+        запускать точный ILP
+
+        Args:
+            limit: Лимит ПО в волне
+            already_tested: Уже протестированное ПО
+            remaining_arms: Учитываемые АРМ (None = все АРМ)
+            method: 'lagrangian' (субградиентный метод, без решателя) или
+                    'lp' (LP-релаксация модели ILP через highspy)
+            merge_equivalent: Считать оценку на супер-элементах (оценка остаётся
+                              верной и для выбора по одному ПО)
+            lower_bound: Известное решение для шага субградиента (None = жадное)
+            iterations: Количество итераций субградиентного метода
+
+        Returns:
+            Верхняя оценка количества мигрирующих АРМ
+        """
+        if method not in self.BOUND_METHODS:
+            raise ValueError(f"Unknown bound method: {method}")
+        already_tested = set(already_tested or ())
+        if method == 'lp':
+            solver = ILPSoftwareSelector(self.processor, backend='highspy', formulation=self.ilp_formulation)
+            arms = set(self.processor.arm_software_map.keys()) if remaining_arms is None else remaining_arms
+            return solver.lp_relaxation_bound(limit, already_tested, arms)
+
+        processor = self.processor
+        if merge_equivalent:
+            processor = processor.merge_equivalent_software(already_tested)
+            already_tested = set()
+        if lower_bound is None:
+            lower_bound = len(self._greedy_wave(processor, limit, already_tested, remaining_arms)[1])
+        return lagrangian_bound(processor, limit, already_tested, remaining_arms, lower_bound, iterations)
+
+    @staticmethod
+    def _relative_gap(bound: float, value: int) -> float:
+        """Относительный разрыв между решением и верхней оценкой (0 = решение оптимально)"""
+        return max(bound - value, 0.0) / bound if bound > 0 else 0.0
+
+    @staticmethod
+    def _greedy_wave(
+        processor: DataProcessor,
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Optional[Set[str]],
+        state: Optional[CoverageState] = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Жадный выбор ПО для волны (см. find_best_software_set)
+
+        Args:
+            state: Готовое состояние покрытия (вместо already_tested и remaining_arms);
+                   выбранное ПО добавляется в него
+
+        Returns:
+            Номера выбранного ПО в порядке выбора и номера ставших покрытыми АРМ
+        """
+        if state is None:
+            state = CoverageState(processor, already_tested, remaining_arms)
+        n_software = len(processor.software_names)
+        costs = processor.software_weights.tolist()
+
+        # Начальные очки "закрытия": для каждого АРМ с одним недостающим ПО
+        # засчитываем это ПО
+        near_miss_mask = state.active & (state.missing == 1)
+        last_entry = near_miss_mask[processor.arm_of_entry] & ~state.selected[processor.arm_indices]
+        closing_scores = np.bincount(
+            processor.arm_indices[last_entry], minlength=n_software
+        ).tolist()
+
+        # Куча по (-очки, -номер ПО): номера ПО упорядочены по именам,
+        # поэтому при равенстве очков первым извлекается ПО с большим именем
+        heap = [(-score, -sw) for sw, score in enumerate(closing_scores) if score > 0]
+        heapq.heapify(heap)
+
+        # Популярность среди оставшихся АРМ (статическая, как и раньше),
+        # порядок по убыванию (популярность, имя)
+        popularity = np.bincount(
+            processor.software_of_entry,
+            weights=state.active[processor.software_indices],
+            minlength=n_software
+        )
+        popularity_order = np.lexsort((np.arange(n_software), popularity))[::-1].tolist()
+        popularity_pos = 0
+
+        selected = state.selected
+        wave_ids = []
+        migrating_ids = []
+
+        # Остаток лимита волны; ПО дороже остатка отбрасывается навсегда,
+        # так как остаток только уменьшается
+        budget = limit
+        while budget > 0:
             best_software = None
-            if software_scores:
-                # Сортируем по очкам (по убыванию), затем по имени (по возрастанию)
-                best_software = max(software_scores.keys(), key=lambda sw: (software_scores[sw], sw))
-            else:
-                current_popularity = {sw: pop for sw, pop in popularity.items() if sw in available_software}
-                if current_popularity:
-                    # То же самое для популярности
-                    best_software = max(current_popularity.keys(), key=lambda sw: (current_popularity[sw], sw))
-            
-            if best_software is None:
+
+            # Извлекаем актуальный максимум из ленивой кучи
+            while heap:
+                neg_score, neg_sw = heap[0]
+                sw = -neg_sw
+                if selected[sw] or closing_scores[sw] != -neg_score or costs[sw] > budget:
+                    heapq.heappop(heap)
+                    continue
+                best_software = sw
                 break
 
-            wave_software.add(best_software)
-            available_software.remove(best_software)
-            
-            # Обновляем `untested_needs` и `migrating_arms`
-            for arm in self.processor.software_to_arms.get(best_software, set()):
-                if arm in untested_needs:
-                    untested_needs[arm] -= 1
-                    if untested_needs[arm] == 0:
-                        migrating_arms.add(arm)
-                        del untested_needs[arm]
+            if best_software is None:
+                # Нет "закрывающих" ПО - берём самое популярное из доступных
+                while popularity_pos < len(popularity_order) and (
+                    selected[popularity_order[popularity_pos]]
+                    or costs[popularity_order[popularity_pos]] > budget
+                ):
+                    popularity_pos += 1
+                if popularity_pos == len(popularity_order):
+                    break
+                best_software = popularity_order[popularity_pos]
 
-        return wave_software, migrating_arms
+            budget -= costs[best_software]
+            wave_ids.append(best_software)
+            migrating_ids.extend(state.add_software(best_software).tolist())
 
-    def calculate_waves(self, wave_limits: List[int], use_ilp: bool = False, time_limit: Optional[int] = None) -> Dict:
+            # АРМ, которым теперь не хватает одного ПО, добавляют очки этому ПО
+            for arm in state.last_new_near_miss.tolist():
+                last_sw = int(state.missing_software_ids(arm)[0])
+                closing_scores[last_sw] += 1
+                heapq.heappush(heap, (-closing_scores[last_sw], -last_sw))
+
+        return wave_ids, migrating_ids
+
+    def calculate_waves(
+        self,
+        wave_limits: List[int],
+        use_ilp: bool = False,
+        time_limit: Optional[int] = None,
+        merge_equivalent: bool = False,
+        decompose: bool = False,
+        n_jobs: Optional[int] = None,
+        planning: str = 'sequential',
+        horizon: int = 1,
+        step_time_limit: Optional[float] = None,
+        adaptive_time: bool = False,
+        mip_gap: Optional[float] = None,
+        local_search_time: Optional[float] = None,
+        upper_bound: Optional[str] = None
+    ) -> Dict:
         """
         Рассчитать распределение ПО по волнам (ручной режим)
 
@@ -109,48 +306,226 @@ class MigrationOptimizer:
             wave_limits: Список лимитов ПО для каждой волны
             use_ilp: Использовать точный ILP алгоритм (True) или эвристический (False)
             time_limit: Максимальное время работы ILP решателя в секундах (только для use_ilp=True)
+            merge_equivalent: Выбирать взаимозаменяемое ПО в эвристике только целиком
+                              (ILP всегда работает на супер-элементах)
+            decompose: Решать ILP отдельно на компонентах связности (в пуле процессов);
+                       приближённо: доли компонент выбираются по жадным кривым
+            n_jobs: Количество процессов для компонент (None = количество ядер)
+            planning: 'sequential' - каждая волна решается отдельно,
+                      'joint' - все волны одной моделью ILP,
+                      'rolling' - скользящее окно (только для use_ilp=True)
+            horizon: Количество волн просмотра вперёд в режиме 'rolling'
+            step_time_limit: Лимит времени одного шага 'rolling' в секундах
+                             (None = time_limit, делённый на количество волн)
+            adaptive_time: Распределять time_limit между волнами по размеру их задач
+                           (оценка по жадному плану) и переносить неиспользованное
+                           время на следующие волны (иначе - поровну)
+            mip_gap: Завершать волну, когда относительный разрыв до верхней оценки
+                     не больше mip_gap (например, 0.01 = 1%)
+            local_search_time: Общее время улучшения жадных решений локальным поиском
+                               в секундах (None = без улучшения); в ILP улучшается
+                               стартовое решение
+            upper_bound: Способ верхней оценки для эвристики ('lagrangian' или 'lp',
+                         None = без оценки): для каждой волны - оценка при том же
+                         протестированном ПО, для плана - оценка покрытия при
+                         суммарном лимите, и относительные разрывы
 
         Returns:
-            Словарь с результатами расчёта
+            Словарь с результатами расчёта (при повторном расчёте с кэшем -
+            из кэша; 'reused_waves' - сколько первых волн взято из кэша)
+        """
+        if planning not in self.PLANNING_MODES:
+            raise ValueError(f"Unknown planning mode: {planning}")
+        params = {
+            'use_ilp': use_ilp,
+            'time_limit': time_limit,
+            'merge_equivalent': merge_equivalent,
+            'decompose': decompose,
+            'planning': planning,
+            'horizon': horizon,
+            'step_time_limit': step_time_limit,
+            'adaptive_time': adaptive_time,
+            'mip_gap': mip_gap,
+            'local_search_time': local_search_time,
+            'upper_bound': upper_bound,
+        }
+        if self.cache is None:
+            return self._calculate_waves(wave_limits, n_jobs=n_jobs, **params)
+
+        algorithm = (self.ilp_backend, self.ilp_formulation) if use_ilp else 'greedy'
+        key = self.cache.make_key('waves', self.processor.fingerprint, algorithm, wave_limits, params)
+        results = self.cache.get(key)
+        if results is not None:
+            results['reused_waves'] = len(wave_limits)
+            return results
+
+        prefix_key = None
+        # Первые k волн последовательного расчёта зависят только от первых k лимитов
+        # (в ILP - ещё от количества волн, по которому делится лимит времени);
+        # локальный поиск делит своё время на все волны, а адаптивные доли времени ILP
+        # зависят от всех лимитов, поэтому такие результаты не переиспользуются
+        adaptive_ilp_time = use_ilp and adaptive_time and time_limit is not None
+        if (not use_ilp or planning == 'sequential') and not local_search_time and not adaptive_ilp_time:
+            n_waves = len(wave_limits) if use_ilp else None
+
+            def prefix_key(k: int) -> str:
+                return self.cache.make_key(
+                    'wave-prefix', self.processor.fingerprint, algorithm, wave_limits[:k], n_waves, params
+                )
+
+        results = self._calculate_waves(wave_limits, n_jobs=n_jobs, prefix_key=prefix_key, **params)
+        self.cache.put(key, results)
+        return results
+
+    def _calculate_waves(
+        self,
+        wave_limits: List[int],
+        use_ilp: bool,
+        time_limit: Optional[int],
+        merge_equivalent: bool,
+        decompose: bool,
+        n_jobs: Optional[int],
+        planning: str,
+        horizon: int,
+        step_time_limit: Optional[float],
+        adaptive_time: bool,
+        mip_gap: Optional[float],
+        local_search_time: Optional[float],
+        upper_bound: Optional[str],
+        prefix_key=None
+    ) -> Dict:
+        """
+        Расчёт волн без кэша целых результатов (параметры - как у calculate_waves)
+
+        Args:
+            prefix_key: Ключ кэша первых k волн по k (None = без переиспользования волн)
         """
+        n_waves = len(wave_limits)
+        if use_ilp and planning == 'joint':
+            return self._calculate_joint_waves(wave_limits, time_limit, merge_equivalent, mip_gap)
+
+        time_budget = None
+        if use_ilp:
+            if planning == 'rolling' and step_time_limit is not None:
+                time_budget = WaveTimeBudget(step_time_limit * n_waves, [1.0] * n_waves, adaptive=False)
+            else:
+                weights = [1.0] * n_waves
+                if adaptive_time and time_limit is not None:
+                    weights = self._wave_weights(wave_limits, merge_equivalent)
+                time_budget = WaveTimeBudget(time_limit, weights, adaptive=adaptive_time)
+        if use_ilp and planning == 'rolling':
+            return self._calculate_rolling_waves(wave_limits, horizon, time_budget, merge_equivalent, mip_gap)
+
+        # Время локального поиска делится между волнами, остаток переходит дальше
+        search_budget = None
+        if local_search_time:
+            search_budget = WaveTimeBudget(local_search_time, [1.0] * n_waves)
+
         tested_software = set()
         migrated_arms = set()
         software_wave_map = {}
         arm_wave_map = {}  # Карта АРМ -> номер волны
-        n_waves = len(wave_limits)
         waves_data = []
 
         remaining_arms = set(self.processor.arm_software_map.keys())
 
+        # Самый длинный уже рассчитанный префикс волн
+        reused_waves = 0
+        if prefix_key is not None:
+            for k in range(n_waves, 0, -1):
+                prefix = self.cache.get(prefix_key(k))
+                if prefix is not None:
+                    waves_data, reused_waves = prefix, k
+                    break
+        for wave_data in waves_data:
+            tested_software.update(wave_data['software_list'])
+            migrated_arms.update(wave_data['arms_list'])
+            for software in wave_data['software_list']:
+                software_wave_map[software] = wave_data['wave_number']
+            for arm in wave_data['arms_list']:
+                arm_wave_map[arm] = wave_data['wave_number']
+            if time_budget is not None:
+                time_budget.record(wave_data['time_budget']['allocated'], wave_data['time_budget']['spent'])
+        remaining_arms -= migrated_arms
+
         for wave_num, limit in enumerate(wave_limits, 1):
+            if wave_num <= reused_waves:
+                continue
+            local_search = None
             # Выбираем алгоритм оптимизации
             if use_ilp:
-                ilp_solver = ILPSoftwareSelector(self.processor)
+                wave_start = time.perf_counter()
+                ilp_solver = self._ilp_solver()
                 
                 # Сначала вычисляем эвристическое решение для теплого старта
                 greedy_solution, greedy_arms = self.find_best_software_set(
                     limit=limit,
                     already_tested=tested_software,
-                    remaining_arms=remaining_arms - migrated_arms
+                    remaining_arms=remaining_arms - migrated_arms,
+                    merge_equivalent=merge_equivalent
                 )
+                if search_budget is not None:
+                    greedy_solution, greedy_arms, local_search = self._improve_greedy_wave(
+                        greedy_solution, greedy_arms, limit, tested_software,
+                        remaining_arms - migrated_arms, search_budget, merge_equivalent
+                    )
                 
-                # Вычисляем лимит времени для одной волны
-                wave_time_limit = None if time_limit is None else time_limit / n_waves
+                # Лимит времени волны: поровну или с учётом остатка и размера задачи
+                wave_time_limit = time_budget.next_limit()
                 
-                # Используем эвристическое решение как warm start
-                wave_software, wave_arms = ilp_solver.find_best_software_set_ilp(
-                    limit=limit,
-                    already_tested=tested_software,
-                    remaining_arms=remaining_arms - migrated_arms,
-                    time_limit=wave_time_limit,
-                    warm_start_solution=greedy_solution
-                )
+                decomposed = None
+                if decompose:
+                    decomposed = self._solve_ilp_by_components(
+                        'max', limit, tested_software, remaining_arms - migrated_arms,
+                        wave_time_limit, n_jobs
+                    )
+                
+                if decomposed is not None:
+                    component_software, wave_arms, kernel_report = decomposed
+                    # Неиспользованный компонентами лимит добираем популярным ПО
+                    wave_software = ilp_solver._pad_selection(
+                        component_software,
+                        limit,
+                        [sw for sw in self.processor.software_names.tolist() if sw not in tested_software]
+                    )
+                    # Добранное ПО может завершить новые АРМ - пересчитываем покрытие волны
+                    state = CoverageState(self.processor, tested_software, remaining_arms - migrated_arms)
+                    wave_arms = set()
+                    for software in wave_software:
+                        wave_arms |= state.add(software)
+                    kernel_report['padded_software'] = sorted(
+                        set(kernel_report.get('padded_software', [])) | (wave_software - component_software)
+                    )
+                    ilp_solver.last_kernel_report = kernel_report
+                else:
+                    # Используем эвристическое решение как warm start
+                    wave_software, wave_arms = ilp_solver.find_best_software_set_ilp(
+                        limit=limit,
+                        already_tested=tested_software,
+                        remaining_arms=remaining_arms - migrated_arms,
+                        time_limit=wave_time_limit,
+                        warm_start_solution=greedy_solution,
+                        mip_gap=mip_gap
+                    )
+                wave_time = time_budget.record(wave_time_limit, time.perf_counter() - wave_start)
             else:
                 wave_software, wave_arms = self.find_best_software_set(
                     limit=limit,
                     already_tested=tested_software,
-                    remaining_arms=remaining_arms - migrated_arms
+                    remaining_arms=remaining_arms - migrated_arms,
+                    merge_equivalent=merge_equivalent
                 )
+                if search_budget is not None:
+                    wave_software, wave_arms, local_search = self._improve_greedy_wave(
+                        wave_software, wave_arms, limit, tested_software,
+                        remaining_arms - migrated_arms, search_budget, merge_equivalent
+                    )
+                wave_bound = None
+                if upper_bound is not None:
+                    wave_bound = self.coverage_upper_bound(
+                        limit, tested_software, remaining_arms - migrated_arms,
+                        method=upper_bound, merge_equivalent=True, lower_bound=len(wave_arms)
+                    )
 
             # Обновляем глобальные множества
             tested_software.update(wave_software)
@@ -166,6 +541,305 @@ class MigrationOptimizer:
                 arm_wave_map[arm] = wave_num
 
             # Сохраняем статистику волны
+            wave_data = {
+                'wave_number': wave_num,
+                'software_selected': len(wave_software),
+                'software_list': list(wave_software),
+                'arms_migrated': len(wave_arms),
+                'arms_list': list(wave_arms)
+            }
+            if use_ilp:
+                # Насколько удалось сократить задачу перед решением
+                wave_data['kernel_report'] = dict(ilp_solver.last_kernel_report)
+                # Выданный лимит времени, затраченное время и остаток общего лимита
+                wave_data['time_budget'] = wave_time
+            if local_search is not None:
+                # Покрытие жадного решения, после локального поиска и история улучшений
+                wave_data['local_search'] = local_search
+            if not use_ilp and upper_bound is not None:
+                # Сколько АРМ волна могла бы дать при том же протестированном ПО
+                wave_data['upper_bound'] = wave_bound
+                wave_data['gap'] = self._relative_gap(wave_bound, len(wave_arms))
+            waves_data.append(wave_data)
+            if prefix_key is not None:
+                self.cache.put(prefix_key(wave_num), waves_data)
+
+        results = {
+            'waves': waves_data,
+            'total_tested_software': len(tested_software),
+            'total_migrated_arms': len(migrated_arms),
+            'software_wave_map': software_wave_map,
+            'arm_wave_map': arm_wave_map,  # Добавляем карту АРМ -> волна
+            'tested_software': tested_software,
+            'migrated_arms': migrated_arms
+        }
+        if time_budget is not None:
+            results['time_budget'] = time_budget.report()
+        if reused_waves:
+            results['reused_waves'] = reused_waves
+        if not use_ilp and upper_bound is not None:
+            # Ни один план не покроет больше, чем одна волна с суммарным лимитом
+            results['upper_bound'] = self.coverage_upper_bound(
+                sum(wave_limits), method=upper_bound, merge_equivalent=True,
+                lower_bound=len(migrated_arms)
+            )
+            results['gap'] = self._relative_gap(results['upper_bound'], len(migrated_arms))
+        return results
+
+    def _improve_greedy_wave(
+        self,
+        wave_software: Set[str],
+        wave_arms: Set[str],
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Set[str],
+        search_budget: WaveTimeBudget,
+        merge_equivalent: bool
+    ) -> Tuple[Set[str], Set[str], Dict]:
+        """
+        Улучшить жадное решение волны локальным поиском в пределах её доли времени
+
+        Returns:
+            ПО волны, мигрирующие АРМ и отчёт (АРМ до и после, история улучшений)
+        """
+        start = time.perf_counter()
+        wave_limit = search_budget.next_limit()
+        improved_software, improved_arms, trace = self.improve_wave(
+            wave_software, limit, already_tested, remaining_arms, wave_limit, merge_equivalent
+        )
+        search_budget.record(wave_limit, time.perf_counter() - start)
+        report = {'greedy_arms': len(wave_arms), 'arms': len(improved_arms), 'trace': trace}
+        if len(improved_arms) <= len(wave_arms):
+            return wave_software, wave_arms, {**report, 'arms': len(wave_arms)}
+        return improved_software, improved_arms, report
+
+    def _calculate_joint_waves(
+        self,
+        wave_limits: List[int],
+        time_limit: Optional[int],
+        merge_equivalent: bool,
+        mip_gap: Optional[float]
+    ) -> Dict:
+        """
+        Рассчитать все волны одной моделью ILP (см. ILPSoftwareSelector.plan_waves_ilp).
+        Тёплый старт - лучший из эвристических планов и последовательного ILP плана
+        (на него уходит половина лимита времени), поэтому по АРМ-волнам результат
+        не хуже последовательного планирования
+        """
+        start = time.perf_counter()
+        half_time_limit = None if time_limit is None else time_limit / 2
+        sequential = self.calculate_waves(
+            wave_limits, use_ilp=True, time_limit=half_time_limit, merge_equivalent=merge_equivalent,
+            adaptive_time=True, mip_gap=mip_gap
+        )
+        warm_start_plan = max(
+            [
+                self._best_heuristic_plan(wave_limits, set(), None, merge_equivalent),
+                [set(wave['software_list']) for wave in sequential['waves']]
+            ],
+            key=lambda plan: self._arm_waves(self._plan_results(plan))
+        )
+
+        ilp_solver = self._ilp_solver()
+        plan = ilp_solver.plan_waves_ilp(
+            wave_limits,
+            time_limit=None if time_limit is None else max(time_limit - (time.perf_counter() - start), 1.0),
+            warm_start_plan=warm_start_plan,
+            mip_gap=mip_gap
+        )
+
+        results = self._plan_results(plan)
+        results['planning'] = 'joint'
+        results['model_stats'] = dict(ilp_solver.last_model_stats)
+        results['kernel_report'] = dict(ilp_solver.last_kernel_report)
+        # Одна модель на все волны: время учитывается только в целом
+        time_budget = WaveTimeBudget(time_limit, [1.0], adaptive=False)
+        time_budget.record(time_limit, time.perf_counter() - start)
+        results['time_budget'] = time_budget.report()
+        return results
+
+    def _calculate_rolling_waves(
+        self,
+        wave_limits: List[int],
+        horizon: int,
+        time_budget: WaveTimeBudget,
+        merge_equivalent: bool,
+        mip_gap: Optional[float]
+    ) -> Dict:
+        """
+        Рассчитать волны скользящим окном: волны k..k+horizon решаются одной
+        моделью ILP, фиксируется только волна k, и окно сдвигается на одну волну.
+        Тёплый старт шага - лучший из планов: решение предыдущего шага для
+        оставшихся волн окна (с жадной добавкой новой волны), эвристические планы
+        и ILP решение одной волны k с жадным продолжением. Лимит времени шага
+        (выдаётся time_budget) делится между ILP одной волны и моделью окна
+        """
+        tested_software: Set[str] = set()
+        remaining_arms = set(self.processor.arm_software_map.keys())
+        plan: List[Set[str]] = []
+        kernel_reports = []
+        time_reports = []
+        previous: List[Set[str]] = []
+
+        for k in range(len(wave_limits)):
+            window = wave_limits[k:k + max(int(horizon), 0) + 1]
+            step_start = time.perf_counter()
+            step_time_limit = time_budget.next_limit()
+            half_time_limit = None if step_time_limit is None else step_time_limit / 2
+            candidates = [self._best_heuristic_plan(window, tested_software, remaining_arms, merge_equivalent)]
+
+            # Решение, которое дало бы последовательное планирование, с жадным продолжением
+            wave_solver = self._ilp_solver()
+            first_wave, first_arms = wave_solver.find_best_software_set_ilp(
+                limit=window[0],
+                already_tested=tested_software,
+                remaining_arms=remaining_arms,
+                time_limit=half_time_limit,
+                warm_start_solution=candidates[0][0],
+                mip_gap=mip_gap
+            )
+            candidates.append([first_wave] + self._greedy_plan(
+                window[1:], tested_software | first_wave, remaining_arms - first_arms, merge_equivalent
+            ))
+            if previous:
+                carried = previous[:len(window)]
+                carried_tested = tested_software.union(*carried)
+                carried_arms = remaining_arms - self._plan_results(carried, tested_software, remaining_arms)['migrated_arms']
+                candidates.append(carried + self._greedy_plan(
+                    window[len(carried):], carried_tested, carried_arms, merge_equivalent
+                ))
+            warm_start_plan = max(
+                candidates,
+                key=lambda candidate: self._arm_waves(self._plan_results(candidate, tested_software, remaining_arms))
+            )
+
+            ilp_solver = self._ilp_solver()
+            step_plan = ilp_solver.plan_waves_ilp(
+                window,
+                already_tested=tested_software,
+                remaining_arms=remaining_arms,
+                time_limit=None if step_time_limit is None else max(
+                    step_time_limit - (time.perf_counter() - step_start), half_time_limit
+                ),
+                warm_start_plan=warm_start_plan,
+                mip_gap=mip_gap
+            )
+            kernel_reports.append(dict(ilp_solver.last_kernel_report))
+            time_reports.append(time_budget.record(step_time_limit, time.perf_counter() - step_start))
+
+            wave_software = step_plan[0]
+            remaining_arms -= self._plan_results([wave_software], tested_software, remaining_arms)['migrated_arms']
+            tested_software |= wave_software
+            plan.append(wave_software)
+            previous = step_plan[1:]
+
+        results = self._plan_results(plan)
+        for wave_data, kernel_report, time_report in zip(results['waves'], kernel_reports, time_reports):
+            wave_data['kernel_report'] = kernel_report
+            wave_data['time_budget'] = time_report
+        results['planning'] = 'rolling'
+        results['horizon'] = horizon
+        results['time_budget'] = time_budget.report()
+        return results
+
+    def _wave_weights(self, wave_limits: List[int], merge_equivalent: bool) -> List[float]:
+        """
+        Оценка размера задачи ILP каждой волны по жадному плану: количество
+        непротестированного ПО на АРМ, которые ещё могут быть покрыты в волне
+        (столько пар "набор - ПО" остаётся в модели после сокращения)
+        """
+        state = CoverageState(self.processor)
+        weights = []
+        for limit, wave_software in zip(
+            wave_limits, self._greedy_plan(wave_limits, set(), set(self.processor.arm_names.tolist()), merge_equivalent)
+        ):
+            coverable = (state.missing > 0) & (state.missing <= limit)
+            weights.append(float(state.missing[coverable].sum()))
+            for software in wave_software:
+                state.add(software)
+        return weights
+
+    def _greedy_plan(
+        self,
+        wave_limits: List[int],
+        already_tested: Set[str],
+        remaining_arms: Set[str],
+        merge_equivalent: bool
+    ) -> List[Set[str]]:
+        """Последовательный жадный план (ПО каждой волны) от заданного состояния"""
+        tested_software = set(already_tested)
+        remaining_arms = set(remaining_arms)
+        plan = []
+        for limit in wave_limits:
+            wave_software, wave_arms = self.find_best_software_set(
+                limit, tested_software, remaining_arms, merge_equivalent=merge_equivalent
+            )
+            tested_software |= wave_software
+            remaining_arms -= wave_arms
+            plan.append(wave_software)
+        return plan
+
+    def _best_heuristic_plan(
+        self,
+        wave_limits: List[int],
+        already_tested: Set[str],
+        remaining_arms: Optional[Set[str]],
+        merge_equivalent: bool
+    ) -> List[Set[str]]:
+        """
+        Лучший по АРМ-волнам из эвристических планов: последовательного жадного
+        и выбора целыми наборами ПО на суммарный лимит, нарезанного по волнам
+        """
+        if remaining_arms is None:
+            remaining_arms = set(self.processor.arm_software_map.keys())
+        greedy_plan = self._greedy_plan(wave_limits, already_tested, remaining_arms, merge_equivalent)
+
+        order = profile_order(
+            self.processor, int(sum(wave_limits)), already_tested=already_tested, arms=remaining_arms
+        )
+        bounds = np.cumsum([0] + list(wave_limits))
+        profile_plan = [
+            self.processor.decode_software(order[bounds[w]:bounds[w + 1]]) for w in range(len(wave_limits))
+        ]
+        return max(
+            [greedy_plan, profile_plan],
+            key=lambda plan: self._arm_waves(self._plan_results(plan, already_tested, remaining_arms))
+        )
+
+    @staticmethod
+    def _arm_waves(results: Dict) -> int:
+        """Сумма мигрировавших АРМ по волнам (АРМ учитывается во всех волнах после миграции)"""
+        n_waves = len(results['waves'])
+        return sum(wave['arms_migrated'] * (n_waves - i) for i, wave in enumerate(results['waves']))
+
+    def _plan_results(
+        self,
+        plan: List[Set[str]],
+        already_tested: Set[str] = None,
+        remaining_arms: Optional[Set[str]] = None
+    ) -> Dict:
+        """
+        Собрать словарь результатов calculate_waves по ПО каждой волны:
+        АРМ мигрирует в волне, после которой протестировано всё его ПО
+
+        Args:
+            plan: ПО каждой волны
+            already_tested: ПО, протестированное до первой волны плана
+            remaining_arms: Учитываемые АРМ (None = все АРМ)
+        """
+        processor = self.processor
+        state = CoverageState(processor, already_tested or (), remaining_arms)
+        waves_data = []
+        software_wave_map = {}
+        arm_wave_map = {}
+
+        for wave_num, wave_software in enumerate(plan, 1):
+            wave_arms = set()
+            for software in wave_software:
+                wave_arms |= state.add(software)
+                software_wave_map[software] = wave_num
+            for arm in wave_arms:
+                arm_wave_map[arm] = wave_num
             waves_data.append({
                 'wave_number': wave_num,
                 'software_selected': len(wave_software),
@@ -174,12 +848,14 @@ class MigrationOptimizer:
                 'arms_list': list(wave_arms)
             })
 
+        tested_software = set(software_wave_map)
+        migrated_arms = set(arm_wave_map)
         return {
             'waves': waves_data,
             'total_tested_software': len(tested_software),
             'total_migrated_arms': len(migrated_arms),
             'software_wave_map': software_wave_map,
-            'arm_wave_map': arm_wave_map,  # Добавляем карту АРМ -> волна
+            'arm_wave_map': arm_wave_map,
             'tested_software': tested_software,
             'migrated_arms': migrated_arms
         }
@@ -187,66 +863,110 @@ class MigrationOptimizer:
     def _find_minimum_software_greedy(
     self,
     target_arms_count: int,
-    already_tested: Set[str]
+    already_tested: Set[str],
+    merge_equivalent: bool = False
 ) -> Tuple[Set[str], Set[str]]:
         """
         Эвристический (жадный) алгоритм для задачи Set Cover.
         Вынесен в отдельный метод для переиспользования.
+
+        На каждом шаге выбирается ПО, которое затрагивает максимум ещё не
+        покрытых АРМ; при равенстве - ПО с меньшим именем.
+
+        Выигрыш ПО (число непокрытых АРМ с этим ПО) считается без пересчёта:
+        АРМ, на котором есть ещё не выбранное ПО, не может быть покрыт, поэтому
+        выигрыш любого доступного ПО всегда равен его полной популярности и по
+        ходу алгоритма не меняется. Очередь с приоритетами вырождается в одну
+        сортировку, а покрытие обновляется инкрементально через CoverageState.
+
+        При merge_equivalent взаимозаменяемое ПО выбирается целым классом.
         """
-        selected_software = set()
-        covered_arms = self.processor.get_covered_arms(already_tested)
-        
-        # Преобразуем в отсортированный список для детерминизма
-        available_software_list = sorted(list(set(self.processor.software_to_arms.keys()) - already_tested))
+        processor = self.processor
+        if merge_equivalent:
+            processor = processor.merge_equivalent_software(already_tested)
+            already_tested = set()
+        state = CoverageState(processor, already_tested)
+        total_arms = len(processor.arm_names)
 
-        while len(covered_arms) < target_arms_count and available_software_list:
-            uncovered_arms = set(self.processor.arm_software_map.keys()) - covered_arms
-            if not uncovered_arms:
-                break
+        # Доступное ПО по убыванию популярности, при равенстве - по имени
+        available = np.flatnonzero(~state.selected)
+        degrees = processor.software_degrees[available]
+        order = available[np.lexsort((available, -degrees))].tolist()
 
-            best_software = None
-            best_score = -1
-            
-            # <<< ИЗМЕНЕНИЕ: Детерминированный выбор >>>
-            for software in available_software_list:
-                # Эвристика: выбираем ПО, которое затрагивает максимум еще не покрытых АРМ
-                score = len(self.processor.software_to_arms.get(software, set()) & uncovered_arms)
-                
-                if score > best_score:
-                    best_score = score
-                    best_software = software
-            # При равенстве очков будет выбрано ПО, которое идет раньше в отсортированном списке `available_software_list`
-            
-            if best_software is None:
+        selected_ids = []
+        for software_id in order:
+            if state.covered_count >= target_arms_count or state.covered_count >= total_arms:
                 break
+            selected_ids.append(software_id)
+            # Обновляем покрытие инкрементально: затрагиваются только АРМ с выбранным ПО
+            state.add_software(software_id)
 
-            selected_software.add(best_software)
-            available_software_list.remove(best_software)
-            
-            # Пересчитываем полное покрытие после добавления ПО
-            covered_arms = self.processor.get_covered_arms(already_tested | selected_software)
+        return processor.expand_software(processor.decode_software(selected_ids)), state.covered_arms()
 
-        return selected_software, covered_arms
-    
     def find_minimum_software_for_coverage(
         self,
         target_arms_count: int,
         already_tested: Set[str] = None,
         use_ilp: bool = False,
         use_warm_start: bool = True,
-        time_limit: Optional[int] = None
+        time_limit: Optional[int] = None,
+        merge_equivalent: bool = False,
+        decompose: bool = False,
+        n_jobs: Optional[int] = None
     ) -> Tuple[Set[str], Set[str]]:
         """
         Найти минимальный набор ПО для покрытия заданного количества АРМ.
         
         Args:
             time_limit: Максимальное время работы ILP решателя в секундах (только для use_ilp=True)
+            merge_equivalent: Выбирать взаимозаменяемое ПО в эвристике только целиком
+            decompose: Решать ILP отдельно на компонентах связности (в пуле процессов);
+                       приближённо: доли компонент выбираются по жадным кривым
+            n_jobs: Количество процессов для компонент (None = количество ядер)
         """
         if already_tested is None:
             already_tested = set()
 
+        key = None
+        if self.cache is not None:
+            algorithm = (self.ilp_backend, self.ilp_formulation) if use_ilp else 'greedy'
+            key = self.cache.make_key(
+                'min-coverage', self.processor.fingerprint, algorithm, target_arms_count, already_tested,
+                use_warm_start, time_limit, merge_equivalent, decompose
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._find_minimum_software_for_coverage(
+            target_arms_count, already_tested, use_ilp, use_warm_start, time_limit, merge_equivalent, decompose, n_jobs
+        )
+        if key is not None:
+            self.cache.put(key, result)
+        return result
+
+    def _find_minimum_software_for_coverage(
+        self,
+        target_arms_count: int,
+        already_tested: Set[str],
+        use_ilp: bool,
+        use_warm_start: bool,
+        time_limit: Optional[int],
+        merge_equivalent: bool,
+        decompose: bool,
+        n_jobs: Optional[int]
+    ) -> Tuple[Set[str], Set[str]]:
+        """Расчёт минимального набора ПО без кэша (параметры - как у find_minimum_software_for_coverage)"""
+
+        if use_ilp and decompose:
+            decomposed = self._solve_ilp_by_components(
+                'min', target_arms_count, already_tested, None, time_limit, n_jobs
+            )
+            if decomposed is not None:
+                return decomposed[0], decomposed[1]
+
         if use_ilp:
-            ilp_solver = ILPSoftwareSelector(self.processor)
+            ilp_solver = self._ilp_solver()
             warm_start_solution = None
 
             # <<< ИЗМЕНЕНИЕ: Логика "теплого старта" >>>
@@ -254,7 +974,8 @@ class MigrationOptimizer:
                 print("Calculating greedy solution for warm start...")
                 greedy_solution, greedy_covered = self._find_minimum_software_greedy(
                     target_arms_count=target_arms_count,
-                    already_tested=already_tested
+                    already_tested=already_tested,
+                    merge_equivalent=merge_equivalent
                 )
                 # Убедимся, что жадный алгоритм вообще нашел решение
                 if len(greedy_covered) >= target_arms_count:
@@ -273,58 +994,208 @@ class MigrationOptimizer:
             # Если ILP не используется, просто вызываем жадный алгоритм
             return self._find_minimum_software_greedy(
                 target_arms_count=target_arms_count,
-                already_tested=already_tested
+                already_tested=already_tested,
+                merge_equivalent=merge_equivalent
             )
 
-    def calculate_auto_recommendations(self) -> Dict:
+    def coverage_frontier(
+        self,
+        max_software: Optional[int] = None,
+        already_tested: Set[str] = None,
+        merge_equivalent: bool = False
+    ) -> CoverageFrontier:
         """
-        Рассчитать автоматические рекомендации для первых двух волн
+        Кривая "лимит ПО -> покрытые АРМ" для всех лимитов сразу.
+
+        Жадный порядок (find_best_software_set с лимитом, равным всему ПО) и
+        порядок выбора целыми наборами (decomposition.profile_order) строятся
+        по одному разу; для каждого лимита берётся лучший из префиксов. Для
+        плана из нескольких волн кривая показывает покрытие при суммарном лимите.
+
+        Args:
+            max_software: Наибольший лимит на кривой (None = всё непротестированное ПО)
+            already_tested: Уже протестированное ПО
+            merge_equivalent: Выбирать взаимозаменяемое ПО только целиком
 
         Returns:
-            Словарь с рекомендациями
+            CoverageFrontier
         """
-        total_arms = self.processor.total_arms
+        already_tested = set(already_tested or ())
+        processor = self.processor
+        if merge_equivalent:
+            # В сжатом индексе протестированного ПО нет, его имена пропускаются
+            processor = processor.merge_equivalent_software(already_tested)
+        untested = ~processor.software_mask(already_tested)
+        total = int(processor.software_weights[untested].sum())
+        max_software = total if max_software is None else min(int(max_software), total)
 
-        # Волна 1: Минимальный набор (20% АРМ)
-        target_20_percent = int(total_arms * 0.2)
-        wave1_min_software, wave1_min_arms = self.find_minimum_software_for_coverage(
-            target_arms_count=target_20_percent
-        )
+        greedy_order, _ = self._greedy_wave(processor, max_software, already_tested, None)
+        orders = [greedy_order, profile_order(processor, int(np.count_nonzero(untested)), already_tested=already_tested)]
+        return CoverageFrontier(processor, orders, already_tested, max_software)
 
-        # Волна 1: Оптимальный набор (100 ПО)
-        wave1_opt_software, wave1_opt_arms = self.find_best_software_set(
-            limit=min(100, self.processor.total_software),
-            already_tested=set(),
-            remaining_arms=set(self.processor.arm_software_map.keys())
-        )
+    def refine_frontier(
+        self,
+        frontier: CoverageFrontier,
+        limits: List[int],
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None
+    ) -> CoverageFrontier:
+        """
+        Уточнить точки кривой точным ILP (стартовое решение - точка кривой)
 
-        # Волна 2: Оптимальный набор (100 ПО после волны 1)
-        remaining_arms_after_wave1 = (
-            set(self.processor.arm_software_map.keys()) - wave1_opt_arms
-        )
-        wave2_opt_software, wave2_opt_arms = self.find_best_software_set(
-            limit=min(100, self.processor.total_software),
-            already_tested=wave1_opt_software,
-            remaining_arms=remaining_arms_after_wave1
-        )
+        Args:
+            frontier: Кривая из coverage_frontier
+            limits: Лимиты ПО, которые нужно уточнить
+            time_limit: Лимит времени на все точки в секундах (делится поровну,
+                        неиспользованное время переходит на следующие точки)
+            mip_gap: Допустимый относительный разрыв до верхней оценки
 
-        return {
-            'wave1_min': {
-                'software_count': len(wave1_min_software),
-                'arms_count': len(wave1_min_arms),
-                'software_list': list(wave1_min_software),
-                'arms_list': list(wave1_min_arms)
-            },
-            'wave1_opt': {
-                'software_count': len(wave1_opt_software),
-                'arms_count': len(wave1_opt_arms),
-                'software_list': list(wave1_opt_software),
-                'arms_list': list(wave1_opt_arms)
-            },
-            'wave2_opt': {
-                'software_count': len(wave2_opt_software),
-                'arms_count': len(wave2_opt_arms),
-                'software_list': list(wave2_opt_software),
-                'arms_list': list(wave2_opt_arms)
-            }
-        }
+        Returns:
+            Та же кривая с заполненным frontier.refined
+        """
+        limits = sorted({int(limit) for limit in limits if 0 < limit < len(frontier.budgets)})
+        tested = frontier.already_tested
+        all_arms = set(self.processor.arm_software_map.keys())
+        already_covered = int(frontier.arms[0])
+        time_budget = WaveTimeBudget(time_limit, [1.0] * len(limits))
+        for limit in limits:
+            start = time.perf_counter()
+            point_time_limit = time_budget.next_limit()
+            solver = self._ilp_solver()
+            software, arms = solver.find_best_software_set_ilp(
+                limit=limit,
+                already_tested=tested,
+                remaining_arms=all_arms,
+                time_limit=point_time_limit,
+                warm_start_solution=frontier.selection(limit),
+                mip_gap=mip_gap
+            )
+            time_budget.record(point_time_limit, time.perf_counter() - start)
+            # Точка кривой остаётся, если ILP за отведённое время нашёл решение хуже
+            if already_covered + len(arms) >= frontier.arms[limit]:
+                frontier.refined[limit] = {
+                    'arms': already_covered + len(arms),
+                    'software': software,
+                    'status': solver.last_model_stats.get('status')
+                }
+        return frontier
+
+    def _ilp_solver(self) -> ILPSoftwareSelector:
+        """Решатель ILP, заданный для оптимизатора"""
+        if self.ilp_backend == 'portfolio':
+            return PortfolioSelector(self.processor, formulation=self.ilp_formulation)
+        return ILPSoftwareSelector(self.processor, **self._ilp_options())
+
+    def _ilp_options(self) -> Dict[str, str]:
+        """
+        Параметры ILPSoftwareSelector, заданные для оптимизатора
+        (компоненты и так решаются параллельно, поэтому портфель заменяется на highspy)
+        """
+        backend = 'highspy' if self.ilp_backend == 'portfolio' else self.ilp_backend
+        return {'backend': backend, 'formulation': self.ilp_formulation}
+
+    def _solve_ilp_by_components(
+        self,
+        problem: str,
+        amount: int,
+        already_tested: Set[str],
+        remaining_arms: Optional[Set[str]],
+        time_limit: Optional[float],
+        n_jobs: Optional[int]
+    ) -> Optional[Tuple[Set[str], Set[str], Dict]]:
+        """
+        Решить ILP по компонентам связности остаточного графа АРМ - ПО.
+
+        Лимит ПО ('max') или целевое покрытие ('min') распределяется между
+        компонентами динамическим программированием по жадным кривым покрытия
+        (огибающая выбора по одному ПО и выбора целыми наборами),
+        затем каждая компонента решается точно со своей долей в пуле процессов
+        (жадное решение компоненты - тёплый старт). Распределение по жадным
+        кривым может отличаться от оптимального, поэтому общий результат -
+        приближённый (может быть хуже решения ILP по всей модели).
+
+        Returns:
+            Выбранное ПО, покрытые АРМ и суммарный отчёт о сокращении моделей
+            или None, если граф связный или цель недостижима
+        """
+        components = connected_components(self.processor, already_tested, remaining_arms)
+        if len(components) < 2:
+            return None
+
+        subproblems = [self.processor.subset(arm_ids, software_ids) for arm_ids, software_ids in components]
+        curves = []
+        warm_starts = []
+        for sub in subproblems:
+            if problem == 'max':
+                limit = min(amount, len(sub.software_names))
+                orders = [self._greedy_wave(sub, limit, set(), None)[0], profile_order(sub, limit)]
+            else:
+                software_ids = np.arange(len(sub.software_names))
+                orders = [
+                    np.lexsort((software_ids, -sub.software_degrees)).tolist(),
+                    profile_order(sub, len(software_ids), target=amount)
+                ]
+            curve, source = envelope_curve(sub, orders)
+            curves.append(curve)
+            warm_starts.append((orders, source))
+
+        if problem == 'max':
+            allocation = allocate_budget(curves, amount)
+        else:
+            allocation = allocate_target(curves, amount)
+            if allocation is None:
+                return None
+
+        tasks = []
+        for sub, curve, (orders, source), k in zip(subproblems, curves, warm_starts, allocation):
+            if k == 0:
+                continue
+            warm_start = sub.decode_software(orders[source[k]][:k])
+            tasks.append((sub, problem, k if problem == 'max' else int(curve[k]), warm_start, time_limit, self._ilp_options()))
+        results = solve_components(tasks, n_jobs)
+
+        software = set().union(*(result[0] for result in results))
+        arms = set().union(*(result[1] for result in results))
+        kernel_report: Dict = {'padded_software': []}
+        for _, _, report in results:
+            for key, value in report.items():
+                if key == 'padded_software':
+                    kernel_report[key] = sorted(set(kernel_report[key]) | set(value))
+                else:
+                    kernel_report[key] = kernel_report.get(key, 0) + value
+        kernel_report['components'] = len(components)
+        return software, arms, kernel_report
+
+    def calculate_auto_recommendations(
+        self,
+        coverage_shares: List[float] = (0.2,),
+        wave_limits: Optional[List[int]] = None,
+        merge_equivalent: bool = False
+    ) -> Dict:
+        """
+        Рассчитать автоматические рекомендации: минимальные наборы ПО для долей
+        АРМ и волны максимального покрытия (см. recommendations.RecommendationPipeline)
+
+        Args:
+            coverage_shares: Доли АРМ, для которых нужен минимальный набор ПО
+            wave_limits: Лимиты ПО волн (None = две волны по 100 ПО)
+            merge_equivalent: Выбирать взаимозаменяемое ПО только целиком
+
+        Returns:
+            Словарь с рекомендациями: 'minimum_sets' и 'waves' по всем долям и волнам,
+            а также 'wave1_min' (первая доля), 'wave1_opt' и 'wave2_opt' (первые волны)
+        """
+        from recommendations import RecommendationPipeline
+
+        total_arms = self.processor.total_arms
+        if wave_limits is None:
+            wave_limits = [min(100, self.processor.total_software)] * 2
+        targets = [int(total_arms * share) for share in coverage_shares]
+
+        recommendations = RecommendationPipeline(self.processor, merge_equivalent).run(targets, wave_limits)
+        keys = ('software_count', 'arms_count', 'software_list', 'arms_list')
+        if recommendations['minimum_sets']:
+            recommendations['wave1_min'] = {key: recommendations['minimum_sets'][0][key] for key in keys}
+        for wave, name in zip(recommendations['waves'], ('wave1_opt', 'wave2_opt')):
+            recommendations[name] = {key: wave[key] for key in keys}
+        return recommendations
@@ -0,0 +1,303 @@
+"""
+Модуль портфеля решателей
+Несколько конфигураций решателя (HiGHS с разными параметрами, CBC, жадный
+алгоритм) решают одну задачу одновременно в отдельных процессах. Расчёт
+завершается, как только один из решателей докажет оптимальность; иначе по
+истечении лимита времени берётся лучшее найденное решение
+"""
+
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from data_processor import DataProcessor
+from ILP import ILPSoftwareSelector
+
+
+# Конфигурации портфеля по умолчанию (в порядке запуска при нехватке ядер)
+DEFAULT_PORTFOLIO = [
+    {'name': 'highs', 'backend': 'highspy'},
+    {'name': 'greedy', 'backend': 'greedy'},  # жадный алгоритм + локальный поиск
+    {'name': 'cbc', 'backend': 'cbc'},
+    {'name': 'highs-seed-7', 'backend': 'highspy', 'solver_options': {'random_seed': 7}},
+    {'name': 'highs-no-presolve', 'backend': 'highspy', 'solver_options': {'presolve': 'off'}},
+]
+
+# Время локального поиска жадного решателя, если лимит времени не задан
+LOCAL_SEARCH_SECONDS = 10.0
+
+
+def _portfolio_worker(
+    results_queue,
+    config: Dict,
+    processor: DataProcessor,
+    merge_equivalent: bool,
+    formulation: str,
+    problem: str,
+    arguments: Dict
+) -> None:
+    """
+    Решить задачу одной конфигурацией портфеля (выполняется в отдельном процессе)
+    и отправить результат в очередь
+    """
+    # Своя группа процессов: при остановке завершаются и дочерние процессы (решатель CBC)
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    start = time.perf_counter()
+    result = {'name': config['name'], 'software': set(), 'arms': set(), 'stats': {}, 'kernel_report': {}}
+    try:
+        if config['backend'] == 'greedy':
+            from optimizer import MigrationOptimizer
+            optimizer = MigrationOptimizer(processor)
+            if problem == 'max':
+                software, arms = optimizer.find_best_software_set(
+                    arguments['limit'], arguments['already_tested'], arguments['remaining_arms'],
+                    merge_equivalent=merge_equivalent
+                )
+                # Улучшение локальным поиском до лимита времени портфеля
+                search_time = arguments['time_limit'] or LOCAL_SEARCH_SECONDS
+                improved_software, improved_arms, _ = optimizer.improve_wave(
+                    software, arguments['limit'], arguments['already_tested'],
+                    arguments['remaining_arms'], search_time, merge_equivalent=merge_equivalent
+                )
+                if len(improved_arms) > len(arms):
+                    software, arms = improved_software, improved_arms
+            else:
+                software, arms = optimizer._find_minimum_software_greedy(
+                    arguments['target_arms_count'], arguments['already_tested'], merge_equivalent=merge_equivalent
+                )
+            result.update(software=software, arms=arms, stats={'status': 'Heuristic'})
+        else:
+            solver = ILPSoftwareSelector(
+                processor,
+                merge_equivalent=merge_equivalent,
+                backend=config['backend'],
+                formulation=formulation,
+                solver_options=config.get('solver_options')
+            )
+            if problem == 'max':
+                software, arms = solver.find_best_software_set_ilp(**arguments)
+            else:
+                software, arms = solver.find_minimum_software_for_coverage_ilp(**arguments)
+            result.update(
+                software=software,
+                arms=arms,
+                stats=dict(solver.last_model_stats),
+                kernel_report=dict(solver.last_kernel_report)
+            )
+    except Exception as error:
+        result['stats'] = {'status': 'Error', 'error': str(error)}
+    result['time'] = time.perf_counter() - start
+    results_queue.put(result)
+
+
+class PortfolioSelector(ILPSoftwareSelector):
+    """
+    Решатель, запускающий портфель конфигураций параллельно.
+    Совместное планирование волн и LP-оценки выполняются через highspy
+    (как в ILPSoftwareSelector с backend='highspy')
+    """
+
+    # Запас времени сверх лимита на сборку модели и передачу результата
+    GRACE_SECONDS = 5.0
+    # Период проверки, не завершились ли процессы решателей без результата
+    POLL_SECONDS = 0.5
+
+    def __init__(
+        self,
+        processor: DataProcessor,
+        merge_equivalent: bool = True,
+        formulation: str = 'standard',
+        configs: Optional[List[Dict]] = None,
+        n_jobs: Optional[int] = None
+    ):
+        """
+        Args:
+            processor: DataProcessor с загруженными данными
+            merge_equivalent: Решать задачу над супер-элементами
+            formulation: 'standard' или 'lean'
+            configs: Конфигурации портфеля: имя, backend ('highspy', 'pulp', 'cbc'
+                     или 'greedy') и solver_options (None = DEFAULT_PORTFOLIO)
+            n_jobs: Количество одновременно работающих решателей (None = количество ядер)
+        """
+        super().__init__(processor, merge_equivalent=merge_equivalent, backend='highspy', formulation=formulation)
+        self.configs = list(configs or DEFAULT_PORTFOLIO)
+        self.n_jobs = n_jobs
+        # Результаты решателей последнего запуска (имя, статус, АРМ, ПО, время);
+        # решатели, завершившиеся без результата, - со статусом "Exited (код)"
+        self.last_portfolio_report: List[Dict] = []
+
+    def find_best_software_set_ilp(
+        self,
+        limit: int,
+        already_tested: Set[str],
+        remaining_arms: Set[str],
+        selection_bonus: float = 0.001,
+        time_limit: Optional[int] = None,
+        warm_start_solution: Optional[Set[str]] = None,
+        mip_gap: Optional[float] = None
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Задача максимального покрытия портфелем решателей
+        (параметры - как у ILPSoftwareSelector.find_best_software_set_ilp).
+        Лучшее решение - с наибольшим количеством мигрирующих АРМ
+        """
+        arguments = {
+            'limit': limit,
+            'already_tested': set(already_tested),
+            'remaining_arms': set(remaining_arms),
+            'selection_bonus': selection_bonus,
+            'time_limit': time_limit,
+            'warm_start_solution': warm_start_solution,
+            'mip_gap': mip_gap,
+        }
+        return self._solve_portfolio(
+            'max', arguments, time_limit,
+            key=lambda result: (len(result['arms']), result['stats'].get('status') == 'Optimal')
+        )
+
+    def find_minimum_software_for_coverage_ilp(
+        self,
+        target_arms_count: int,
+        already_tested: Set[str] = None,
+        warm_start_solution: Optional[Set[str]] = None,
+        time_limit: Optional[int] = None
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Задача минимального набора ПО портфелем решателей
+        (параметры - как у ILPSoftwareSelector.find_minimum_software_for_coverage_ilp).
+        Лучшее решение - наименьшее ПО среди достигших цели
+        """
+        arguments = {
+            'target_arms_count': target_arms_count,
+            'already_tested': set(already_tested or ()),
+            'warm_start_solution': warm_start_solution,
+            'time_limit': time_limit,
+        }
+        return self._solve_portfolio(
+            'min', arguments, time_limit,
+            key=lambda result: (
+                len(result['arms']) >= target_arms_count,
+                -len(result['software']) if len(result['arms']) >= target_arms_count else len(result['arms']),
+                result['stats'].get('status') == 'Optimal'
+            )
+        )
+
+    def _solve_portfolio(
+        self,
+        problem: str,
+        arguments: Dict,
+        time_limit: Optional[float],
+        key
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Запустить конфигурации в отдельных процессах и собрать результаты до первого
+        доказанного оптимума или до истечения лимита времени (оставшиеся процессы
+        останавливаются)
+
+        Args:
+            problem: 'max' или 'min'
+            arguments: Аргументы метода решателя
+            time_limit: Лимит времени в секундах (None = ждать все решатели или оптимум)
+            key: Ключ сравнения результатов (больше - лучше)
+
+        Returns:
+            ПО и АРМ лучшего решения
+        """
+        workers = max(1, min(len(self.configs), self.n_jobs or os.cpu_count() or 1))
+        configs = self.configs[:workers]
+
+        context = multiprocessing.get_context()
+        results_queue = context.Queue()
+        processes = [
+            context.Process(
+                target=_portfolio_worker,
+                args=(results_queue, config, self.processor, self.merge_equivalent,
+                      self.formulation, problem, arguments),
+                daemon=True
+            )
+            for config in configs
+        ]
+        for process in processes:
+            process.start()
+
+        deadline = None if time_limit is None else time.monotonic() + time_limit + self.GRACE_SECONDS
+        results = []
+        while len(results) < len(processes):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                result = results_queue.get(timeout=self.POLL_SECONDS if remaining is None
+                                           else min(self.POLL_SECONDS, remaining))
+            except queue.Empty:
+                # Процесс, завершённый без результата (сбой решателя, нехватка памяти,
+                # внешний сигнал), результат уже не отправит: ждать его не нужно
+                if not any(process.is_alive() for process in processes):
+                    results.extend(self._drain(results_queue))
+                    break
+                continue
+            results.append(result)
+            # Доказанный оптимум: остальные решатели лучше не найдут
+            if result['stats'].get('status') == 'Optimal':
+                break
+
+        for process in processes:
+            if process.is_alive():
+                self._stop(process)
+            process.join()
+
+        self.last_portfolio_report = [
+            {
+                'name': result['name'],
+                'status': result['stats'].get('status'),
+                'arms': len(result['arms']),
+                'software': len(result['software']),
+                'time': result['time'],
+            }
+            for result in results
+        ]
+        finished = {result['name'] for result in results}
+        exited = [
+            {'name': config['name'], 'status': f'Exited ({process.exitcode})', 'arms': 0, 'software': 0, 'time': None}
+            for config, process in zip(configs, processes)
+            if config['name'] not in finished and process.exitcode not in (None, 0, -signal.SIGTERM)
+        ]
+        self.last_portfolio_report.extend(exited)
+        if not results:
+            print(f"Portfolio: no solver finished within {time_limit} s")
+            return set(), set()
+
+        best = max(results, key=key)
+        self.last_model_stats = dict(best['stats'])
+        self.last_kernel_report = dict(best['kernel_report'])
+        # Обычный исход (доказанный оптимум без сбоев) остаётся только в last_portfolio_report
+        if best['stats'].get('status') != 'Optimal' or exited:
+            print(f"Portfolio: {best['name']} won with status {best['stats'].get('status')} "
+                  f"after {best['time']:.1f} s ({len(results)} of {len(processes)} solvers finished, "
+                  f"{len(exited)} exited without a result)")
+        return best['software'], best['arms']
+
+    @classmethod
+    def _drain(cls, results_queue) -> List[Dict]:
+        """Результаты, оставшиеся в очереди после завершения всех процессов"""
+        results = []
+        while True:
+            try:
+                results.append(results_queue.get(timeout=cls.POLL_SECONDS))
+            except queue.Empty:
+                return results
+
+    @staticmethod
+    def _stop(process) -> None:
+        """Остановить процесс решателя вместе с его группой процессов"""
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                return
+            except (ProcessLookupError, PermissionError):
+                # Процесс ещё не создал свою группу
+                pass
+        process.terminate()
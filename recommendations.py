@@ -0,0 +1,114 @@
+"""
+Модуль автоматических рекомендаций
+Рекомендации строятся конвейером с общим состоянием: минимальные наборы ПО для
+любого количества целевых покрытий получаются за один проход по ПО в порядке
+популярности, а волны максимального покрытия продолжают одно инкрементальное
+состояние покрытия
+"""
+
+import numpy as np
+from typing import Dict, List, Sequence
+from data_processor import DataProcessor
+from coverage import CoverageState
+from optimizer import MigrationOptimizer
+
+
+class RecommendationPipeline:
+    """
+    Конвейер рекомендаций: минимальные наборы ПО для целевых покрытий и
+    волны максимального покрытия с заданными лимитами
+    """
+
+    def __init__(self, processor: DataProcessor, merge_equivalent: bool = False):
+        """
+        Args:
+            processor: DataProcessor с загруженными данными
+            merge_equivalent: Выбирать взаимозаменяемое ПО только целиком
+                              (сжатый процессор строится один раз для всех шагов)
+        """
+        self.processor = processor.merge_equivalent_software() if merge_equivalent else processor
+
+    def _summary(self, software_ids: Sequence[int], arm_ids: Sequence[int]) -> Dict:
+        processor = self.processor
+        software = processor.expand_software(processor.decode_software(software_ids))
+        arms = processor.decode_arms(arm_ids)
+        return {
+            'software_count': len(software),
+            'arms_count': len(arms),
+            'software_list': list(software),
+            'arms_list': list(arms)
+        }
+
+    def minimum_sets(self, targets: Sequence[int]) -> List[Dict]:
+        """
+        Минимальные наборы ПО для каждого целевого количества АРМ (жадный
+        алгоритм set cover, как MigrationOptimizer.find_minimum_software_for_coverage)
+
+        ПО добавляется один раз в порядке популярности; набор для цели t -
+        кратчайший префикс порядка, покрывающий не меньше t АРМ.
+
+        Returns:
+            Для каждой цели: количество и списки ПО и АРМ
+        """
+        processor = self.processor
+        state = CoverageState(processor)
+        total_arms = len(processor.arm_names)
+        goal = min(max(targets, default=0), total_arms)
+
+        available = np.flatnonzero(~state.selected)
+        degrees = processor.software_degrees[available]
+        order = available[np.lexsort((available, -degrees))].tolist()
+
+        # covered[p] - покрытие после первых p ПО, newly - АРМ в порядке покрытия
+        covered = [state.covered_count]
+        newly = [state.covered_arm_ids()]
+        for software_id in order:
+            if state.covered_count >= goal:
+                break
+            newly.append(state.add_software(software_id))
+            covered.append(state.covered_count)
+        arm_order = np.concatenate(newly)
+        offsets = np.cumsum([len(ids) for ids in newly])
+
+        recommendations = []
+        for target in targets:
+            prefix = int(np.searchsorted(covered, min(target, total_arms), side='left'))
+            prefix = min(prefix, len(covered) - 1)
+            recommendation = self._summary(order[:prefix], arm_order[:offsets[prefix]])
+            recommendation['target'] = target
+            recommendations.append(recommendation)
+        return recommendations
+
+    def waves(self, limits: Sequence[int]) -> List[Dict]:
+        """
+        Волны максимального покрытия (жадный алгоритм, как calculate_waves):
+        каждая волна продолжает общее состояние покрытия, мигрировавшие АРМ
+        исключаются из учёта без его пересоздания
+
+        Returns:
+            Для каждой волны: лимит, количество и списки ПО и мигрирующих АРМ
+        """
+        state = CoverageState(self.processor)
+        recommendations = []
+        for wave_number, limit in enumerate(limits, 1):
+            wave_ids, migrating_ids = MigrationOptimizer._greedy_wave(
+                self.processor, limit, set(), None, state=state
+            )
+            state.retire_covered()
+            recommendation = self._summary(wave_ids, migrating_ids)
+            recommendation.update(wave_number=wave_number, limit=limit)
+            recommendations.append(recommendation)
+        return recommendations
+
+    def run(self, coverage_targets: Sequence[int], wave_limits: Sequence[int]) -> Dict:
+        """
+        Выполнить обе ветви (последовательно: обе ветви - циклы Python и NumPy
+        под GIL, потоки не дают выигрыша)
+
+        Returns:
+            {'minimum_sets': результаты minimum_sets, 'waves': результаты waves}
+        """
+        return {
+            'minimum_sets': self.minimum_sets(list(coverage_targets)),
+            'waves': self.waves(list(wave_limits))
+        }
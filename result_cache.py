@@ -0,0 +1,137 @@
+"""
+Модуль кэша результатов расчёта
+Ключ - хэш содержимого данных (DataProcessor.fingerprint), алгоритм и параметры
+расчёта. Записи вытесняются по давности использования (LRU); при заданном
+каталоге записи дублируются на диск и переживают перезапуск приложения
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+
+def _normalize(value: Any) -> Any:
+    """Привести параметры к виду с однозначным repr (множества и словари - отсортированные)"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _normalize(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize(item) for item in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ResultCache:
+    """
+    LRU-кэш результатов с необязательным хранением на диске.
+    Значения копируются при записи и чтении, поэтому изменение полученного
+    результата не портит кэш. Безопасен при обращении из нескольких потоков
+    (сессии Streamlit)
+    """
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None, max_disk_entries: int = 4096):
+        """
+        Args:
+            max_entries: Количество записей в памяти
+            directory: Каталог для хранения на диске (None = только в памяти)
+            max_disk_entries: Количество записей на диске (вытесняются самые старые)
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Ключ записи по хэшу данных, алгоритму и параметрам"""
+        return hashlib.sha256(repr(_normalize(parts)).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Значение по ключу (None = нет в кэше)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key])
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        """Сохранить значение (в памяти и, если задан каталог, на диске)"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value)
+        self._store(key, value)
+
+    def clear(self) -> None:
+        """Очистить кэш в памяти (файлы на диске остаются)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Any]:
+        """Прочитать запись с диска (повреждённые и недоступные файлы считаются отсутствующими)"""
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+            # Время доступа для вытеснения старых записей
+            os.utime(path)
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _store(self, key: str, value: Any) -> None:
+        """Записать значение на диск атомарно и вытеснить лишние записи"""
+        if not self.directory:
+            return
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except OSError as error:
+            print(f"Result cache: cannot write {path}: {error}")
+            return
+
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith('.pkl')
+        ]
+        if len(files) > self.max_disk_entries:
+            files.sort(key=lambda name: os.path.getmtime(name) if os.path.exists(name) else 0)
+            for name in files[:len(files) - self.max_disk_entries]:
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
@@ -3,8 +3,9 @@
 """
 
 import pandas as pd
+from optimizer import MigrationOptimizer
 
-def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, exporter):
+def tabs(tab1, tab2, tab3, tab4, tab5, st, processor, optimizer, uploaded_file, exporter):
 
     with tab1:
         st.subheader("Планирование волн миграции (эвристический алгоритм)")
@@ -44,9 +45,41 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                 )
                 wave_limits_greedy.append(limit)
 
+        merge_equivalent_greedy = st.checkbox(
+            "Выбирать взаимозаменяемое ПО целиком",
+            value=False,
+            help="ПО, установленное на одних и тех же АРМ, выбирается только вместе "
+                 "и занимает в лимите волны столько мест, сколько в нём наименований",
+            key="merge_equivalent_greedy"
+        )
+
+        local_search_time_greedy = st.number_input(
+            "Время улучшения (сек)",
+            min_value=0,
+            max_value=3600,
+            value=0,
+            help="Общее время локального поиска: выбранное ПО заменяется по одному "
+                 "и парами, пока покрытие растёт (0 = без улучшения)",
+            key="local_search_time_greedy"
+        )
+
+        upper_bound_greedy = st.checkbox(
+            "Оценить разрыв до оптимума",
+            value=False,
+            help="Верхняя оценка покрытия (лагранжева релаксация): если разрыв мал, "
+                 "точный ILP не даст заметного выигрыша",
+            key="upper_bound_greedy"
+        )
+
         if st.button("🚀 Рассчитать волны (эвристика)", type="primary", key="calc_greedy"):
             with st.spinner("Расчёт оптимальных волн миграции (эвристический алгоритм)..."):
-                results = optimizer.calculate_waves(wave_limits_greedy, use_ilp=False)
+                results = optimizer.calculate_waves(
+                    wave_limits_greedy,
+                    use_ilp=False,
+                    merge_equivalent=merge_equivalent_greedy,
+                    local_search_time=local_search_time_greedy or None,
+                    upper_bound='lagrangian' if upper_bound_greedy else None
+                )
                 st.session_state.wave_results_greedy = results
                 st.success("✓ Расчёт завершён!")
                 st.rerun()
@@ -57,6 +90,8 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
 
             st.markdown("---")
             st.subheader("📊 Результаты расчёта")
+            if results.get('reused_waves'):
+                st.caption(f"⚡ Первые волны ({results['reused_waves']}) взяты из кэша предыдущих расчётов")
 
             # Таблица по волнам
             wave_stats = []
@@ -74,6 +109,13 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                     'АРМ в волне': wave_data['arms_migrated'],
                     'АРМ накопительно': cumulative_arms
                 })
+                if 'local_search' in wave_data:
+                    # Сколько АРМ добавил локальный поиск к жадному решению
+                    search = wave_data['local_search']
+                    wave_stats[-1]['+АРМ от улучшения'] = search['arms'] - search['greedy_arms']
+                if 'upper_bound' in wave_data:
+                    wave_stats[-1]['Оценка АРМ сверху'] = int(wave_data['upper_bound'])
+                    wave_stats[-1]['Разрыв, %'] = round(wave_data['gap'] * 100, 1)
 
             # Итоговая строка
             wave_stats.append({
@@ -83,12 +125,22 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                 'АРМ в волне': None,  # None вместо пустой строки
                 'АРМ накопительно': cumulative_arms
             })
+            if 'upper_bound' in results:
+                # Оценка плана - покрытие одной волной с суммарным лимитом
+                wave_stats[-1]['Оценка АРМ сверху'] = int(results['upper_bound'])
+                wave_stats[-1]['Разрыв, %'] = round(results['gap'] * 100, 1)
 
             st.dataframe(
                 pd.DataFrame(wave_stats),
                 width="stretch",
                 hide_index=True
             )
+            if 'upper_bound' in results:
+                st.caption(
+                    "Разрыв волны - насколько меньше оценки сверху покрыла волна при том же "
+                    "протестированном ранее ПО. Малый разрыв означает, что точный ILP "
+                    "почти ничего не добавит."
+                )
 
             # Визуализация
             col1, col2 = st.columns(2)
@@ -132,7 +184,7 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                             wave_data['software_list'],
                             tested_software_df,
                             tested_software_column,
-                            processor.original_df,
+                            processor.software_families(software_family_column),
                             processor.software_column,
                             software_family_column,
                             f'Волна {wave_num}'
@@ -180,6 +232,45 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                         for j, arm in enumerate(arms_list, 1):
                             st.text(f"{j}. {arm}")
 
+            # Анализ "что если" на общем состоянии покрытия
+            with st.expander("🔎 Что если изменить набор ПО в плане"):
+                plan_software = sorted(results['tested_software'])
+                other_software = sorted(set(processor.software_to_arms.keys()) - results['tested_software'])
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    software_to_add = st.multiselect(
+                        "Добавить ПО в план",
+                        options=other_software,
+                        key="what_if_add_greedy"
+                    )
+                with col2:
+                    software_to_remove = st.multiselect(
+                        "Исключить ПО из плана",
+                        options=plan_software,
+                        key="what_if_remove_greedy"
+                    )
+
+                state = optimizer.coverage_state(results['tested_software'])
+                base_covered = state.covered_count
+                for software in software_to_add:
+                    state.add(software)
+                for software in software_to_remove:
+                    state.remove(software)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric(
+                        "Покрыто АРМ",
+                        state.covered_count,
+                        state.covered_count - base_covered
+                    )
+                with col2:
+                    st.metric(
+                        "АРМ, которым не хватает одного ПО",
+                        len(state.near_miss)
+                    )
+
             # Кнопка экспорта
             st.markdown("---")
             col_export1, col_export2 = st.columns(2)
@@ -283,10 +374,84 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                 min_value=0,
                 max_value=13600,
                 value=300,
-                help="Максимальное время работы решателя для каждой волны (0 = без ограничения). При ограничении времени решение может быть неоптимальным.",
+                help="Максимальное время работы решателя на все волны (0 = без ограничения). При ограничении времени решение может быть неоптимальным.",
                 key="time_limit_ilp"
             )
 
+            adaptive_time_ilp = st.checkbox(
+                "Распределять время по сложности волн",
+                value=True,
+                help="Волнам с большей задачей выделяется больше времени, а время, "
+                     "не израсходованное волной, переходит на следующие волны",
+                key="adaptive_time_ilp"
+            )
+
+            mip_gap_ilp = st.number_input(
+                "Допустимое отклонение от оптимума (%)",
+                min_value=0.0,
+                max_value=50.0,
+                value=0.0,
+                step=0.5,
+                help="Волна завершается, как только найденное решение гарантированно не хуже "
+                     "оптимума больше чем на этот процент (0 = искать оптимум до конца лимита времени)",
+                key="mip_gap_ilp"
+            )
+
+            decompose_ilp = st.checkbox(
+                "Решать независимые компоненты параллельно (приближённо)",
+                value=False,
+                help="Если АРМ и ПО распадаются на независимые группы (площадки, подразделения), "
+                     "каждая группа решается отдельно на своём ядре процессора, "
+                     "а лимит ПО распределяется между группами по эвристике. "
+                     "Быстрее, но результат может быть хуже точного решения",
+                key="decompose_ilp"
+            )
+
+            portfolio_ilp = st.checkbox(
+                "Портфель решателей",
+                value=False,
+                help="Несколько решателей (HiGHS с разными настройками, CBC, жадный алгоритм) "
+                     "работают одновременно на разных ядрах; расчёт заканчивается, как только "
+                     "один из них докажет оптимальность",
+                key="portfolio_ilp"
+            )
+
+            planning_labels = {
+                'sequential': "Каждая волна отдельно",
+                'joint': "Все волны одной моделью",
+                'rolling': "Скользящее окно волн",
+            }
+            planning_ilp = st.radio(
+                "Режим планирования волн",
+                options=list(planning_labels),
+                format_func=planning_labels.get,
+                help="Одна модель выбирает волны совместно, чтобы как можно больше АРМ мигрировало "
+                     "как можно раньше (сумма мигрировавших АРМ по всем волнам), но решается дольше; "
+                     "лимит времени действует на весь расчёт. Скользящее окно решает вместе текущую "
+                     "волну и несколько следующих, фиксирует только текущую и сдвигается дальше",
+                key="planning_ilp"
+            )
+
+            horizon_ilp = 1
+            step_time_limit_ilp = 0
+            if planning_ilp == 'rolling':
+                horizon_ilp = st.number_input(
+                    "Волн просмотра вперёд",
+                    min_value=1,
+                    max_value=9,
+                    value=1,
+                    help="Сколько следующих волн учитывается при выборе текущей",
+                    key="horizon_ilp"
+                )
+                step_time_limit_ilp = st.number_input(
+                    "Лимит времени шага (сек)",
+                    min_value=0,
+                    max_value=13600,
+                    value=0,
+                    help="Время решения одного окна (0 = лимит времени, делённый на количество волн)",
+                    key="step_time_limit_ilp"
+                )
+
         st.markdown("**Лимиты ПО для каждой волны:**")
 
         wave_limits_ilp = []
@@ -306,7 +471,18 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
         if st.button("🚀 Рассчитать волны (точный)", type="primary", key="calc_ilp"):
             with st.spinner("Расчёт оптимальных волн миграции (точный ILP алгоритм)..."):
                 time_limit_value = time_limit_ilp if time_limit_ilp > 0 else None
-                results = optimizer.calculate_waves(wave_limits_ilp, use_ilp=True, time_limit=time_limit_value)
+                wave_optimizer = MigrationOptimizer(processor, ilp_backend='portfolio', cache=optimizer.cache) if portfolio_ilp else optimizer
+                results = wave_optimizer.calculate_waves(
+                    wave_limits_ilp,
+                    use_ilp=True,
+                    time_limit=time_limit_value,
+                    decompose=decompose_ilp,
+                    planning=planning_ilp,
+                    horizon=horizon_ilp,
+                    step_time_limit=step_time_limit_ilp if step_time_limit_ilp > 0 else None,
+                    adaptive_time=adaptive_time_ilp,
+                    mip_gap=mip_gap_ilp / 100 if mip_gap_ilp > 0 else None
+                )
                 st.session_state.wave_results_ilp = results
                 st.success("✓ Расчёт завершён!")
                 st.rerun()
@@ -317,6 +493,8 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
 
             st.markdown("---")
             st.subheader("📊 Результаты расчёта")
+            if results.get('reused_waves'):
+                st.caption(f"⚡ Первые волны ({results['reused_waves']}) взяты из кэша предыдущих расчётов")
 
             # Таблица по волнам
             wave_stats = []
@@ -334,6 +512,9 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                     'АРМ в волне': wave_data['arms_migrated'],
                     'АРМ накопительно': cumulative_arms
                 })
+                if 'time_budget' in wave_data:
+                    # Затраченное время волны
+                    wave_stats[-1]['Время, с'] = round(wave_data['time_budget']['spent'], 1)
 
             # Итоговая строка
             wave_stats.append({
@@ -350,6 +531,13 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                 hide_index=True
             )
 
+            time_budget = results.get('time_budget')
+            if time_budget and time_budget['total'] is not None:
+                st.caption(
+                    f"⏱ Затрачено {time_budget['spent']:.1f} с из {time_budget['total']:.0f} с, "
+                    f"остаток {time_budget['remaining']:.1f} с"
+                )
+
             # Визуализация
             col1, col2 = st.columns(2)
 
@@ -392,7 +580,7 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                             wave_data['software_list'],
                             tested_software_df,
                             tested_software_column,
-                            processor.original_df,
+                            processor.software_families(software_family_column),
                             processor.software_column,
                             software_family_column,
                             f'Волна {wave_num}'
@@ -604,7 +792,7 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                     list(results['software_set']),
                     tested_software_df,
                     tested_software_column,
-                    processor.original_df,
+                    processor.software_families(software_family_column),
                     processor.software_column,
                     software_family_column,
                     'ПО'
@@ -791,13 +979,36 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                 key="time_limit_n_users_ilp"
             )
 
+            decompose_n_users_ilp = st.checkbox(
+                "Решать независимые компоненты параллельно (приближённо)",
+                value=False,
+                help="Если АРМ и ПО распадаются на независимые группы, каждая группа решается "
+                     "отдельно на своём ядре процессора, а целевое покрытие распределяется "
+                     "между группами по эвристике. Быстрее, но ПО может понадобиться больше, "
+                     "чем в точном решении",
+                key="decompose_n_users_ilp"
+            )
+
+            portfolio_n_users_ilp = st.checkbox(
+                "Портфель решателей",
+                value=False,
+                help="Несколько решателей (HiGHS с разными настройками, CBC, жадный алгоритм) "
+                     "работают одновременно на разных ядрах; расчёт заканчивается, как только "
+                     "один из них докажет оптимальность",
+                key="portfolio_n_users_ilp"
+            )
+
         if st.button("🔍 Найти минимальное ПО (точный)", type="primary", key="find_min_software_ilp"):
             with st.spinner(f"Поиск минимального набора ПО для покрытия {target_users_ilp} пользователей (точный ILP алгоритм)..."):
                 time_limit_value = time_limit_n_users_ilp if time_limit_n_users_ilp > 0 else None
-                min_software, covered_arms = optimizer.find_minimum_software_for_coverage(
+                n_users_optimizer = (
+                    MigrationOptimizer(processor, ilp_backend='portfolio', cache=optimizer.cache) if portfolio_n_users_ilp else optimizer
+                )
+                min_software, covered_arms = n_users_optimizer.find_minimum_software_for_coverage(
                     target_arms_count=target_users_ilp,
                     use_ilp=True,
-                    time_limit=time_limit_value
+                    time_limit=time_limit_value,
+                    decompose=decompose_n_users_ilp
                 )
                 
                 st.session_state.min_coverage_results_ilp = {
@@ -864,7 +1075,7 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                     list(results['software_set']),
                     tested_software_df,
                     tested_software_column,
-                    processor.original_df,
+                    processor.software_families(software_family_column),
                     processor.software_column,
                     software_family_column,
                     'ПО'
@@ -1015,4 +1226,124 @@ def tabs(tab1, tab2, tab3, tab4, st, processor, optimizer, uploaded_file, export
                         filename="migration_n_users_ilp.xlsx",
                         on_export_callback=export_callback,
                         default_schema=default_schema
-                    )
\ No newline at end of file
+                    )
+
+    with tab5:
+        st.subheader("Кривая покрытия: лимит ПО → мигрирующие АРМ")
+        st.markdown("""
+        Кривая строится **за один расчёт** для всех лимитов сразу: по ней видно, сколько АРМ
+        покрывает любое количество протестированного ПО, и можно подобрать лимиты волн без
+        повторных расчётов. Для плана из нескольких волн кривая показывает покрытие при
+        суммарном лимите. Отдельные точки можно уточнить точным ILP.
+        """)
+
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            max_software_frontier = st.number_input(
+                "Наибольший лимит ПО",
+                min_value=1,
+                max_value=processor.total_software,
+                value=processor.total_software,
+                key="max_software_frontier"
+            )
+            merge_equivalent_frontier = st.checkbox(
+                "Выбирать взаимозаменяемое ПО целиком",
+                value=False,
+                key="merge_equivalent_frontier"
+            )
+
+        if st.button("📉 Построить кривую", type="primary", key="calc_frontier"):
+            with st.spinner("Построение кривой покрытия..."):
+                st.session_state.coverage_frontier = optimizer.coverage_frontier(
+                    max_software=max_software_frontier,
+                    merge_equivalent=merge_equivalent_frontier
+                )
+                st.success("✓ Расчёт завершён!")
+                st.rerun()
+
+        if 'coverage_frontier' in st.session_state:
+            frontier = st.session_state.coverage_frontier
+
+            st.markdown("---")
+            st.line_chart(frontier.to_frame().set_index('Лимит ПО'))
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                target_frontier = st.number_input(
+                    "Сколько АРМ нужно покрыть",
+                    min_value=1,
+                    max_value=processor.total_arms,
+                    value=min(100, processor.total_arms),
+                    key="target_frontier"
+                )
+                limit = frontier.limit_for_coverage(target_frontier)
+                if limit is None:
+                    st.warning("Цель выше кривой: увеличьте наибольший лимит ПО")
+                else:
+                    st.metric("Нужный лимит ПО", limit)
+
+            with col2:
+                limit_frontier = st.number_input(
+                    "Лимит ПО",
+                    min_value=0,
+                    max_value=int(frontier.budgets[-1]),
+                    value=min(100, int(frontier.budgets[-1])),
+                    key="limit_frontier"
+                )
+                covered = frontier.arms_at(limit_frontier)
+                st.metric(
+                    "Покрытые АРМ",
+                    covered,
+                    delta=f"{covered / processor.total_arms * 100:.1f}% от всех АРМ",
+                    delta_color="off"
+                )
+
+            st.markdown("**Уточнение точным ILP**")
+            col1, col2 = st.columns(2)
+
+            with col1:
+                breakpoints_frontier = st.number_input(
+                    "Количество точек",
+                    min_value=1,
+                    max_value=20,
+                    value=4,
+                    help="Лимиты, на которых кривая достигает равных долей максимального покрытия",
+                    key="breakpoints_frontier"
+                )
+
+            with col2:
+                time_limit_frontier = st.number_input(
+                    "Лимит времени (сек)",
+                    min_value=0,
+                    max_value=13600,
+                    value=120,
+                    help="Общее время на все точки (0 = без ограничения)",
+                    key="time_limit_frontier"
+                )
+
+            if st.button("🔬 Уточнить точки (ILP)", key="refine_frontier"):
+                with st.spinner("Уточнение точек кривой точным ILP..."):
+                    optimizer.refine_frontier(
+                        frontier,
+                        frontier.breakpoints(breakpoints_frontier),
+                        time_limit=time_limit_frontier or None
+                    )
+                    st.success("✓ Расчёт завершён!")
+                    st.rerun()
+
+            if frontier.refined:
+                st.dataframe(
+                    pd.DataFrame([
+                        {
+                            'Лимит ПО': limit,
+                            'АРМ (эвристика)': int(frontier.arms[limit]),
+                            'АРМ (ILP)': point['arms'],
+                            'Статус': point['status']
+                        }
+                        for limit, point in sorted(frontier.refined.items())
+                    ]),
+                    width="stretch",
+                    hide_index=True
+                )
@@ -3,9 +3,19 @@
 """
 
 import sys
+import numpy as np
 import pandas as pd
 from data_processor import DataProcessor
 from optimizer import MigrationOptimizer
+from ILP import ILPSoftwareSelector
+from time_budget import WaveTimeBudget
+from local_search import improve_selection, SwapScores, closing_scores
+from result_cache import ResultCache
+from inventory_cache import InventoryCache
+from portfolio import PortfolioSelector
+from decomposition import connected_components, allocate_budget, allocate_target
+from coverage import CoverageState
+from recommendations import RecommendationPipeline
 
 # Установка кодировки UTF-8 для Windows консоли
 if sys.platform == 'win32':
@@ -96,5 +106,804 @@ def test_basic_functionality():
     print("или")
     print("  run.bat")
 
+def _make_test_df() -> pd.DataFrame:
+    """Небольшой синтетический набор данных (АРМ, ПО)"""
+    rows = [
+        ('PC-1', 'A'), ('PC-1', 'B'),
+        ('PC-2', 'A'), ('PC-2', 'B'),
+        ('PC-3', 'C'), ('PC-3', 'D'),
+        ('PC-4', 'A'), ('PC-4', 'C'),
+        ('PC-5', 'E'),
+        ('PC-6', 'A'), ('PC-6', 'B'), ('PC-6', 'E'),
+        (' PC-1 ', 'A'), ('PC-7', None), ('', 'F'),
+    ]
+    return pd.DataFrame(rows, columns=['arm', 'software'])
+
+
+def _make_random_df(seed: int, n_arms: int = 40, n_software: int = 12) -> pd.DataFrame:
+    """Случайный набор данных: у каждого АРМ от 1 до 4 ПО, популярность ПО неравномерна"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_software + 1)
+    rows = [
+        (f'PC-{arm}', f'SW-{software}')
+        for arm in range(n_arms)
+        for software in rng.choice(n_software, rng.integers(1, 5), replace=False, p=popularity / popularity.sum())
+    ]
+    return pd.DataFrame(rows, columns=['arm', 'software'])
+
+
+def _make_processor(df: pd.DataFrame = None) -> DataProcessor:
+    """Обработанный DataProcessor (по умолчанию - на _make_test_df)"""
+    processor = DataProcessor(_make_test_df() if df is None else df, 'arm', 'software')
+    processor.process()
+    return processor
+
+
+def _assert_arm_waves_match_software(processor: DataProcessor, results: dict) -> None:
+    """Номер волны каждого АРМ - первая волна, после которой протестировано всё его ПО"""
+    tested = set()
+    for wave in results['waves']:
+        tested |= set(wave['software_list'])
+        covered = {arm for arm, software in processor.arm_software_map.items() if software <= tested}
+        assert {arm for arm, number in results['arm_wave_map'].items() if number <= wave['wave_number']} == covered
+
+
+def test_compact_index_matches_dict_views():
+    """Целочисленный индекс и ленивые словари совпадают с исходными данными"""
+    for compact in (False, True):
+        processor = DataProcessor(_make_test_df(), 'arm', 'software', compact=compact)
+        processor.process()
+
+        assert processor.total_arms == 6
+        assert processor.total_software == 5
+        assert processor.profile_count == 5
+        assert processor.arm_software_map['PC-6'] == {'A', 'B', 'E'}
+        assert processor.software_to_arms['A'] == {'PC-1', 'PC-2', 'PC-4', 'PC-6'}
+        assert processor.set_to_arms_map[frozenset({'A', 'B'})] == {'PC-1', 'PC-2'}
+
+        arm_id = processor.arm_index['PC-4']
+        assert processor.decode_software(processor.arm_software_ids(arm_id)) == {'A', 'C'}
+        software_id = processor.software_index['E']
+        assert processor.decode_arms(processor.software_arm_ids(software_id)) == {'PC-5', 'PC-6'}
+        assert processor.get_software_popularity()['A'] == 4
+
+
+def test_clean_data_on_codes():
+    """Очистка по уникальным значениям: числа и пробелы как в astype(str).str.strip(), исходные данные не меняются"""
+    df = pd.DataFrame({
+        'arm': [1, 2, 2.0, ' 3 ', None, 4],
+        'software': ['a', ' b', 'b ', 'c', 'd', '  '],
+        'extra': range(6)
+    })
+    processor = _make_processor(df)
+    assert processor.arm_software_map == {'1': {'a'}, '2': {'b'}, '2.0': {'b'}, '3': {'c'}}
+    assert list(processor.software_names) == ['a', 'b', 'c']
+
+    # Исходные данные не меняются, df - очищенные строки без дубликатов пар
+    pd.testing.assert_frame_equal(processor.original_df, df)
+    assert processor.original_df is not df
+    assert processor.df['arm'].tolist() == ['1', '2', '2.0', '3']
+    assert processor.df['software'].tolist() == ['a', 'b', 'b', 'c']
+    assert processor.df['extra'].tolist() == [0, 1, 2, 3]
+
+    # Числовой столбец с пропусками (float) сохраняет имена astype(str): "1.0", а не "1"
+    processor = _make_processor(pd.DataFrame({'arm': [1.0, 2.0, None], 'software': ['a', 'b', 'c']}))
+    assert processor.arm_software_map == {'1.0': {'a'}, '2.0': {'b'}}
+
+
+def test_apply_delta_matches_reprocessing():
+    """Изменения выгрузки дают тот же индекс, что и полная обработка, и отчёт о покрытии"""
+    added = pd.DataFrame([('PC-5', 'A'), ('PC-8', 'A'), ('PC-8', 'B'), ('PC-4', 'F'), ('PC-9', None)],
+                         columns=['arm', 'software'])
+    removed = pd.DataFrame([('PC-3', 'C'), ('PC-3', 'D'), ('PC-5', 'E'), ('PC-6', 'E'), ('PC-1', 'X')],
+                           columns=['arm', 'software'])
+    for compact in (False, True):
+        processor = DataProcessor(_make_test_df(), 'arm', 'software', compact=compact)
+        processor.process()
+        report = processor.apply_delta(added, removed, plan_software={'A', 'B', 'E'})
+
+        expected = DataProcessor(processor.original_df.copy(), 'arm', 'software')
+        expected.process()
+        assert processor.fingerprint == expected.fingerprint
+        assert processor.arm_software_map == expected.arm_software_map
+        assert processor.set_to_arms_map == expected.set_to_arms_map
+        assert processor.software_to_arms == expected.software_to_arms
+        assert processor.profile_count == expected.profile_count
+        assert len(set(processor.arm_profile_ids.tolist())) == processor.profile_count
+        assert sorted(zip(processor.df['arm'], processor.df['software'])) == sorted(
+            zip(expected.df['arm'], expected.df['software'])
+        )
+
+        assert report['added_pairs'] == 4 and report['removed_pairs'] == 4
+        assert report['new_arms'] == {'PC-8'} and report['removed_arms'] == {'PC-3'}
+        assert report['new_software'] == {'F'} and report['removed_software'] == {'D', 'E'}
+        # PC-5 и PC-6 были покрыты и остались, PC-4 ({A, C, F}) не покрыт
+        assert report['newly_covered'] == {'PC-8'}
+        assert report['no_longer_covered'] == set()
+
+    # АРМ теряет покрытие, когда на нём появляется ПО вне плана
+    processor = _make_processor()
+    report = processor.apply_delta(pd.DataFrame({'arm': ['PC-1'], 'software': ['C']}), plan_software={'A', 'B'})
+    assert report['no_longer_covered'] == {'PC-1'} and report['changed_arms'] == {'PC-1'}
+    assert processor.set_to_arms_map[frozenset({'A', 'B'})] == {'PC-2'}
+
+
+def test_bitset_coverage():
+    """Покрытие АРМ на битовых масках совпадает с проверкой подмножеств"""
+    processor = _make_processor()
+
+    tested = {'A', 'B', 'E', 'X'}
+    expected = {
+        arm for arm, software_set in processor.arm_software_map.items()
+        if software_set.issubset(tested)
+    }
+    assert processor.get_covered_arms(tested) == expected == {'PC-1', 'PC-2', 'PC-5', 'PC-6'}
+    assert processor.is_arm_covered('PC-6', tested)
+    assert not processor.is_arm_covered('PC-4', tested)
+    assert processor.get_covered_arms(set()) == set()
+
+
+def test_coverage_state_add_remove():
+    """Инкрементальное состояние покрытия при добавлении и удалении ПО"""
+    processor = _make_processor()
+    state = MigrationOptimizer(processor).coverage_state({'A'})
+
+    assert state.covered_count == 0
+    assert state.near_miss_arms() == {'PC-1', 'PC-2', 'PC-4', 'PC-5'}
+
+    assert state.add('B') == {'PC-1', 'PC-2'}
+    assert state.near_miss_arms() == {'PC-4', 'PC-5', 'PC-6'}
+    assert state.add('E') == {'PC-5', 'PC-6'}
+    assert state.covered_count == 4
+    assert state.covered_arms() == processor.get_covered_arms({'A', 'B', 'E'})
+
+    assert state.remove('B') == {'PC-1', 'PC-2', 'PC-6'}
+    assert state.covered_count == 1
+    assert state.near_miss_arms() == {'PC-1', 'PC-2', 'PC-4', 'PC-6'}
+    assert state.added_software() == {'E'}
+
+
+def test_find_best_software_set_greedy():
+    """Эвристика волны: сначала "закрывающее" ПО, затем популярное"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor)
+    all_arms = set(processor.arm_software_map.keys())
+
+    software, arms = optimizer.find_best_software_set(2, set(), all_arms)
+    assert software == {'E', 'A'}
+    assert arms == {'PC-5'}
+
+    software, arms = optimizer.find_best_software_set(3, set(), all_arms)
+    assert software == {'E', 'A', 'B'}
+    assert arms == {'PC-1', 'PC-2', 'PC-5', 'PC-6'}
+
+    results = optimizer.calculate_waves([2, 2])
+    assert set(results['waves'][1]['software_list']) == {'B', 'C'}
+    assert results['total_migrated_arms'] == 5
+
+
+def test_ilp_profile_model():
+    """ILP строится по уникальным наборам ПО и разворачивает их обратно в АРМ"""
+    processor = _make_processor()
+    solver = ILPSoftwareSelector(processor)
+    all_arms = set(processor.arm_software_map.keys())
+
+    software, arms = solver.find_best_software_set_ilp(3, set(), all_arms)
+    assert software == {'A', 'B', 'E'}
+    assert arms == {'PC-1', 'PC-2', 'PC-5', 'PC-6'}
+    assert solver.last_model_stats['profiles'] == 5
+    assert solver.last_model_stats['arms'] == 6
+
+    software, arms = solver.find_minimum_software_for_coverage_ilp(4)
+    assert len(software) == 3
+    assert len(arms) >= 4
+
+
+def test_ilp_kernelization():
+    """Непокрываемые в лимите АРМ и ПО только на них исключаются из модели"""
+    processor = _make_processor()
+    solver = ILPSoftwareSelector(processor)
+
+    software, arms = solver.find_best_software_set_ilp(1, set(), set(processor.arm_software_map.keys()))
+    assert software == {'E'}
+    assert arms == {'PC-5'}
+
+    report = solver.last_kernel_report
+    assert report['uncoverable_arms_removed'] == 5
+    assert report['dead_software_removed'] == 4
+    assert report['arms_after'] == 1
+    assert report['variables_after'] < report['variables_before']
+
+
+
+def test_ilp_padding_counts_completed_profiles():
+    """АРМ, набор которых завершён добивкой до лимита, считаются мигрирующими"""
+    processor = _make_processor()
+    solver = ILPSoftwareSelector(processor, merge_equivalent=False, backend='highspy')
+
+    def partial_solution(profiles, software, *args, **kwargs):
+        # Решатель остановлен по времени с решением из одного ПО A
+        return [1.0 if sw == 'A' else 0.0 for sw in software], [0.0] * len(profiles), 'Time limit reached'
+
+    solver._solve_highspy = partial_solution
+    software, arms = solver.find_best_software_set_ilp(2, set(), set(processor.arm_software_map.keys()))
+    # Добивка популярным ПО добавляет B и завершает набор {A, B}
+    assert software == {'A', 'B'}
+    assert arms == {'PC-1', 'PC-2'}
+    # Отчёт отличает выбор решателя от добивки
+    assert solver.last_kernel_report['padded_software'] == ['B']
+
+    # Супер-элементы не заполняют лимит: остаток добирается популярным ПО (имена исходного ПО)
+    merged = ILPSoftwareSelector(processor, backend='highspy')
+    software, arms = merged.find_best_software_set_ilp(3, set(), {'PC-5'})
+    assert software == {'E', 'A', 'B'} and arms == {'PC-5'}
+    assert merged.last_kernel_report['padded_software'] == ['A', 'B']
+
+
+def test_ilp_highspy_backend_matches_pulp():
+    """Прямой backend highspy строит ту же модель и даёт те же решения, что PuLP"""
+    processor = _make_processor()
+    all_arms = set(processor.arm_software_map.keys())
+
+    for limit in (1, 2, 3, 5):
+        pulp_solver = ILPSoftwareSelector(processor)
+        highs_solver = ILPSoftwareSelector(processor, backend='highspy')
+        expected = pulp_solver.find_best_software_set_ilp(limit, set(), all_arms)
+        assert highs_solver.find_best_software_set_ilp(limit, set(), all_arms) == expected
+        highs_stats, pulp_stats = dict(highs_solver.last_model_stats), dict(pulp_solver.last_model_stats)
+        assert abs(highs_stats.pop('objective') - pulp_stats.pop('objective')) < 1e-6
+        assert highs_stats == pulp_stats
+
+    for target in (1, 3, 4, 5):
+        for warm_start in (None, {'A', 'B', 'C', 'D'}):
+            expected = ILPSoftwareSelector(processor).find_minimum_software_for_coverage_ilp(
+                target, {'E'}, warm_start_solution=warm_start
+            )
+            software, arms = ILPSoftwareSelector(processor, backend='highspy').find_minimum_software_for_coverage_ilp(
+                target, {'E'}, warm_start_solution=warm_start
+            )
+            assert len(software) == len(expected[0])
+            assert len(arms) >= target
+
+
+def test_ilp_lean_formulation():
+    """Компактная модель меньше стандартной и даёт тот же оптимум и ту же LP-оценку"""
+    processor = _make_processor()
+    all_arms = set(processor.arm_software_map.keys())
+
+    for backend in ILPSoftwareSelector.BACKENDS:
+        for limit in (1, 2, 3, 4, 5):
+            standard = ILPSoftwareSelector(processor, backend=backend)
+            lean = ILPSoftwareSelector(processor, backend=backend, formulation='lean')
+            expected_software, expected_arms = standard.find_best_software_set_ilp(limit, set(), all_arms)
+            software, arms = lean.find_best_software_set_ilp(limit, set(), all_arms)
+            assert len(arms) == len(expected_arms)
+            assert len(software) == len(expected_software)
+            assert lean.last_model_stats['constraints'] <= standard.last_model_stats['constraints']
+            assert abs(
+                lean.lp_relaxation_bound(limit, set(), all_arms)
+                - standard.lp_relaxation_bound(limit, set(), all_arms)
+            ) < 1e-6
+
+    # {A, B} вложен в {A, B, E}: связь через z вместо отдельных строк для A и B
+    selector = ILPSoftwareSelector(processor, merge_equivalent=False, formulation='lean')
+    profiles = [(frozenset({'A', 'B'}), ['PC-1']), (frozenset({'A', 'B', 'E'}), ['PC-6'])]
+    rows = selector._lean_rows(profiles, ['A', 'B', 'E'])
+    assert ([4, 3], [1.0, -1.0]) in rows
+    assert ([4, 0], [1.0, -1.0]) not in rows
+    assert ([4, 2], [1.0, -1.0]) in rows
+    assert len(rows) == 4
+
+    # Без PC-1 супер-элементы {C, D, E} (стоимость 3) и F (стоимость 1) входят только в набор PC-0:
+    # строки агрегируются по стоимости, и LP-оценка совпадает со стандартной
+    df = pd.DataFrame(
+        [('PC-0', 'C'), ('PC-0', 'D'), ('PC-0', 'E'), ('PC-0', 'F'), ('PC-1', 'F'),
+         ('PC-2', 'A'), ('PC-2', 'B'), ('PC-2', 'G')],
+        columns=['arm', 'software']
+    )
+    processor = _make_processor(df)
+    bounds = [
+        ILPSoftwareSelector(processor, formulation=formulation).lp_relaxation_bound(4, set(), {'PC-0', 'PC-2'})
+        for formulation in ILPSoftwareSelector.FORMULATIONS
+    ]
+    assert abs(bounds[0] - bounds[1]) < 1e-6
+
+
+def test_merge_equivalent_software():
+    """ПО с одинаковым набором АРМ выбирается только целиком как супер-элемент"""
+    df = pd.concat([_make_test_df(), pd.DataFrame([('PC-3', 'F')], columns=['arm', 'software'])])
+    processor = _make_processor(df)
+
+    merged = processor.merge_equivalent_software()
+    assert merged.software_names.tolist() == ['A', 'B', 'C', 'D', 'E']
+    assert merged.software_members['D'] == ['D', 'F']
+    assert merged.software_weights.tolist() == [1, 1, 1, 2, 1]
+    assert merged.arm_software_map == {
+        arm: merged.compress_software(software) for arm, software in processor.arm_software_map.items()
+    }
+    assert merged.expand_software({'C', 'D'}) == {'C', 'D', 'F'}
+
+    all_arms = set(processor.arm_software_map.keys())
+    optimizer = MigrationOptimizer(processor)
+    for limit in range(1, 6):
+        software, arms = optimizer.find_best_software_set(limit, set(), all_arms, merge_equivalent=True)
+        assert len(software) <= limit
+        assert ('D' in software) == ('F' in software)
+
+    solver = ILPSoftwareSelector(processor)
+    software, arms = solver.find_best_software_set_ilp(3, set(), all_arms)
+    assert software == {'A', 'B', 'E'}
+    assert arms == {'PC-1', 'PC-2', 'PC-5', 'PC-6'}
+
+    software, arms = solver.find_best_software_set_ilp(6, set(), all_arms)
+    assert software == {'A', 'B', 'C', 'D', 'E', 'F'}
+    assert arms == all_arms
+
+
+
+def test_component_decomposition():
+    """Независимые компоненты решаются отдельно, лимит распределяется между ними"""
+    extra = pd.DataFrame(
+        [('PC-7', 'X'), ('PC-8', 'X'), ('PC-8', 'Y'), ('PC-9', 'X')],
+        columns=['arm', 'software']
+    )
+    processor = _make_processor(pd.concat([_make_test_df(), extra]))
+
+    components = connected_components(processor)
+    assert [processor.decode_arms(arm_ids) for arm_ids, _ in components] == [
+        {'PC-1', 'PC-2', 'PC-3', 'PC-4', 'PC-5', 'PC-6'}, {'PC-7', 'PC-8', 'PC-9'}
+    ]
+    sub = processor.subset(*components[1])
+    assert sub.arm_software_map == {'PC-7': {'X'}, 'PC-8': {'X', 'Y'}, 'PC-9': {'X'}}
+
+    # После тестирования A граф распадается сильнее
+    assert len(connected_components(processor, {'A'})) == 3
+
+    assert allocate_budget([np.array([0, 1, 5]), np.array([0, 3, 4])], 3) == [2, 1]
+    assert allocate_target([np.array([0, 1, 5]), np.array([0, 3, 4])], 3) == [0, 1]
+
+    optimizer = MigrationOptimizer(processor)
+    plain = optimizer.calculate_waves([4, 2], use_ilp=True)
+    for n_jobs in (1, 2):
+        decomposed = optimizer.calculate_waves([4, 2], use_ilp=True, decompose=True, n_jobs=n_jobs)
+        assert [w['arms_migrated'] for w in decomposed['waves']] == [w['arms_migrated'] for w in plain['waves']]
+        assert all(w['software_selected'] <= limit for w, limit in zip(decomposed['waves'], [4, 2]))
+        _assert_arm_waves_match_software(processor, decomposed)
+
+    software, arms = optimizer.find_minimum_software_for_coverage(7, use_ilp=True, decompose=True, n_jobs=1)
+    assert len(arms) >= 7
+    assert len(software) == len(optimizer.find_minimum_software_for_coverage(7, use_ilp=True)[0])
+
+
+def test_decomposed_wave_counts_padded_arms(monkeypatch):
+    """АРМ, завершённые добивкой волны после решения по компонентам, получают номер волны"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor)
+    # Компоненты вернули только A (остаток лимита не распределён)
+    monkeypatch.setattr(
+        optimizer, '_solve_ilp_by_components', lambda *args, **kwargs: ({'A'}, set(), {'components': 2})
+    )
+    results = optimizer.calculate_waves([2, 1], use_ilp=True, decompose=True)
+    # Добивка популярным ПО добавляет B и завершает PC-1 и PC-2
+    assert set(results['waves'][0]['software_list']) == {'A', 'B'}
+    assert results['arm_wave_map']['PC-1'] == results['arm_wave_map']['PC-2'] == 1
+    assert set(results['arm_wave_map']) == results['migrated_arms']
+    _assert_arm_waves_match_software(processor, results)
+    # Добранное ПО отмечено в отчёте волны
+    assert results['waves'][0]['kernel_report']['padded_software'] == ['B']
+
+
+
+def test_joint_wave_planning():
+    """Совместное планирование волн соблюдает лимиты и не хуже последовательного по АРМ-волнам"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor, ilp_backend='highspy')
+    limits = [2, 1, 2]
+
+    sequential = optimizer.calculate_waves(limits, use_ilp=True)
+    joint = optimizer.calculate_waves(limits, use_ilp=True, planning='joint')
+    assert joint['planning'] == 'joint'
+    assert set(joint) >= set(sequential)
+    assert all(w['software_selected'] <= limit for w, limit in zip(joint['waves'], limits))
+    assert MigrationOptimizer._arm_waves(joint) >= MigrationOptimizer._arm_waves(sequential)
+    assert joint['total_migrated_arms'] == len(joint['arm_wave_map']) == 6
+    for wave in joint['waves']:
+        for arm in wave['arms_list']:
+            assert processor.arm_software_map[arm] <= {
+                sw for sw, w in joint['software_wave_map'].items() if w <= wave['wave_number']
+            }
+
+    # Без супер-элементов и со стартовым планом - тот же результат
+    selector = ILPSoftwareSelector(processor, merge_equivalent=False, formulation='lean')
+    plan = selector.plan_waves_ilp(limits, warm_start_plan=[set(w['software_list']) for w in sequential['waves']])
+    assert MigrationOptimizer._arm_waves(optimizer._plan_results(plan)) == MigrationOptimizer._arm_waves(joint)
+
+
+def test_rolling_horizon_planning():
+    """Скользящее окно фиксирует по одной волне и не хуже последовательного плана"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor, ilp_backend='highspy')
+    limits = [1, 1, 2, 1]
+
+    sequential = optimizer.calculate_waves(limits, use_ilp=True)
+    joint = optimizer.calculate_waves(limits, use_ilp=True, planning='joint')
+    for horizon in (1, 3):
+        rolling = optimizer.calculate_waves(limits, use_ilp=True, planning='rolling', horizon=horizon)
+        assert rolling['planning'] == 'rolling'
+        assert [w['wave_number'] for w in rolling['waves']] == [1, 2, 3, 4]
+        assert all('kernel_report' in w for w in rolling['waves'])
+        assert all(w['software_selected'] <= limit for w, limit in zip(rolling['waves'], limits))
+        assert MigrationOptimizer._arm_waves(rolling) >= MigrationOptimizer._arm_waves(sequential)
+    # Окно на все волны на первом шаге совпадает с совместной моделью
+    assert MigrationOptimizer._arm_waves(rolling) == MigrationOptimizer._arm_waves(joint)
+
+
+def test_wave_time_budget():
+    """Неиспользованное время переходит на следующие волны пропорционально их весам"""
+    budget = WaveTimeBudget(100.0, [2.0, 1.0, 1.0])
+    assert budget.next_limit() == 50.0
+    assert budget.record(50.0, 10.0) == {'allocated': 50.0, 'spent': 10.0, 'remaining': 90.0}
+    assert budget.next_limit() == 45.0
+    budget.record(45.0, 45.0)
+    assert budget.next_limit() == 45.0
+    assert WaveTimeBudget(90.0, [2.0, 1.0, 1.0], adaptive=False).next_limit() == 30.0
+    assert WaveTimeBudget(None, [1.0]).next_limit() is None
+
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor, ilp_backend='highspy')
+    results = optimizer.calculate_waves([2, 2], use_ilp=True, time_limit=20, adaptive_time=True, mip_gap=0.01)
+    plain = optimizer.calculate_waves([2, 2], use_ilp=True)
+    assert [w['arms_migrated'] for w in results['waves']] == [w['arms_migrated'] for w in plain['waves']]
+    assert results['time_budget']['total'] == 20
+    first, second = (w['time_budget'] for w in results['waves'])
+    assert second['remaining'] == results['time_budget']['remaining']
+    # Вторая (последняя) волна получает весь остаток общего лимита
+    assert abs(second['allocated'] - (20 - first['spent'])) < 1e-9
+    _assert_arm_waves_match_software(processor, results)
+
+
+def test_local_search_improves_selection():
+    """Обмен пары ПО выводит из локального оптимума одиночных обменов"""
+    processor = _make_processor()
+    all_arms = set(processor.arm_software_map.keys())
+
+    start = processor.encode_software(['C', 'D']).tolist()
+    software_ids, arm_ids, trace = improve_selection(processor, start, 2, set(), all_arms, time_budget=5.0)
+    assert processor.decode_software(software_ids) == {'A', 'B'}
+    assert processor.decode_arms(arm_ids) == {'PC-1', 'PC-2'}
+    assert [step['arms'] for step in trace] == [1, 2]
+    assert trace[-1]['move'] == '2-swap'
+
+    optimizer = MigrationOptimizer(processor)
+    software, arms, _ = optimizer.improve_wave({'C', 'D'}, 2, set(), all_arms, time_budget=5.0, merge_equivalent=True)
+    assert software == {'A', 'B'} and arms == {'PC-1', 'PC-2'}
+
+    # Локальный поиск не ухудшает покрытие и не превышает лимит на случайных данных
+    for seed in range(5):
+        random_processor = _make_processor(_make_random_df(seed))
+        rng = np.random.default_rng(seed)
+        tested = set(random_processor.software_names[:1].tolist())
+        start = rng.choice(np.arange(1, len(random_processor.software_names)), 4, replace=False).tolist()
+        start_arms = random_processor.get_covered_arms(tested | random_processor.decode_software(start))
+        software_ids, arm_ids, trace = improve_selection(random_processor, start, 4, tested, None, time_budget=5.0)
+        covered = random_processor.get_covered_arms(tested | random_processor.decode_software(software_ids))
+        assert len(software_ids) <= 4 and len(covered) >= len(start_arms)
+        assert random_processor.decode_arms(arm_ids) == covered - random_processor.get_covered_arms(tested)
+        assert [step['arms'] for step in trace] == sorted(step['arms'] for step in trace)
+        # Случайный старт далёк от оптимума: поиск находит улучшающие обмены
+        assert len(trace) > 1 and trace[-1]['arms'] > trace[0]['arms']
+
+    # Счётчики обменов обновляются по событиям и совпадают с пересчётом по всему индексу
+    state = CoverageState(processor)
+    scores = SwapScores(state)
+    for software_id in processor.encode_software(['A', 'C', 'E']).tolist():
+        scores.add(software_id)
+    a_id, b_id, d_id = processor.encode_software(['A', 'B', 'D']).tolist()
+    scores.remove(a_id)
+    assert scores.closing.tolist() == closing_scores(state).tolist()
+    # PC-1, PC-2 и PC-6 (E уже выбрано) ждут пару {A, B}, PC-3 - только D
+    assert scores.pairs == {min(a_id, b_id) * len(processor.software_names) + max(a_id, b_id): 3}
+    assert scores.closing[d_id] == 1
+
+    greedy = optimizer.calculate_waves([1, 2, 1])
+    improved = optimizer.calculate_waves([1, 2, 1], local_search_time=5.0)
+    for wave in improved['waves']:
+        assert wave['local_search']['greedy_arms'] <= wave['local_search']['arms'] == wave['arms_migrated']
+    assert improved['total_migrated_arms'] >= greedy['total_migrated_arms']
+
+
+def test_coverage_upper_bounds():
+    """Лагранжева и LP оценки не меньше оптимума и попадают в отчёт эвристики"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor)
+    all_arms = set(processor.arm_software_map.keys())
+
+    for limit in range(1, 6):
+        _, optimal_arms = ILPSoftwareSelector(processor).find_best_software_set_ilp(limit, set(), all_arms)
+        for method in MigrationOptimizer.BOUND_METHODS:
+            bound = optimizer.coverage_upper_bound(limit, method=method)
+            assert len(optimal_arms) - 1e-6 <= bound <= len(all_arms)
+    # Все недостающее ПО закрывает по одному АРМ (PC-3 и PC-5 не помещаются в лимит)
+    assert optimizer.coverage_upper_bound(1, {'A', 'C'}, {'PC-3', 'PC-4', 'PC-5', 'PC-6'}) <= 1 + 1e-6
+
+    results = optimizer.calculate_waves([1, 2], upper_bound='lagrangian')
+    for wave in results['waves']:
+        assert wave['upper_bound'] >= wave['arms_migrated']
+        assert 0.0 <= wave['gap'] <= 1.0
+    assert results['upper_bound'] >= results['total_migrated_arms']
+    assert 'upper_bound' not in optimizer.calculate_waves([1, 2])
+
+
+def test_coverage_frontier():
+    """Кривая за один проход совпадает с расчётами по отдельным лимитам и уточняется ILP"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor, ilp_backend='highspy')
+    all_arms = set(processor.arm_software_map.keys())
+
+    frontier = optimizer.coverage_frontier()
+    assert list(frontier.budgets) == list(range(processor.total_software + 1))
+    assert np.all(np.diff(frontier.arms) >= 0) and frontier.arms[-1] == len(all_arms)
+    for limit in frontier.budgets[1:]:
+        greedy = len(optimizer.find_best_software_set(int(limit), set(), all_arms)[1])
+        assert frontier.arms[limit] >= greedy
+        selection = frontier.selection(limit)
+        assert len(selection) <= limit
+        assert len(processor.get_covered_arms(selection)) == frontier.arms[limit]
+    assert frontier.limit_for_coverage(frontier.arms[3]) <= 3
+    assert frontier.limit_for_coverage(len(all_arms) + 1) is None
+
+    optimizer.refine_frontier(frontier, [2, 3])
+    for limit in (2, 3):
+        _, optimal_arms = ILPSoftwareSelector(processor).find_best_software_set_ilp(limit, set(), all_arms)
+        assert frontier.refined[limit]['arms'] == len(optimal_arms)
+        assert frontier.arms_at(limit) == len(optimal_arms)
+    assert frontier.to_frame()['АРМ (ILP)'].notna().sum() == 2
+
+    # Протестированное ПО: его АРМ покрыты при любом лимите
+    tested = optimizer.coverage_frontier(already_tested={'A', 'B'}, merge_equivalent=True)
+    assert tested.arms[0] == 2 and tested.arms[-1] == len(all_arms)
+
+
+def test_result_cache_reuses_wave_prefix(tmp_path):
+    """Повторный расчёт берётся из кэша, при смене последнего лимита - первые волны"""
+    processor = _make_processor()
+    same = DataProcessor(_make_test_df().iloc[::-1], 'arm', 'software')
+    same.process()
+    assert processor.fingerprint == same.fingerprint
+
+    cache = ResultCache(max_entries=8, directory=str(tmp_path))
+    optimizer = MigrationOptimizer(processor, cache=cache)
+    plain = MigrationOptimizer(processor)
+
+    first = optimizer.calculate_waves([1, 2, 1])
+    assert 'reused_waves' not in first
+    first['waves'].clear()  # изменение результата не портит кэш
+    again = optimizer.calculate_waves([1, 2, 1])
+    assert again['reused_waves'] == 3 and len(again['waves']) == 3
+
+    changed = optimizer.calculate_waves([1, 2, 2])
+    assert changed['reused_waves'] == 2
+    expected = plain.calculate_waves([1, 2, 2])
+    for key in ('total_migrated_arms', 'software_wave_map', 'arm_wave_map', 'migrated_arms'):
+        assert changed[key] == expected[key]
+
+    # Адаптивные доли времени ILP зависят от всех лимитов: первые волны не переиспользуются
+    optimizer.calculate_waves([1, 2, 1], use_ilp=True, time_limit=30, adaptive_time=True)
+    adaptive = optimizer.calculate_waves([1, 2, 2], use_ilp=True, time_limit=30, adaptive_time=True)
+    assert 'reused_waves' not in adaptive
+
+    # Запись на диске переживает новый кэш; другие данные дают другой ключ
+    restored = MigrationOptimizer(same, cache=ResultCache(directory=str(tmp_path)))
+    assert restored.calculate_waves([1, 2, 1])['reused_waves'] == 3
+    assert optimizer.find_minimum_software_for_coverage(3) == optimizer.find_minimum_software_for_coverage(3)
+    assert cache.hits >= 1
+
+    tiny = ResultCache(max_entries=1)
+    tiny.put('a', 1)
+    tiny.put('b', 2)
+    assert tiny.get('a') is None and tiny.get('b') == 2
+
+
+def test_recommendation_pipeline_matches_separate_solves():
+    """Конвейер с общим состоянием даёт те же наборы, что и отдельные расчёты"""
+    processor = _make_processor()
+    optimizer = MigrationOptimizer(processor)
+
+    auto = optimizer.calculate_auto_recommendations(coverage_shares=[0.0, 0.3, 0.5, 1.0], wave_limits=[1, 2, 1, 2])
+    for share, recommendation in zip([0.0, 0.3, 0.5, 1.0], auto['minimum_sets']):
+        software, arms = optimizer.find_minimum_software_for_coverage(int(processor.total_arms * share))
+        assert set(recommendation['software_list']) == software
+        assert set(recommendation['arms_list']) == arms
+
+    expected = optimizer.calculate_waves([1, 2, 1, 2])
+    for recommendation, wave in zip(auto['waves'], expected['waves']):
+        assert set(recommendation['software_list']) == set(wave['software_list'])
+        assert set(recommendation['arms_list']) == set(wave['arms_list'])
+
+    # Результаты конвейера совпадают с последовательным вызовом ветвей
+    pipeline = RecommendationPipeline(_make_processor(_make_random_df(0)))
+    targets, limits = [5, 20, 40], [3, 2, 2]
+    combined = pipeline.run(targets, limits)
+    sequential = {'minimum_sets': pipeline.minimum_sets(targets), 'waves': pipeline.waves(limits)}
+    for branch in ('minimum_sets', 'waves'):
+        assert [(set(r['software_list']), set(r['arms_list'])) for r in combined[branch]] == [
+            (set(r['software_list']), set(r['arms_list'])) for r in sequential[branch]
+        ]
+    assert all(r['arms_count'] >= target for r, target in zip(combined['minimum_sets'], targets))
+
+    # Прежний формат: минимальный набор для 20% АРМ и две волны по 100 ПО
+    default = optimizer.calculate_auto_recommendations()
+    assert default['wave1_min']['arms_count'] >= int(processor.total_arms * 0.2)
+    assert default['wave1_opt']['software_count'] == processor.total_software
+    assert default['wave2_opt']['arms_count'] == 0
+
+
+def test_inventory_parquet_cache(tmp_path):
+    """Повторная загрузка того же файла читается из Parquet, кэш ограничен по размеру"""
+    import io
+    df = _make_test_df()
+    df['code'] = [1, 'x'] * (len(df) // 2) + [1] * (len(df) % 2)
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, sheet_name='ПО')
+    data = buffer.getvalue()
+
+    cache = InventoryCache(str(tmp_path))
+    assert list(cache.read_header(data, 'inventory.xlsx')) == ['arm', 'software', 'code']
+    first = cache.load(data, 'inventory.xlsx', sheet_name='ПО')
+    assert len(list(tmp_path.glob('*.parquet'))) == 1
+    second = cache.load(data, 'inventory.xlsx', sheet_name='ПО', columns=['arm', 'software'])
+    assert list(second.columns) == ['arm', 'software']
+    pd.testing.assert_frame_equal(first[['arm', 'software']].fillna(''), second.fillna(''))
+    assert list(cache.read_header(data, 'inventory.xlsx', sheet_name='ПО')) == ['arm', 'software', 'code']
+
+    # Нет листа - первый лист; CSV
+    assert len(cache.load(data, 'inventory.xlsx', sheet_name='Нет')) == len(df)
+    csv = df.to_csv(index=False).encode('utf-8-sig')
+    expected = pd.read_csv(io.BytesIO(csv), encoding='utf-8-sig')
+    pd.testing.assert_frame_equal(cache.load(csv, 'inventory.csv').fillna(''), expected.fillna('').astype({'code': str}))
+
+    # При нехватке места остаётся только последний файл
+    small = InventoryCache(str(tmp_path), max_bytes=1)
+    small.load(csv + b'\n', 'other.csv')
+    assert len(list(tmp_path.glob('*.parquet'))) == 1
+
+
+def test_streaming_csv_matches_in_memory(tmp_path):
+    """Потоковая обработка CSV по частям даёт тот же индекс, экспорт перечитывает строки"""
+    import io
+    from exporter import Exporter
+    df = _make_test_df()
+    df['family'] = df['software'].map({'A': 'F1', 'B': 'F1', 'C': 'F2'})
+    path = tmp_path / 'inventory.csv'
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+
+    expected = DataProcessor(df, 'arm', 'software')
+    expected.process()
+    for source in (str(path), path.read_bytes()):
+        streamed = DataProcessor.from_csv(source, 'arm', 'software', chunksize=4)
+        assert streamed.fingerprint == expected.fingerprint
+        assert streamed.arm_software_map == expected.arm_software_map
+        assert streamed.profile_count == expected.profile_count
+        assert len(streamed.original_df) == len(df)
+
+    families = streamed.software_families('family')
+    assert sorted(families.dropna()['family'].unique()) == ['F1', 'F2']
+    assert families.duplicated().sum() == 0
+
+    results = MigrationOptimizer(streamed).calculate_waves([2])
+    data = pd.read_excel(Exporter(streamed).export_to_excel(results, 'inventory.csv'), sheet_name='Data')
+    assert len(data) == len(df)
+    assert {'arm_id', 'software_name', 'wave'} <= set(data.columns)
+
+
+def test_streaming_csv_normalizes_numeric_ids(tmp_path):
+    """Числовые идентификаторы с пропусками получают одинаковые имена в потоке и в памяти"""
+    path = tmp_path / 'numeric.csv'
+    path.write_text('arm,software\n1,A\n2,B\n,C\n2,A\n', encoding='utf-8-sig')
+
+    expected = DataProcessor(pd.read_csv(path, encoding='utf-8-sig'), 'arm', 'software')
+    expected.process()
+    streamed = DataProcessor.from_csv(str(path), 'arm', 'software')
+    assert streamed.fingerprint == expected.fingerprint
+    assert streamed.arm_software_map == expected.arm_software_map
+    # Числовой столбец с пропусками - float, имена как у astype(str) в DataFrame
+    assert set(streamed.arm_software_map) == {'1.0', '2.0'}
+
+    # Целочисленный столбец без пропусков ("007" - то же число 7)
+    path.write_text('arm,software\n1,A\n007,B\n7,C\n', encoding='utf-8-sig')
+    expected = DataProcessor(pd.read_csv(path, encoding='utf-8-sig'), 'arm', 'software')
+    expected.process()
+    streamed = DataProcessor.from_csv(str(path), 'arm', 'software')
+    assert streamed.fingerprint == expected.fingerprint
+    assert streamed.arm_software_map == {'1': {'A'}, '7': {'B', 'C'}}
+
+
+def test_xlsx_reader_matches_read_excel():
+    """Потоковый разбор XLSX совпадает с pd.read_excel, выбранные столбцы идут в DataProcessor"""
+    import io
+    from xlsx_reader import XlsxReader
+    df = _make_test_df()
+    df['count'] = range(len(df))
+    df['share'] = [0.5, None, 1.25] * (len(df) // 3)
+    df['date'] = pd.Timestamp('2024-01-31')
+    df['flag'] = [True, False, True] * (len(df) // 3)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame({'x': [1]}).to_excel(writer, sheet_name='Другой', index=False)
+        df.to_excel(writer, sheet_name='ПО', index=False)
+    data = buffer.getvalue()
+
+    with XlsxReader(data, 'ПО') as reader:
+        assert reader.header() == list(df.columns)
+        expected = pd.read_excel(io.BytesIO(data), sheet_name='ПО')
+        pd.testing.assert_frame_equal(reader.read(), expected)
+        chunks = list(reader.iter_chunks(['software', 'arm'], chunksize=4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 4, 3]
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), expected[['software', 'arm']]
+        )
+    # Нет листа - первый лист
+    assert XlsxReader(data, 'Нет').header() == ['x']
+
+    expected_processor = DataProcessor(df, 'arm', 'software')
+    expected_processor.process()
+    streamed = DataProcessor.from_xlsx(data, 'arm', 'software', sheet_name='ПО', chunksize=4, family_column='count')
+    assert streamed.fingerprint == expected_processor.fingerprint
+    assert len(streamed.software_families('count')) == len(expected_processor.software_families('count'))
+    assert len(streamed.original_df) == len(expected)
+
+
+def test_solver_portfolio(capsys):
+    """Портфель решателей даёт тот же оптимум, что и один HiGHS"""
+    processor = _make_processor()
+    all_arms = set(processor.arm_software_map.keys())
+
+    portfolio = PortfolioSelector(processor, n_jobs=3)
+    software, arms = portfolio.find_best_software_set_ilp(3, set(), all_arms, time_limit=30)
+    expected_software, expected_arms = ILPSoftwareSelector(processor, backend='highspy').find_best_software_set_ilp(
+        3, set(), all_arms
+    )
+    assert len(arms) == len(expected_arms) and len(software) == len(expected_software)
+    assert {'highs', 'greedy', 'cbc'} >= {result['name'] for result in portfolio.last_portfolio_report}
+    assert portfolio.last_model_stats['status'] == 'Optimal'
+    # Доказанный оптимум без сбоев не пишется в лог
+    assert 'Portfolio:' not in capsys.readouterr().out
+
+    software, arms = portfolio.find_minimum_software_for_coverage_ilp(4, time_limit=30)
+    assert len(arms) >= 4 and len(software) == 3
+
+    # Только жадный решатель: его результат и возвращается
+    greedy_only = PortfolioSelector(processor, configs=[{'name': 'greedy', 'backend': 'greedy'}])
+    assert greedy_only.find_best_software_set_ilp(3, set(), all_arms)[1]
+    assert greedy_only.last_model_stats['status'] == 'Heuristic'
+
+    optimizer = MigrationOptimizer(processor, ilp_backend='portfolio')
+    results = optimizer.calculate_waves([2, 2], use_ilp=True, time_limit=30)
+    plain = MigrationOptimizer(processor, ilp_backend='highspy').calculate_waves([2, 2], use_ilp=True)
+    assert [w['arms_migrated'] for w in results['waves']] == [w['arms_migrated'] for w in plain['waves']]
+
+def test_portfolio_survives_dead_worker(monkeypatch, capsys):
+    """Процесс решателя, завершившийся без результата, не блокирует портфель без лимита времени"""
+    import os
+    import portfolio
+
+    processor = _make_processor()
+    real_worker = portfolio._portfolio_worker
+
+    def worker(results_queue, config, *args):
+        if config['name'] == 'crash':
+            os._exit(1)
+        real_worker(results_queue, config, *args)
+
+    monkeypatch.setattr(portfolio, '_portfolio_worker', worker)
+    selector = PortfolioSelector(processor, configs=[
+        {'name': 'crash', 'backend': 'highspy'},
+        {'name': 'greedy', 'backend': 'greedy'},
+    ], n_jobs=2)
+    software, arms = selector.find_best_software_set_ilp(2, set(), set(processor.arm_software_map.keys()))
+    assert arms == {'PC-1', 'PC-2'}
+    assert {'name': 'crash', 'status': 'Exited (1)', 'arms': 0, 'software': 0, 'time': None} in selector.last_portfolio_report
+    assert '1 exited without a result' in capsys.readouterr().out
+
 if __name__ == "__main__":
     test_basic_functionality()
@@ -0,0 +1,75 @@
+"""
+Модуль распределения общего лимита времени между волнами ILP
+Неиспользованное волной время переходит на следующие волны, а доля каждой
+волны пропорциональна оценке размера её задачи
+"""
+
+from typing import Dict, List, Optional
+
+
+class WaveTimeBudget:
+    """
+    Планировщик лимита времени по волнам: перед решением волны выдаёт её
+    лимит, после решения учитывает фактически затраченное время
+    """
+
+    # Минимальный лимит волны в секундах, если общий лимит уже израсходован
+    MIN_WAVE_SECONDS = 1.0
+
+    def __init__(self, total: Optional[float], weights: List[float], adaptive: bool = True):
+        """
+        Инициализация планировщика
+
+        Args:
+            total: Общий лимит времени в секундах (None = без ограничения)
+            weights: Оценки размера задачи каждой волны (доли лимита)
+            adaptive: False - каждой волне total / количество волн без переноса остатка
+        """
+        self.total = total
+        self.weights = [max(float(weight), 0.0) for weight in weights]
+        self.adaptive = adaptive
+        self.allocated: List[Optional[float]] = []
+        self.spent: List[float] = []
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Неизрасходованный общий лимит (None = без ограничения)"""
+        if self.total is None:
+            return None
+        return max(self.total - sum(self.spent), 0.0)
+
+    def next_limit(self) -> Optional[float]:
+        """
+        Лимит времени следующей волны: остаток общего лимита, делённый между
+        оставшимися волнами пропорционально их весам
+
+        Returns:
+            Лимит в секундах (None = без ограничения)
+        """
+        if self.total is None:
+            return None
+        wave = len(self.spent)
+        if not self.adaptive:
+            return self.total / len(self.weights)
+        weights = self.weights[wave:]
+        share = weights[0] / sum(weights) if sum(weights) > 0 else 1.0 / len(weights)
+        return max(self.remaining * share, self.MIN_WAVE_SECONDS)
+
+    def record(self, allocated: Optional[float], spent: float) -> Dict[str, Optional[float]]:
+        """
+        Учесть решённую волну
+
+        Args:
+            allocated: Выданный волне лимит
+            spent: Фактически затраченное время в секундах
+
+        Returns:
+            Отчёт волны: выданный лимит, затраченное время и остаток общего лимита
+        """
+        self.allocated.append(allocated)
+        self.spent.append(spent)
+        return {'allocated': allocated, 'spent': spent, 'remaining': self.remaining}
+
+    def report(self) -> Dict[str, Optional[float]]:
+        """Итог по всем волнам"""
+        return {'total': self.total, 'spent': sum(self.spent), 'remaining': self.remaining}
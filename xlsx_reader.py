@@ -0,0 +1,347 @@
+"""
+Модуль потокового чтения XLSX
+Лист читается напрямую из XML внутри архива потоковым парсером: заголовки
+доступны после разбора первой строки, данные выдаются частями и только по
+нужным столбцам (значения остальных ячеек не преобразуются и не хранятся)
+"""
+
+import io
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Union
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_RELATIONSHIPS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_RELATIONSHIPS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# Размер блока, которым XML листа подаётся парсеру
+_BLOCK_SIZE = 1 << 20
+
+
+def _local(name: str) -> str:
+    """Имя элемента без префикса пространства имён"""
+    return name.rpartition(':')[2]
+
+
+def _column_index(reference: str) -> int:
+    """Номер столбца (с нуля) по адресу ячейки ("B12" -> 1)"""
+    index = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+class XlsxReader:
+    """
+    Потоковое чтение одного листа XLSX (без загрузки книги целиком)
+    """
+
+    def __init__(self, source: Union[str, bytes], sheet_name: Optional[str] = None):
+        """
+        Args:
+            source: Путь к файлу или его содержимое
+            sheet_name: Лист (если его нет или None - первый лист)
+        """
+        self.source = source
+        self._archive = zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+        self._sheet_path, self._epoch = self._locate_sheet(sheet_name)
+        self._date_styles = self._read_date_styles()
+        self._shared_strings: Optional[List[str]] = None
+        self._header: Optional[List[str]] = None
+        self._header_row = 0
+        self._row_number = 0
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def __enter__(self) -> 'XlsxReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _locate_sheet(self, sheet_name: Optional[str]):
+        """Путь к XML листа в архиве и начало отсчёта дат книги"""
+        workbook = ET.fromstring(self._archive.read('xl/workbook.xml'))
+        properties = workbook.find(f'{_MAIN}workbookPr')
+        date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+        epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        sheets = [
+            (sheet.get('name'), sheet.get(f'{_RELATIONSHIPS}id'))
+            for sheet in workbook.iter(f'{_MAIN}sheet')
+        ]
+        if not sheets:
+            raise ValueError('Workbook has no worksheets')
+        relation = next((rid for name, rid in sheets if name == sheet_name), sheets[0][1])
+
+        relations = ET.fromstring(self._archive.read('xl/_rels/workbook.xml.rels'))
+        for item in relations.iter(f'{_PACKAGE_RELATIONSHIPS}Relationship'):
+            if item.get('Id') == relation:
+                target = item.get('Target')
+                path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+                return path, epoch
+        raise ValueError(f'Worksheet relation {relation} not found')
+
+    def _read_date_styles(self) -> set:
+        """Номера стилей ячеек с форматом даты (числа в них - даты Excel)"""
+        try:
+            styles = ET.fromstring(self._archive.read('xl/styles.xml'))
+        except KeyError:
+            return set()
+        formats = dict(BUILTIN_FORMATS)
+        for number_format in styles.iter(f'{_MAIN}numFmt'):
+            formats[int(number_format.get('numFmtId'))] = number_format.get('formatCode')
+        cell_formats = styles.find(f'{_MAIN}cellXfs')
+        if cell_formats is None:
+            return set()
+        return {
+            str(index) for index, xf in enumerate(cell_formats.findall(f'{_MAIN}xf'))
+            if is_date_format(formats.get(int(xf.get('numFmtId', 0))) or '')
+        }
+
+    @property
+    def shared_strings(self) -> List[str]:
+        """Таблица общих строк книги (разбирается один раз)"""
+        if self._shared_strings is None:
+            strings: List[str] = []
+            parts: List[str] = []
+            # Глубина вложенности в <t> и в фонетические подсказки <rPh> (их текст не входит в значение)
+            state = {'text': False, 'phonetic': 0}
+
+            def start(name, attrs):
+                name = _local(name)
+                if name == 't':
+                    state['text'] = True
+                elif name == 'rPh':
+                    state['phonetic'] += 1
+                elif name == 'si':
+                    parts.clear()
+
+            def end(name):
+                name = _local(name)
+                if name == 't':
+                    state['text'] = False
+                elif name == 'rPh':
+                    state['phonetic'] -= 1
+                elif name == 'si':
+                    strings.append(''.join(parts))
+
+            def data(text):
+                if state['text'] and not state['phonetic']:
+                    parts.append(text)
+
+            try:
+                with self._archive.open('xl/sharedStrings.xml') as stream:
+                    for _ in self._parse(stream, start, end, data):
+                        pass
+            except KeyError:
+                pass
+            self._shared_strings = strings
+        return self._shared_strings
+
+    @staticmethod
+    def _parse(stream, start, end, data, block_size: int = _BLOCK_SIZE) -> Iterator[None]:
+        """Разбор XML блоками (генератор: управление возвращается после каждого блока)"""
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = data
+        while True:
+            block = stream.read(block_size)
+            parser.Parse(block, not block)
+            yield
+            if not block:
+                return
+
+    def _convert(self, value: str, kind: Optional[str], style: Optional[str]):
+        """Значение ячейки по тексту <v> и типу (строки, числа, логические, даты)"""
+        if kind == 's':
+            return self.shared_strings[int(value)]
+        if kind in ('inlineStr', 'str', 'e'):
+            return value
+        if kind == 'b':
+            return value in ('1', 'true')
+        if kind == 'd':
+            return pd.Timestamp(value)
+        number = float(value)
+        if style in self._date_styles:
+            return from_excel(number, self._epoch)
+        # Целые числа - int, как в pd.read_excel
+        return int(number) if number.is_integer() else number
+
+    def _iter_rows(
+        self,
+        positions: Optional[List[int]] = None,
+        chunksize: int = 200_000,
+        min_row: int = 1,
+        max_rows: Optional[int] = None,
+        block_size: int = _BLOCK_SIZE
+    ) -> Iterator[List[list]]:
+        """
+        Непустые строки листа пачками по chunksize: значения ячеек в столбцах
+        positions (None = все столбцы строки); строки с номером меньше min_row
+        пропускаются, после max_rows строк разбор прекращается. Номер
+        последней выданной строки - в _row_number
+        """
+        slot_of = None if positions is None else {position: slot for slot, position in enumerate(positions)}
+        width = 0 if positions is None else len(positions)
+        limit = max_rows if max_rows is not None else float('inf')
+        rows: List[list] = []
+        batches: List[List[list]] = []
+        parts: List[str] = []
+        # Имена элементов без префикса и номера столбцов по буквам адреса (обработчики
+        # вызываются для каждой ячейки листа, поэтому разбор имён кэшируется)
+        names: Dict[str, str] = {}
+        columns: Dict[str, int] = {}
+        convert = self._convert
+        # Текущая строка и ячейка: значения, номер строки, количество выданных строк,
+        # номер столбца, позиция в строке, тип, стиль, собирается ли текст ячейки
+        row: list = []
+        number = count = 0
+        column = -1
+        slot = kind = style = None
+        text = False
+
+        def local(name):
+            result = names[name] = _local(name)
+            return result
+
+        def start(name, attrs):
+            nonlocal row, number, column, slot, kind, style, text
+            name = names.get(name) or local(name)
+            if name == 'c':
+                reference = attrs.get('r')
+                if reference:
+                    letters = reference.rstrip('0123456789')
+                    column = columns.get(letters)
+                    if column is None:
+                        column = columns[letters] = _column_index(letters)
+                else:
+                    column += 1
+                if count >= limit:
+                    slot = None
+                else:
+                    slot = column if slot_of is None else slot_of.get(column)
+                if slot is not None:
+                    kind = attrs.get('t')
+                    style = attrs.get('s')
+                    parts.clear()
+            elif name == 'v' or name == 't':
+                text = slot is not None
+            elif name == 'row':
+                reference = attrs.get('r')
+                number = int(reference) if reference else number + 1
+                row = [None] * width
+                column = -1
+
+        def end(name):
+            nonlocal slot, text, count
+            name = names.get(name) or local(name)
+            if name == 'c':
+                if slot is not None and parts:
+                    if slot >= len(row):
+                        row.extend([None] * (slot + 1 - len(row)))
+                    row[slot] = convert(''.join(parts), kind, style)
+                slot = None
+            elif name == 'v' or name == 't':
+                text = False
+            elif name == 'row':
+                if count < limit and number >= min_row and any(value is not None for value in row):
+                    self._row_number = number
+                    count += 1
+                    rows.append(row)
+                    if len(rows) >= chunksize:
+                        batches.append(rows[:])
+                        rows.clear()
+
+        def data(value):
+            if text:
+                parts.append(value)
+
+        with self._archive.open(self._sheet_path) as stream:
+            for _ in self._parse(stream, start, end, data, block_size):
+                while batches:
+                    yield batches.pop(0)
+                if count >= limit:
+                    break
+        if rows:
+            yield rows
+
+    def header(self) -> List[str]:
+        """
+        Заголовки столбцов (первая непустая строка листа); остальная часть листа не разбирается
+        """
+        if self._header is None:
+            first = next(self._iter_rows(max_rows=1, block_size=1 << 16), [[]])[0]
+            self._header_row = self._row_number
+            # Пустые ячейки в конце строки заголовков не образуют столбцов
+            while first and first[-1] is None:
+                first.pop()
+            names: List[str] = []
+            seen: Dict[str, int] = {}
+            for index, value in enumerate(first):
+                name = f'Unnamed: {index}' if value is None else str(value)
+                # Повторяющиеся имена различаются суффиксом, как в pandas
+                if name in seen:
+                    seen[name] += 1
+                    name = f'{name}.{seen[name]}'
+                seen.setdefault(name, 0)
+                names.append(name)
+            self._header = names
+        return self._header
+
+    def iter_chunks(
+        self,
+        columns: Optional[List[str]] = None,
+        chunksize: int = 200_000,
+        dtype: Optional[Dict] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Строки данных частями: только столбцы columns, значения ячеек типизированы.
+        Строки, пустые во всех столбцах columns, пропускаются
+
+        Args:
+            columns: Только эти столбцы в заданном порядке (None = все)
+            chunksize: Количество строк в части
+            dtype: Столбцы, значения которых приводятся к тексту ({столбец: str})
+
+        Raises:
+            ValueError: Столбца нет в заголовках листа
+        """
+        header = self.header()
+        columns = header if columns is None else list(columns)
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f'Columns not found in sheet: {missing}')
+        positions = [header.index(column) for column in columns]
+        text_columns = [column for column, kind in (dtype or {}).items() if kind is str and column in columns]
+
+        # Данные - строки после заголовков
+        for rows in self._iter_rows(positions, chunksize, min_row=self._header_row + 1):
+            chunk = pd.DataFrame(rows, columns=columns)
+            for column in chunk.columns[chunk.dtypes.eq(object)]:
+                values = chunk[column]
+                missing = values.isna()
+                if column in text_columns:
+                    values = values.where(missing, values.astype(str))
+                # Пустые ячейки - NaN, как в pd.read_excel
+                chunk[column] = values.where(~missing, np.nan) if missing.any() else values
+            yield chunk
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Лист целиком (только столбцы columns)"""
+        columns = self.header() if columns is None else list(columns)
+        chunks = list(self.iter_chunks(columns))
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)